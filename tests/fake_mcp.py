@@ -0,0 +1,98 @@
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+# handler(req, msg) returns the JSON-RPC result, or None once it has replied itself.
+Handler = Callable[["McpRequest", dict], "dict | None"]
+
+
+class McpRequest(BaseHTTPRequestHandler):
+    # One request to the fake MCP server. Notifications get a bare 202; requests
+    # go to the handler registered for their method ("*" catches the rest), and
+    # methods without a handler answer with an empty result.
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "_FakeMcpServer"
+
+    def log_message(self, *_args: object) -> None:
+        pass
+
+    def reply(
+        self,
+        status: int,
+        body: bytes = b"",
+        content_type: str = "",
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def reply_result(self, msg: dict, result: dict) -> None:
+        data = json.dumps({"jsonrpc": "2.0", "id": msg["id"], "result": result}).encode("utf-8")
+        self.reply(200, data, "application/json", self._session_headers())
+
+    def reply_events(self, events: list[dict]) -> None:
+        body = "".join(f"event: message\ndata: {json.dumps(e)}\n\n" for e in events).encode("utf-8")
+        self.reply(200, body, "text/event-stream", self._session_headers())
+
+    def do_POST(self) -> None:
+        msg = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if "id" not in msg:
+            self.reply(202)
+            return
+        handlers = self.server.handlers
+        handler = handlers.get(msg["method"]) or handlers.get("*")
+        result = handler(self, msg) if handler else {}
+        if result is not None:
+            self.reply_result(msg, result)
+
+    def do_GET(self) -> None:
+        self._route("GET")
+
+    def do_DELETE(self) -> None:
+        self._route("DELETE")
+
+    def _route(self, verb: str) -> None:
+        handler = self.server.handlers.get(verb)
+        if handler is None:
+            self.reply(405)
+        else:
+            handler(self, {})
+
+    def _session_headers(self) -> dict[str, str]:
+        session = self.server.session_id
+        if session is None:
+            return {}
+        return {"MCP-Session-Id": session(self) if callable(session) else session}
+
+
+class _FakeMcpServer(ThreadingHTTPServer):
+    daemon_threads = True
+    handlers: dict[str, Handler]
+    session_id: "str | Callable[[McpRequest], str] | None"
+
+
+def serve(
+    test: unittest.TestCase,
+    handlers: dict[str, Handler] | None = None,
+    session_id: "str | Callable[[McpRequest], str] | None" = None,
+) -> str:
+    # Starts a fake MCP server for one test and returns its base URL. handlers
+    # maps JSON-RPC methods (or "GET"/"DELETE") to callbacks; the server is shut
+    # down when the test ends.
+    server = _FakeMcpServer(("127.0.0.1", 0), McpRequest)
+    server.handlers = dict(handlers or {})
+    server.session_id = session_id
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    test.addCleanup(server.server_close)
+    test.addCleanup(server.shutdown)
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
@@ -0,0 +1,116 @@
+import json
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+from trpgai.batch import load_checkpoint, run_batch
+from trpgai.config import AppConfig, ChatConfig, ProviderConfig
+from trpgai.openai_client import ChatClient
+
+
+class _FakeProvider(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args: object) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        messages = body["messages"]
+        last = messages[-1]
+        if last["role"] == "user" and "roll" in last["content"]:
+            msg = {
+                "content": None,
+                "tool_calls": [
+                    {
+                        "id": "c1",
+                        "type": "function",
+                        "function": {"name": "roll_dice", "arguments": '{"expression":"1d1+1"}'},
+                    }
+                ],
+            }
+        elif last["role"] == "tool":
+            msg = {"content": "rolled " + str(json.loads(last["content"])["total"])}
+        else:
+            msg = {"content": "echo " + last["content"]}
+
+        data = json.dumps({"choices": [{"message": msg}]}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeProvider)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        host, port = self.server.server_address[:2]
+        self.cfg = AppConfig(
+            active_provider="p1",
+            providers={"p1": ProviderConfig(base_url=f"http://{host}:{port}", models=["m"], model="m")},
+            chat=ChatConfig(system_prompt="", enable_tool_roll=True),
+        )
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def test_runs_items_with_tools_and_resumes(self) -> None:
+        src = self.dir / "prompts.jsonl"
+        out = self.dir / "out.jsonl"
+        src.write_text(
+            "\n".join(
+                [
+                    json.dumps({"id": "a", "prompt": "hello"}),
+                    json.dumps({"id": "b", "prompt": "please roll"}),
+                    "{not json",
+                    json.dumps({"prompt": "no id"}),
+                ]
+            )
+            + "\n",
+            encoding="utf-8",
+        )
+
+        counts = run_batch(self.cfg, src, out, concurrency=3)
+        self.assertEqual(counts["total"], 4)
+        self.assertEqual(counts["ok"], 3)
+        self.assertEqual(counts["failed"], 1)
+
+        recs = {r["id"]: r for r in map(json.loads, out.read_text(encoding="utf-8").splitlines())}
+        self.assertEqual(recs["a"]["content"], "echo hello")
+        self.assertEqual(recs["b"]["content"], "rolled 2")
+        self.assertEqual(recs["b"]["tool_calls"], 1)
+        self.assertFalse(recs["line-3"]["ok"])
+        self.assertIn("line-4", recs)
+
+        again = run_batch(self.cfg, src, out, concurrency=3)
+        self.assertEqual(again["skipped"], 4)
+        self.assertEqual(again["ok"] + again["failed"], 0)
+
+    def test_closes_only_the_client_it_made(self) -> None:
+        src = self.dir / "prompts.jsonl"
+        src.write_text(json.dumps({"id": "a", "prompt": "hello"}) + "\n", encoding="utf-8")
+        with mock.patch.object(ChatClient, "close", autospec=True) as close:
+            run_batch(self.cfg, src, self.dir / "out1.jsonl")
+            self.assertEqual(close.call_count, 1)
+            client = ChatClient(self.cfg)
+            run_batch(self.cfg, src, self.dir / "out2.jsonl", client=client)
+            self.assertEqual(close.call_count, 1)
+        client.close()
+
+    def test_checkpoint_ignores_torn_line(self) -> None:
+        out = self.dir / "out.jsonl"
+        out.write_text(json.dumps({"id": "a", "ok": True}) + "\n" + '{"id": "b", "ok"', encoding="utf-8")
+        self.assertEqual(load_checkpoint(out), {"a"})
+
+
+if __name__ == "__main__":
+    unittest.main()
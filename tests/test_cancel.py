@@ -0,0 +1,106 @@
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from trpgai.config import AppConfig, ChatConfig, ProviderConfig
+from trpgai.openai_client import CancelToken, ChatCancelled, ChatClient, ChatMessage
+
+
+class _StallingStream(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args: object) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(b'data: {"choices": [{"delta": {"content": "Once"}}]}\n\n')
+        self.wfile.flush()
+        time.sleep(5)
+
+
+class _SlowHeaders(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args: object) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path.endswith("/throttle/chat/completions"):
+            self.send_response(429)
+            self.send_header("Retry-After", "10")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        time.sleep(5)
+
+
+class TestCancel(unittest.TestCase):
+    def test_cancel_closes_stream_promptly(self) -> None:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _StallingStream)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            host, port = server.server_address[:2]
+            cfg = AppConfig(
+                active_provider="p1",
+                providers={"p1": ProviderConfig(base_url=f"http://{host}:{port}", models=["m"], model="m")},
+                chat=ChatConfig(system_prompt="", stream=True, enable_tool_roll=False),
+            )
+            token = CancelToken()
+            deltas: list[str] = []
+
+            def on_stream(ev: dict) -> None:
+                if ev.get("type") == "content_delta":
+                    deltas.append(ev["delta"])
+                    threading.Timer(0.05, token.cancel).start()
+
+            start = time.monotonic()
+            with self.assertRaises(ChatCancelled):
+                ChatClient(cfg).chat([ChatMessage(role="user", content="hi")], on_stream=on_stream, cancel=token)
+            self.assertLess(time.monotonic() - start, 2.0)
+            self.assertEqual(deltas, ["Once"])
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_cancel_before_headers_and_during_backoff(self) -> None:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowHeaders)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            host, port = server.server_address[:2]
+            # First waiting for the response headers, then sleeping off a 429's Retry-After.
+            for path in ("/slow", "/throttle"):
+                provider = ProviderConfig(base_url=f"http://{host}:{port}{path}", models=["m"], model="m")
+                cfg = AppConfig(
+                    active_provider="p1",
+                    providers={"p1": provider},
+                    chat=ChatConfig(system_prompt="", enable_tool_roll=False),
+                )
+                token = CancelToken()
+                threading.Timer(0.2, token.cancel).start()
+                start = time.monotonic()
+                with self.assertRaises(ChatCancelled):
+                    ChatClient(cfg).chat([ChatMessage(role="user", content="hi")], cancel=token)
+                self.assertLess(time.monotonic() - start, 1.5, path)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_cancelled_before_start(self) -> None:
+        token = CancelToken()
+        token.cancel()
+        cfg = AppConfig(chat=ChatConfig(system_prompt="", enable_tool_roll=False))
+        with self.assertRaises(ChatCancelled):
+            ChatClient(cfg).chat([ChatMessage(role="user", content="hi")], cancel=token)
+
+
+if __name__ == "__main__":
+    unittest.main()
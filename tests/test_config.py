@@ -57,6 +57,16 @@ class TestConfig(unittest.TestCase):
             except OSError:
                 pass
 
+    def test_cache_tools_accepts_a_bare_string(self) -> None:
+        def cache_tools(value: object) -> list[str]:
+            cfg = AppConfig.from_dict({"mcp": {"servers": {"s": {"url": "http://x", "cache_tools": value}}}})
+            return cfg.mcp.servers["s"].cache_tools
+
+        self.assertEqual(cache_tools("roll_dice"), ["roll_dice"])
+        self.assertEqual(cache_tools(["a", "", "b"]), ["a", "b"])
+        self.assertEqual(cache_tools({"a": 1}), [])
+        self.assertEqual(cache_tools(None), [])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,6 +1,8 @@
+import random
+import time
 import unittest
 
-from trpgai.dice import DiceSyntaxError, roll_expression
+from trpgai.dice import DiceSyntaxError, _compile, dice_count, distribution, roll_expression, roll_total
 
 
 class TestDice(unittest.TestCase):
@@ -27,6 +29,49 @@ class TestDice(unittest.TestCase):
         with self.assertRaises(DiceSyntaxError):
             roll_expression("2d0", seed=0)
 
+    def test_compiled_expressions_are_cached(self) -> None:
+        _compile.cache_clear()
+        for seed in range(5):
+            roll_expression("3d8+2", seed=seed)
+        self.assertEqual(_compile.cache_info().hits, 4)
+        self.assertEqual(roll_total("3d8+2", random.Random(3)), roll_expression("3d8+2", seed=3)["total"])
+
+    def test_distribution_exact_and_sampled(self) -> None:
+        d = distribution("1d4-1")
+        self.assertEqual(d["pmf"], {0: 0.25, 1: 0.25, 2: 0.25, 3: 0.25})
+        self.assertEqual(d["mean"], 1.5)
+        s = distribution("2d6kh1", samples=5000, seed=1)
+        self.assertFalse(s["exact"])
+        self.assertEqual((s["min"], s["max"]), (1, 6))
+
+    def test_distribution_work_is_bounded(self) -> None:
+        # Many dice convolve exactly as long as the integer counts stay cheap.
+        d = distribution("100d100")
+        self.assertTrue(d["exact"])
+        self.assertAlmostEqual(d["mean"], 5050.0)
+        self.assertAlmostEqual(sum(d["pmf"].values()), 1.0)
+        self.assertEqual(distribution("-2d3+4dF")["pmf"], distribution("4dF-2d3")["pmf"])
+
+        s = distribution("1000d20", samples=100_000)
+        self.assertFalse(s["exact"])
+        self.assertLessEqual(s["samples"] * dice_count("1000d20"), 300_000)
+        with self.assertRaises(DiceSyntaxError):
+            roll_expression("600d6+401d4")
+
+    def test_wide_die_is_sampled_and_bucketed(self) -> None:
+        start = time.monotonic()
+        d = distribution("1d29999999", samples=100_000)
+        self.assertLess(time.monotonic() - start, 5.0)
+        self.assertFalse(d["exact"])
+        self.assertLessEqual(len(d["pmf"]), 1000)
+        self.assertGreater(d["bucket"], 1)
+        self.assertAlmostEqual(sum(d["pmf"].values()), 1.0)
+        self.assertTrue(all((k - d["min"]) % d["bucket"] == 0 for k in d["pmf"]))
+        # Exact but wider than the row cap: summed into ranges of 10 totals.
+        e = distribution("100d100")
+        self.assertEqual((e["bucket"], len(e["pmf"])), (10, 991))
+        self.assertEqual(distribution("2d6")["bucket"], 1)
+
 
 if __name__ == "__main__":
     unittest.main()
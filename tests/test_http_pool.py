@@ -0,0 +1,88 @@
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from trpgai.http_pool import ConnectionPool
+
+
+class _Ok(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args: object) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Ok)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        host, port = self.server.server_address[:2]
+        self.url = f"http://{host}:{port}/v1/x"
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_reuses_connections(self) -> None:
+        pool = ConnectionPool()
+        for _ in range(3):
+            with pool.request("POST", self.url, body=b"{}") as resp:
+                self.assertEqual(resp.read(), b"ok")
+        st = pool.stats()
+        self.assertEqual(st["opened"], 1)
+        self.assertEqual(st["reused"], 2)
+        pool.close()
+
+    def test_prewarm_hit_rate(self) -> None:
+        pool = ConnectionPool()
+        self.assertTrue(pool.prewarm(self.url))
+        self.assertFalse(pool.prewarm(self.url))
+        with pool.request("POST", self.url, body=b"{}") as resp:
+            self.assertTrue(resp.reused)
+            resp.read()
+        st = pool.stats()
+        self.assertEqual(st["prewarms"], 1)
+        self.assertEqual(st["prewarm_hits"], 1)
+        self.assertEqual(st["prewarm_hit_rate"], 1.0)
+
+        pool.close()
+        self.assertTrue(pool.prewarm(self.url))
+        pool.close()
+        self.assertEqual(pool.stats()["prewarm_wasted"], 1)
+
+    def test_abort_racing_close_releases_once(self) -> None:
+        pool = ConnectionPool()
+        for _ in range(50):
+            resp = pool.request("POST", self.url, body=b"{}")
+            resp.read()
+            barrier = threading.Barrier(2)
+
+            def abort() -> None:
+                barrier.wait()
+                resp.abort()
+
+            t = threading.Thread(target=abort)
+            t.start()
+            barrier.wait()
+            resp.close()
+            t.join()
+            resp.abort()
+            resp.close()
+            # Either close won (one idle connection) or abort did (none); never both.
+            idle = pool._idle.get(resp._key) or []
+            self.assertLessEqual(len(idle), 1)
+            for conn, _t in idle:
+                self.assertIsNotNone(conn.sock)
+            pool.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
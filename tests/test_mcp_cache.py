@@ -0,0 +1,93 @@
+import json
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from fake_mcp import McpRequest, serve
+
+from trpgai.config import McpServerConfig
+from trpgai.mcp_cache import ToolCatalogCache
+from trpgai.mcp_client import McpManager
+
+
+def _echo_with_list_changed(req: McpRequest, msg: dict) -> None:
+    # Reply over SSE with a list_changed notification ahead of the result.
+    note = {"jsonrpc": "2.0", "method": "notifications/tools/list_changed"}
+    resp = {"jsonrpc": "2.0", "id": msg["id"], "result": {"content": [{"type": "text", "text": "hi"}]}}
+    req.reply_events([note, resp])
+
+
+class TestMcpToolCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.list_calls = 0
+
+        def tools_list(_req: object, _msg: dict) -> dict:
+            self.list_calls += 1
+            return {"tools": [{"name": "echo", "description": "echo", "inputSchema": {"type": "object"}}]}
+
+        url = serve(
+            self,
+            {
+                "initialize": lambda _req, _msg: {"protocolVersion": "2025-06-18"},
+                "tools/list": tools_list,
+                "tools/call": _echo_with_list_changed,
+            },
+        )
+        self.cfg = McpServerConfig(url=url + "/mcp", transport="streamable_http", timeout_s=5.0)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache = ToolCatalogCache(Path(self.tmp.name) / "tools.json", ttl_s=60.0)
+
+    def _wait_list_calls(self, n: int) -> None:
+        deadline = time.monotonic() + 5.0
+        while self.list_calls < n and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+    def test_cached_catalog_is_used_then_invalidated_by_list_changed(self) -> None:
+        McpManager({"s": self.cfg}, cache=self.cache).refresh_tools()
+        self.assertEqual(self.list_calls, 1)
+        entry = self.cache.load(self.cfg)
+        self.assertEqual(entry["protocol_version"], "2025-06-18")
+
+        mgr = McpManager({"s": self.cfg}, cache=self.cache)
+        self.assertEqual(mgr.status()["s"]["tool_count"], 1)
+        self.assertFalse(mgr.status()["s"]["initialized"])
+        self.assertEqual(self.list_calls, 1)
+
+        # Lazy handshake on first call; the reply carries list_changed.
+        out = mgr.call_tool("mcp__s__echo", {})
+        self.assertEqual(out["text"], "hi")
+        self._wait_list_calls(3)
+        self.assertEqual(self.list_calls, 3)
+
+    def test_changed_config_misses_cache(self) -> None:
+        self.cache.store(self.cfg, [{"name": "echo"}], "2025-06-18")
+        other = McpServerConfig(url=self.cfg.url, headers={"Authorization": "Bearer x"})
+        self.assertIsNone(self.cache.load(other))
+        self.assertIsNotNone(self.cache.load(self.cfg))
+
+        expired = ToolCatalogCache(self.cache._path, ttl_s=0.0)
+        self.assertIsNone(expired.load(self.cfg))
+
+    def test_caches_sharing_a_path_write_whole_files(self) -> None:
+        # Each ChatClient build makes its own cache object on the same path.
+        path = self.cache._path
+
+        def writer(n: int) -> None:
+            cache = ToolCatalogCache(path, ttl_s=60.0)
+            for i in range(30):
+                cache.store(McpServerConfig(url=f"http://h{n}/{i}"), [{"name": "t"}], "2025-06-18")
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(10.0)
+        self.assertEqual(len(json.loads(path.read_text(encoding="utf-8"))["entries"]), 6 * 30)
+        self.assertEqual([p.name for p in path.parent.iterdir()], [path.name])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import threading
+import time
+import unittest
+
+from fake_mcp import McpRequest, serve
+
+from trpgai.config import McpServerConfig
+from trpgai.mcp_client import McpCancelled, McpManager
+
+MAX_CONCURRENCY = 3
+
+
+class TestMcpConcurrency(unittest.TestCase):
+    def test_call_tool_from_many_threads(self) -> None:
+        lock = threading.Lock()
+        in_flight = 0
+        peak = 0
+        seen_ids: list[int] = []
+        sessions: set[str] = set()
+
+        def echo(req: McpRequest, msg: dict) -> dict:
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+                seen_ids.append(msg["id"])
+                sessions.add(req.headers.get("MCP-Session-Id") or "")
+            time.sleep(0.005)
+            with lock:
+                in_flight -= 1
+            return {"content": [{"type": "text", "text": str(msg["params"]["arguments"]["n"])}]}
+
+        tools = {"tools": [{"name": "echo", "inputSchema": {"type": "object"}}]}
+        url = serve(self, {"tools/list": lambda _req, _msg: tools, "tools/call": echo}, session_id="s1")
+        cfg = McpServerConfig(
+            url=url + "/mcp",
+            transport="streamable_http",
+            timeout_s=10.0,
+            max_concurrency=MAX_CONCURRENCY,
+        )
+        mgr = McpManager({"s": cfg})
+        mgr.refresh_tools()
+
+        threads_n = 12
+        calls_n = 25
+        errors: list[str] = []
+        mismatches: list[tuple[int, str]] = []
+
+        def worker(base: int) -> None:
+            for i in range(calls_n):
+                n = base * 1000 + i
+                try:
+                    out = mgr.call_tool("mcp__s__echo", {"n": n})
+                except Exception as e:
+                    errors.append(str(e))
+                    continue
+                if out["text"] != str(n):
+                    mismatches.append((n, out["text"]))
+
+        threads = [threading.Thread(target=worker, args=(b,)) for b in range(threads_n)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(30.0)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(mismatches, [])
+        ids = seen_ids
+        self.assertEqual(len(ids), threads_n * calls_n)
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertLessEqual(peak, MAX_CONCURRENCY)
+        self.assertGreater(peak, 1)
+        self.assertEqual(sessions, {"s1"})
+
+    def test_cancel_while_waiting_for_a_slot_and_failed_probe(self) -> None:
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def hold(_req: McpRequest, _msg: dict) -> dict:
+            release.wait(5.0)
+            return {"content": [{"type": "text", "text": "done"}]}
+
+        tools = {"tools": [{"name": "hold", "inputSchema": {"type": "object"}}]}
+        url = serve(self, {"tools/list": lambda _req, _msg: tools, "tools/call": hold})
+        cfg = McpServerConfig(url=url + "/mcp", transport="streamable_http", timeout_s=10.0, max_concurrency=1)
+        mgr = McpManager({"s": cfg})
+        mgr.refresh_tools()
+
+        busy = threading.Thread(target=mgr.call_tool, args=("mcp__s__hold", {}), daemon=True)
+        busy.start()
+        time.sleep(0.1)
+        cancel = threading.Event()
+        threading.Timer(0.1, cancel.set).start()
+        started = time.monotonic()
+        with self.assertRaises(McpCancelled):
+            mgr.call_tool("mcp__s__hold", {}, cancel=cancel)
+        self.assertLess(time.monotonic() - started, 1.0)
+        release.set()
+        busy.join(5.0)
+
+        # A half-open probe that dies on something other than McpError frees the probe.
+        breaker = mgr._breaker_locked("s")
+        breaker.state, breaker.open_until = "open", 0.0
+        client = mgr._clients["s"]
+        real_call = client.call
+
+        def broken(*_args: object, **_kw: object) -> dict:
+            raise RuntimeError("boom")
+
+        client.call = broken
+        with self.assertRaises(RuntimeError):
+            mgr.call_tool("mcp__s__hold", {})
+        client.call = real_call
+        self.assertEqual(mgr.call_tool("mcp__s__hold", {})["text"], "done")
+        self.assertEqual(breaker.state, "closed")
+
+
+if __name__ == "__main__":
+    unittest.main()
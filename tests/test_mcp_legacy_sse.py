@@ -0,0 +1,98 @@
+import json
+import queue
+import threading
+import time
+import unittest
+
+from fake_mcp import McpRequest, serve
+
+from trpgai.config import McpServerConfig
+from trpgai.mcp_client import McpError, _LegacySseTransport
+
+
+class TestLegacySseTransport(unittest.TestCase):
+    def setUp(self) -> None:
+        self.outbox: "queue.Queue[dict | str | None]" = queue.Queue()
+        self.event_ids = 0
+        self.resume_ids: list[str | None] = []
+        url = serve(self, {"GET": self._stream, "*": self._post})
+        self.addCleanup(lambda: self.outbox.put(None))
+        self.cfg = McpServerConfig(url=url, transport="legacy_sse", timeout_s=5.0)
+
+    def _stream(self, req: McpRequest, _msg: dict) -> None:
+        self.resume_ids.append(req.headers.get("Last-Event-ID"))
+        req.close_connection = True
+        req.send_response(200)
+        req.send_header("Content-Type", "text/event-stream")
+        req.end_headers()
+        req.wfile.write(b"event: endpoint\ndata: /messages?session=1\n\n")
+        req.wfile.flush()
+        while True:
+            msg = self.outbox.get()
+            if msg is None or msg == "drop":
+                return
+            self.event_ids += 1
+            req.wfile.write(f"id: {self.event_ids}\nevent: message\ndata: {json.dumps(msg)}\n\n".encode("utf-8"))
+            req.wfile.flush()
+
+    def _post(self, req: McpRequest, msg: dict) -> None:
+        # Every reply travels over the event stream; the POST itself is only accepted.
+        req.reply(202)
+        args = (msg.get("params") or {}).get("arguments", {})
+        if args.get("drop"):
+            self.outbox.put("drop")
+            return
+        delay = float(args.get("delay", 0))
+
+        def reply() -> None:
+            time.sleep(delay)
+            result = {"content": [{"type": "text", "text": str(delay)}]}
+            self.outbox.put({"jsonrpc": "2.0", "id": msg["id"], "result": result})
+
+        threading.Thread(target=reply, daemon=True).start()
+
+    def test_concurrent_calls_are_routed_by_id(self) -> None:
+        start = time.monotonic()
+        transport = _LegacySseTransport(self.cfg)
+        self.addCleanup(transport.close)
+        self.assertLess(time.monotonic() - start, 1.0)
+
+        results: dict[str, str] = {}
+
+        def call(delay: str) -> None:
+            resp = transport.call("tools/call", {"name": "wait", "arguments": {"delay": delay}})
+            results[delay] = resp["result"]["content"][0]["text"]
+
+        start = time.monotonic()
+        threads = [threading.Thread(target=call, args=(d,)) for d in ("0.4", "0.05", "0.2")]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(5.0)
+
+        self.assertEqual(results, {"0.4": "0.4", "0.05": "0.05", "0.2": "0.2"})
+        self.assertLess(time.monotonic() - start, 0.8)
+
+    def test_reconnects_and_fails_lost_calls_fast(self) -> None:
+        transport = _LegacySseTransport(self.cfg)
+        self.addCleanup(transport.close)
+        transport.call("tools/call", {"name": "wait", "arguments": {"delay": "0"}})
+
+        start = time.monotonic()
+        with self.assertRaises(McpError) as ctx:
+            transport.call("tools/call", {"name": "wait", "arguments": {"drop": True}})
+        self.assertIn("disconnected", str(ctx.exception))
+        self.assertLess(time.monotonic() - start, 1.0)
+
+        resp = transport.call("tools/call", {"name": "wait", "arguments": {"delay": "0"}})
+        self.assertEqual(resp["result"]["content"][0]["text"], "0.0")
+        self.assertEqual(self.resume_ids, [None, "1"])
+
+        stats = transport.stream_stats()
+        self.assertTrue(stats["connected"])
+        self.assertEqual(stats["reconnects"], 1)
+        self.assertGreater(stats["downtime_s"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+from fake_mcp import serve
+
+from trpgai.config import McpServerConfig
+from trpgai.mcp_client import McpManager
+
+TOTAL = 250
+PAGE = 100
+
+
+class TestMcpPagination(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cursors: list[object] = []
+
+        def tools_list(_req: object, msg: dict) -> dict:
+            cursor = msg["params"].get("cursor")
+            self.cursors.append(cursor)
+            start = int(cursor or 0)
+            end = min(TOTAL, start + PAGE)
+            schema = {"type": "object", "properties": {"query": {"type": "string", "description": "x" * 200}}}
+            result: dict = {"tools": [{"name": f"t{i}", "inputSchema": schema} for i in range(start, end)]}
+            if end < TOTAL:
+                result["nextCursor"] = str(end)
+            return result
+
+        self.url = serve(self, {"tools/list": tools_list}) + "/mcp"
+
+    def test_follows_next_cursor_and_interns_schemas(self) -> None:
+        mgr = McpManager({"big": McpServerConfig(url=self.url, transport="streamable_http")})
+        mgr.refresh_tools()
+        tools = mgr.tools()
+        self.assertEqual(len(tools), TOTAL)
+        self.assertEqual(self.cursors, [None, "100", "200"])
+        self.assertEqual(len({id(t.input_schema) for t in tools}), 1)
+        self.assertFalse(mgr.status()["big"]["truncated"])
+
+    def test_max_tools_caps_paging(self) -> None:
+        cfg = McpServerConfig(url=self.url, transport="streamable_http", max_tools=150)
+        mgr = McpManager({"big": cfg})
+        mgr.refresh_tools()
+        self.assertEqual(len(mgr.tools()), 150)
+        self.assertEqual(self.cursors, [None, "100"])
+        st = mgr.status()["big"]
+        self.assertTrue(st["truncated"])
+        self.assertEqual(st["tool_count"], 150)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+from fake_mcp import McpRequest, serve
+
+from trpgai.config import McpServerConfig
+from trpgai.mcp_client import McpManager
+
+
+def _make_map(req: McpRequest, msg: dict) -> None:
+    events: list[dict] = []
+    token = (msg["params"].get("_meta") or {}).get("progressToken")
+    if token is not None:
+        for step in (1, 2):
+            params = {"progressToken": token, "progress": step, "total": 4, "message": f"room {step}"}
+            events.append({"jsonrpc": "2.0", "method": "notifications/progress", "params": params})
+        events.append({"jsonrpc": "2.0", "method": "notifications/message", "params": {"level": "info", "data": "carving"}})
+    events.append({"jsonrpc": "2.0", "id": msg["id"], "result": {"content": [{"type": "text", "text": "map"}]}})
+    req.reply_events(events)
+
+
+class TestMcpProgress(unittest.TestCase):
+    def setUp(self) -> None:
+        url = serve(
+            self,
+            {
+                "tools/list": lambda _req, _msg: {"tools": [{"name": "make_map", "inputSchema": {"type": "object"}}]},
+                "tools/call": _make_map,
+            },
+        )
+        self.mgr = McpManager({"maps": McpServerConfig(url=url + "/mcp", transport="streamable_http")})
+        self.addCleanup(self.mgr.close)
+        self.mgr.refresh_tools()
+
+    def test_progress_and_messages_reach_listener(self) -> None:
+        updates: list[dict] = []
+        out = self.mgr.call_tool("mcp__maps__make_map", {}, on_progress=updates.append)
+        self.assertEqual(out["text"], "map")
+        self.assertEqual(
+            updates,
+            [
+                {"progress": 1, "total": 4, "message": "room 1"},
+                {"progress": 2, "total": 4, "message": "room 2"},
+                {"message": "carving"},
+            ],
+        )
+        self.assertEqual(self.mgr._progress, {})
+
+    def test_no_progress_token_without_listener(self) -> None:
+        self.assertEqual(self.mgr.call_tool("mcp__maps__make_map", {})["text"], "map")
+
+
+if __name__ == "__main__":
+    unittest.main()
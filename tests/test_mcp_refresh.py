@@ -0,0 +1,159 @@
+import socket
+import time
+import unittest
+
+from fake_mcp import McpRequest, serve
+
+from trpgai.config import McpServerConfig
+from trpgai.mcp_client import McpManager, _Breaker
+
+SLOW_S = 1.0
+
+
+class _FakeMcp:
+    # One fake server for every name: the URL path picks the behaviour.
+    def __init__(self, test: unittest.TestCase):
+        self.broken_hits = 0
+        self.deleted: list[str] = []
+        self.base = serve(
+            test,
+            {"initialize": self._initialize, "tools/list": self._tools_list, "DELETE": self._delete},
+            session_id=lambda req: "sess-" + req.path.strip("/"),
+        )
+
+    def _initialize(self, req: McpRequest, _msg: dict) -> dict | None:
+        if req.path.strip("/") == "broken":
+            self.broken_hits += 1
+            req.reply(500)
+            return None
+        return {}
+
+    def _tools_list(self, req: McpRequest, _msg: dict) -> dict:
+        name = req.path.strip("/")
+        if name == "slow":
+            time.sleep(SLOW_S)
+        return {"tools": [{"name": "ping", "description": name, "inputSchema": {"type": "object"}}]}
+
+    def _delete(self, req: McpRequest, _msg: dict) -> None:
+        self.deleted.append(req.headers.get("MCP-Session-Id") or "")
+        req.reply(204)
+
+
+def _closed_port() -> int:
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+class TestMcpRefresh(unittest.TestCase):
+    def setUp(self) -> None:
+        self.fake = _FakeMcp(self)
+        base = self.fake.base
+
+        def srv(url: str) -> McpServerConfig:
+            return McpServerConfig(url=url, transport="streamable_http", timeout_s=5.0)
+
+        self.mgr = McpManager(
+            {
+                "fast": srv(base + "/fast"),
+                "slow": srv(base + "/slow"),
+                "dead": srv(f"http://127.0.0.1:{_closed_port()}/mcp"),
+                "off": McpServerConfig(url=base + "/off", enabled=False),
+            }
+        )
+
+    def test_partial_tools_usable_before_slow_server(self) -> None:
+        start = time.monotonic()
+        tools = self.mgr.openai_tools()
+        self.assertLess(time.monotonic() - start, SLOW_S)
+        self.assertIn("mcp__fast__ping", [t["function"]["name"] for t in tools])
+
+        st = self.mgr.status()
+        self.assertTrue(st["slow"]["syncing"])
+        self.assertFalse(st["off"]["initialized"])
+
+        self.mgr.refresh_tools(deadline_s=5.0)
+        names = {t.server for t in self.mgr.tools()}
+        self.assertEqual(names, {"fast", "slow"})
+
+        st = self.mgr.status()
+        self.assertFalse(st["slow"]["syncing"])
+        self.assertEqual(st["slow"]["tool_count"], 1)
+        self.assertGreaterEqual(st["slow"]["sync_ms"], SLOW_S * 1000 * 0.9)
+        self.assertTrue(st["dead"]["last_error"])
+
+    def test_deadline_returns_and_sync_finishes_in_background(self) -> None:
+        start = time.monotonic()
+        self.mgr.refresh_tools(deadline_s=0.2)
+        self.assertLess(time.monotonic() - start, SLOW_S)
+        self.assertNotIn("slow", {t.server for t in self.mgr.tools()})
+
+        deadline = time.monotonic() + 5.0
+        while self.mgr.status()["slow"]["syncing"] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertIn("slow", {t.server for t in self.mgr.tools()})
+
+    def test_reconfigure_keeps_unchanged_sessions(self) -> None:
+        self.mgr.openai_tools()
+        self.mgr.refresh_tools(deadline_s=5.0)
+        fast_client = self.mgr._clients["fast"]
+        self.fake.deleted.clear()
+
+        servers = self.mgr.status()
+        base = servers["fast"]["url"].rsplit("/", 1)[0]
+        self.mgr.reconfigure(
+            {
+                "fast": McpServerConfig(url=base + "/fast", transport="streamable_http", timeout_s=5.0),
+                "slow": McpServerConfig(url=base + "/slow", transport="streamable_http", timeout_s=9.0),
+                "extra": McpServerConfig(url=base + "/extra", transport="streamable_http", timeout_s=5.0),
+            }
+        )
+        self.assertIs(self.mgr._clients["fast"], fast_client)
+        self.assertNotIn("dead", self.mgr.status())
+
+        self.mgr.refresh_tools(deadline_s=5.0)
+        self.assertEqual({t.server for t in self.mgr.tools()}, {"fast", "slow", "extra"})
+
+        deadline = time.monotonic() + 2.0
+        while not self.fake.deleted and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(self.fake.deleted, ["sess-slow"])
+
+
+class TestMcpBreaker(unittest.TestCase):
+    def test_cooldown_doubles_and_half_open_admits_one_probe(self) -> None:
+        b = _Breaker(base_cooldown_s=1.0, max_cooldown_s=3.0)
+        self.assertTrue(b.allow(0.0))
+        b.record_failure(0.0)
+        self.assertFalse(b.allow(0.5))
+        self.assertTrue(b.allow(1.0))
+        self.assertEqual(b.state, "half_open")
+        self.assertFalse(b.allow(1.0))
+        b.record_failure(1.0)
+        self.assertEqual(b.open_until, 3.0)
+        b.record_failure(3.0)
+        self.assertEqual(b.open_until, 6.0)
+        b.record_success()
+        self.assertEqual(b.state, "closed")
+
+    def test_open_circuit_skips_server_until_forced(self) -> None:
+        fake = _FakeMcp(self)
+        mgr = McpManager({"broken": McpServerConfig(url=fake.base + "/broken", transport="streamable_http")})
+
+        mgr.refresh_tools()
+        self.assertEqual(fake.broken_hits, 1)
+        self.assertEqual(mgr.status()["broken"]["breaker"]["state"], "open")
+
+        self.assertEqual(mgr.openai_tools(), [])
+        mgr.refresh_tools()
+        self.assertEqual(fake.broken_hits, 1)
+
+        mgr.refresh_tools(force=True)
+        self.assertEqual(fake.broken_hits, 2)
+        self.assertEqual(mgr.status()["broken"]["breaker"]["failures"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import time
+import unittest
+
+from fake_mcp import serve
+
+from trpgai.config import McpServerConfig
+from trpgai.mcp_client import McpManager, _ResultCache
+
+RULES_TOOLS = [
+    {"name": "spell", "inputSchema": {"type": "object"}, "annotations": {"readOnlyHint": True}},
+    {"name": "notes", "inputSchema": {"type": "object"}},
+    # Idempotent but not read-only: it has side effects, so it is never cached.
+    {"name": "roll", "inputSchema": {"type": "object"}, "annotations": {"idempotentHint": True}},
+]
+
+
+class TestMcpResultCache(unittest.TestCase):
+    def test_only_read_only_or_allow_listed_tools_are_cached(self) -> None:
+        calls: list[str] = []
+
+        def tools_call(_req: object, msg: dict) -> dict:
+            calls.append(msg["params"]["name"])
+            return {"content": [{"type": "text", "text": f"{msg['params']['name']}#{len(calls)}"}]}
+
+        url = serve(self, {"tools/list": lambda _req, _msg: {"tools": RULES_TOOLS}, "tools/call": tools_call})
+        cfg = McpServerConfig(url=url + "/mcp", transport="streamable_http", cache_tools=["notes"])
+        mgr = McpManager({"rules": cfg}, result_cache_ttl_s=60.0)
+        mgr.refresh_tools()
+        a = mgr.call_tool("mcp__rules__spell", {"name": "fireball", "level": 3})
+        b = mgr.call_tool("mcp__rules__spell", {"level": 3, "name": "fireball"})
+        self.assertEqual(a["text"], b["text"])
+        mgr.call_tool("mcp__rules__spell", {"name": "shield"})
+        mgr.call_tool("mcp__rules__notes", {"q": "x"})
+        mgr.call_tool("mcp__rules__notes", {"q": "x"})
+        r1 = mgr.call_tool("mcp__rules__roll", {"expression": "1d20"})
+        r2 = mgr.call_tool("mcp__rules__roll", {"expression": "1d20"})
+        self.assertNotEqual(r1["text"], r2["text"])
+
+        self.assertEqual(calls, ["spell", "spell", "notes", "roll", "roll"])
+        stats = mgr.result_cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 3))
+        self.assertEqual(stats["servers"]["rules"]["hits"], 2)
+
+    def test_lru_eviction_and_ttl(self) -> None:
+        cache = _ResultCache(ttl_s=0.05, max_entries=2)
+        keys = [_ResultCache.key("s", "t", {"n": i}) for i in range(3)]
+        for i, k in enumerate(keys):
+            cache.put(k, {"text": str(i)})
+        self.assertIsNone(cache.get(keys[0]))
+        self.assertEqual(cache.get(keys[2]), {"text": "2"})
+        cache.get(keys[2])["text"] = "changed"
+        self.assertEqual(cache.get(keys[2]), {"text": "2"})
+        time.sleep(0.06)
+        self.assertIsNone(cache.get(keys[2]))
+
+    def test_reconfigure_applies_new_limits(self) -> None:
+        mgr = McpManager({}, result_cache_ttl_s=60.0, result_cache_size=4)
+        keys = [_ResultCache.key("s", "t", {"n": i}) for i in range(4)]
+        for i, k in enumerate(keys):
+            mgr._results.put(k, {"text": str(i)})
+        mgr.reconfigure({}, result_cache_size=2)
+        self.assertEqual(mgr.result_cache_stats()["entries"], 2)
+        self.assertIsNone(mgr._results.get(keys[1]))
+
+        mgr.reconfigure({}, result_cache_ttl_s=0.0)
+        self.assertFalse(mgr._results.enabled)
+        self.assertIsNone(mgr._results.get(keys[3]))
+
+
+if __name__ == "__main__":
+    unittest.main()
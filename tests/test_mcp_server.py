@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+import unittest
+
+from trpgai.config import McpServerConfig
+from trpgai.dice import roll_expression
+from trpgai.http_pool import ConnectionPool
+from trpgai.mcp_client import McpManager, _StreamableHttpTransport
+from trpgai.mcp_server import McpDiceServer, handle_message
+
+
+def _call(name: str, args: dict, req_id: int = 1) -> dict:
+    msg = {"jsonrpc": "2.0", "id": req_id, "method": "tools/call", "params": {"name": name, "arguments": args}}
+    out = handle_message(msg)
+    assert out is not None
+    return out
+
+
+class TestMcpDiceServer(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = McpDiceServer("127.0.0.1", 0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_roll_matches_dice_module(self) -> None:
+        out = _call("roll_dice", {"expression": "4d6kh3", "seed": 7})["result"]
+        self.assertEqual(out["structuredContent"], roll_expression("4d6kh3", seed=7))
+
+    def test_bad_input_is_tool_error(self) -> None:
+        out = _call("roll_dice", {"expression": "2d0"})["result"]
+        self.assertTrue(out["isError"])
+        self.assertEqual(_call("nope", {})["error"]["code"], -32602)
+        self.assertIsNone(handle_message({"jsonrpc": "2.0", "method": "notifications/initialized"}))
+
+    def test_work_per_request_is_bounded(self) -> None:
+        self.assertTrue(_call("roll_dice", {"expression": "1001d6"})["result"]["isError"])
+        self.assertTrue(_call("dice_distribution", {"expression": "600d6+600d6"})["result"]["isError"])
+        # 1000 dice x 200 rolls is over the batch budget though count x expressions is not.
+        batch = _call("roll_batch", {"expressions": ["1000d6"], "count": 200})["result"]
+        self.assertTrue(batch["isError"])
+        self.assertIn("dice per batch", batch["content"][0]["text"])
+
+        wide = _call("dice_distribution", {"expression": "1d3000000"})["result"]
+        self.assertLessEqual(len(wide["structuredContent"]["pmf"]), 1000)
+        self.assertLessEqual(wide["content"][0]["text"].count("\n"), 1000)
+
+    def test_batch_and_distribution(self) -> None:
+        batch = _call("roll_batch", {"expressions": ["1d1+2", "2d6"], "count": 3, "seed": 1})["result"]
+        self.assertEqual(batch["structuredContent"]["results"][0]["totals"], [3, 3, 3])
+        self.assertTrue(all(2 <= t <= 12 for t in batch["structuredContent"]["results"][1]["totals"]))
+
+        dist = _call("dice_distribution", {"expression": "2d6"})["result"]["structuredContent"]
+        self.assertTrue(dist["exact"])
+        self.assertAlmostEqual(dist["pmf"]["7"], 1 / 6)
+        sampled = _call("dice_distribution", {"expression": "4d6kh3", "samples": 2000})["result"]["structuredContent"]
+        self.assertFalse(sampled["exact"])
+        self.assertAlmostEqual(sampled["mean"], 12.24, delta=0.3)
+
+    def test_client_round_trip(self) -> None:
+        mgr = McpManager({"dice": McpServerConfig(url=self.server.url, transport="streamable_http")})
+        self.addCleanup(mgr.close)
+        mgr.refresh_tools()
+        self.assertEqual(len(mgr.tools()), 3)
+        self.assertEqual(mgr.call_tool("mcp__dice__roll_dice", {"expression": "1d1+4"})["text"], "1d1+4 => (1) + 4 = 5")
+        self.assertTrue(mgr.status()["dice"]["initialized"])
+
+    @unittest.skipUnless(os.environ.get("TRPGAI_BENCH"), "set TRPGAI_BENCH=1 to run the load test")
+    def test_load(self) -> None:
+        clients, duration_s = 16, 5.0
+        counts = [0] * clients
+        errors: list[str] = []
+        stop = time.monotonic() + duration_s
+
+        def run(i: int) -> None:
+            client = _StreamableHttpTransport(McpServerConfig(url=self.server.url), ConnectionPool())
+            params = {"name": "roll_dice", "arguments": {"expression": "4d6kh3+2"}}
+            try:
+                while time.monotonic() < stop:
+                    client.call("tools/call", params)
+                    counts[i] += 1
+            except Exception as e:
+                errors.append(str(e))
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(clients)]
+        started = time.monotonic()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.monotonic() - started
+
+        batch = {"expressions": ["4d6kh3+2"], "count": 10_000}
+        t0 = time.monotonic()
+        _call("roll_batch", batch)
+        batch_rate = 10_000 / (time.monotonic() - t0)
+
+        print(
+            f"\nmcp-serve: {clients} clients, {sum(counts) / elapsed:.0f} roll_dice calls/s over {elapsed:.1f}s; "
+            f"roll_batch {batch_rate:.0f} rolls/s"
+        )
+        self.assertEqual(errors, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
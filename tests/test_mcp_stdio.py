@@ -0,0 +1,98 @@
+import sys
+import threading
+import time
+import unittest
+
+from trpgai.config import AppConfig, McpServerConfig
+from trpgai.mcp_client import McpError, McpManager, _StdioTransport
+
+# Answers out of order (each request on its own thread) and exits on "crash".
+SERVER = r"""
+import json, os, sys, threading, time
+lock = threading.Lock()
+initialized = []
+def send(msg):
+    with lock:
+        sys.stdout.write(json.dumps(msg) + "\n")
+        sys.stdout.flush()
+def handle(msg):
+    method = msg.get("method")
+    if method == "initialize":
+        initialized.append(True)
+        send({"jsonrpc": "2.0", "id": msg["id"], "result": {"protocolVersion": "2025-11-25"}})
+    elif method == "tools/list":
+        tool = {"name": "echo", "inputSchema": {"type": "object"}}
+        send({"jsonrpc": "2.0", "id": msg["id"], "result": {"tools": [tool]}})
+    elif method == "tools/call":
+        args = msg["params"].get("arguments") or {}
+        if args.get("crash"):
+            print("boom", file=sys.stderr, flush=True)
+            os._exit(3)
+        time.sleep(float(args.get("delay", 0)))
+        text = f"{os.getpid()}:{args.get('text', '')}:{len(initialized)}"
+        send({"jsonrpc": "2.0", "id": msg["id"], "result": {"content": [{"type": "text", "text": text}]}})
+for line in sys.stdin:
+    msg = json.loads(line)
+    if "id" in msg:
+        threading.Thread(target=handle, args=(msg,)).start()
+"""
+
+
+def _cfg() -> McpServerConfig:
+    return McpServerConfig(command=sys.executable, args=["-c", SERVER], timeout_s=10.0)
+
+
+class TestStdioTransport(unittest.TestCase):
+    def test_config_auto_selects_stdio(self) -> None:
+        cfg = AppConfig.from_dict({"mcp": {"servers": {"local": {"command": "srv", "args": ["--x", 1], "env": {"A": 2}}}}})
+        server = cfg.mcp.servers["local"]
+        self.assertEqual((server.command, server.args, server.env), ("srv", ["--x", "1"], {"A": "2"}))
+        self.assertTrue(McpManager(cfg.mcp.servers).has_servers())
+
+    def test_concurrent_calls_are_multiplexed(self) -> None:
+        client = _StdioTransport(_cfg())
+        self.addCleanup(client.close)
+        client.call("initialize", {"protocolVersion": "2025-11-25"})
+        results: dict[float, str] = {}
+
+        def run(delay: float) -> None:
+            resp = client.call("tools/call", {"name": "echo", "arguments": {"delay": delay, "text": str(delay)}})
+            results[delay] = resp["result"]["content"][0]["text"]
+
+        started = time.monotonic()
+        threads = [threading.Thread(target=run, args=(d,)) for d in (0.6, 0.4, 0.2, 0.0)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertLess(time.monotonic() - started, 1.2)
+        self.assertEqual(sorted(v.split(":")[1] for v in results.values()), ["0.0", "0.2", "0.4", "0.6"])
+
+    def test_manager_lists_and_calls_tools(self) -> None:
+        mgr = McpManager({"local": _cfg()})
+        self.addCleanup(mgr.close)
+        mgr.refresh_tools()
+        self.assertEqual(mgr.call_tool("mcp__local__echo", {"text": "a"})["text"].split(":")[1:], ["a", "1"])
+        self.assertTrue(mgr.status()["local"]["process"]["running"])
+
+    def test_restarts_crashed_child_and_replays_initialize(self) -> None:
+        client = _StdioTransport(_cfg())
+        self.addCleanup(client.close)
+        client.call("initialize", {"protocolVersion": "2025-11-25"})
+
+        def echo(args: dict) -> str:
+            return client.call("tools/call", {"name": "echo", "arguments": args})["result"]["content"][0]["text"]
+
+        first = echo({"text": "a"})
+
+        with self.assertRaisesRegex(McpError, "code 3.*boom"):
+            echo({"crash": True})
+
+        second = echo({"text": "b"})
+        self.assertNotEqual(first.split(":")[0], second.split(":")[0])
+        self.assertEqual(second.split(":")[1:], ["b", "1"])
+        self.assertEqual(client.process_stats()["restarts"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
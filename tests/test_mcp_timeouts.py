@@ -0,0 +1,130 @@
+import json
+import select
+import sys
+import threading
+import time
+import unittest
+
+from fake_mcp import McpRequest, serve
+
+from trpgai.config import AppConfig, McpConfig, McpServerConfig
+from trpgai.mcp_client import McpCancelled, McpManager, McpTimeout
+from trpgai.openai_client import CancelToken, ChatClient
+
+# "sleep" blocks; "cancelled" reports the request ids the client gave up on.
+SERVER = r"""
+import json, sys, threading, time
+lock = threading.Lock()
+cancelled = []
+def send(msg):
+    with lock:
+        sys.stdout.write(json.dumps(msg) + "\n")
+        sys.stdout.flush()
+def handle(msg):
+    method = msg.get("method")
+    if method == "initialize":
+        send({"jsonrpc": "2.0", "id": msg["id"], "result": {}})
+    elif method == "tools/list":
+        tools = [{"name": n, "inputSchema": {"type": "object"}} for n in ("sleep", "cancelled")]
+        send({"jsonrpc": "2.0", "id": msg["id"], "result": {"tools": tools}})
+    elif msg["params"]["name"] == "sleep":
+        time.sleep(float(msg["params"]["arguments"].get("s", 0)))
+        send({"jsonrpc": "2.0", "id": msg["id"], "result": {"content": [{"type": "text", "text": "slept"}]}})
+    else:
+        send({"jsonrpc": "2.0", "id": msg["id"], "result": {"content": [{"type": "text", "text": json.dumps(cancelled)}]}})
+for line in sys.stdin:
+    msg = json.loads(line)
+    if msg.get("method") == "notifications/cancelled":
+        cancelled.append(msg["params"]["requestId"])
+    elif "id" in msg:
+        threading.Thread(target=handle, args=(msg,), daemon=True).start()
+"""
+
+
+def _server(**kw: object) -> McpServerConfig:
+    return McpServerConfig(command=sys.executable, args=["-c", SERVER], **kw)
+
+
+def _call(args: dict) -> dict:
+    return {"id": "c1", "function": {"name": "mcp__local__sleep", "arguments": json.dumps(args)}}
+
+
+class TestMcpTimeouts(unittest.TestCase):
+    def _manager(self, **kw: object) -> McpManager:
+        mgr = McpManager({"local": _server(**kw)})
+        self.addCleanup(mgr.close)
+        mgr.refresh_tools()
+        return mgr
+
+    def test_per_tool_timeout_cancels_on_server(self) -> None:
+        mgr = self._manager(tool_timeouts={"sleep": 0.3})
+        started = time.monotonic()
+        with self.assertRaises(McpTimeout):
+            mgr.call_tool("mcp__local__sleep", {"s": 5})
+        self.assertLess(time.monotonic() - started, 2.0)
+        seen = json.loads(mgr.call_tool("mcp__local__cancelled", {})["text"])
+        self.assertEqual(len(seen), 1)
+
+    def test_http_timeout_drops_the_connection(self) -> None:
+        dropped = threading.Event()
+
+        def sleep(req: McpRequest, msg: dict) -> dict | None:
+            # Hold the reply until the client hangs up or 5 s pass.
+            readable, _, _ = select.select([req.connection], [], [], float(msg["params"]["arguments"].get("s", 0)))
+            if readable and not req.connection.recv(1):
+                dropped.set()
+                return None
+            return {"content": [{"type": "text", "text": "slept"}]}
+
+        tools = {"tools": [{"name": "sleep", "inputSchema": {"type": "object"}}]}
+        url = serve(self, {"tools/list": lambda _req, _msg: tools, "tools/call": sleep})
+        cfg = McpServerConfig(url=url + "/mcp", transport="streamable_http", tool_timeouts={"sleep": 0.3})
+        mgr = McpManager({"http": cfg})
+        self.addCleanup(mgr.close)
+        mgr.refresh_tools()
+        with self.assertRaises(McpTimeout):
+            mgr.call_tool("mcp__http__sleep", {"s": 5})
+        self.assertTrue(dropped.wait(2.0))
+        self.assertEqual(mgr.call_tool("mcp__http__sleep", {})["text"], "slept")
+
+    def test_cancel_event_leaves_breaker_closed(self) -> None:
+        mgr = self._manager()
+        cancel = threading.Event()
+        threading.Timer(0.2, cancel.set).start()
+        with self.assertRaises(McpCancelled):
+            mgr.call_tool("mcp__local__sleep", {"s": 5}, cancel=cancel)
+        self.assertEqual(mgr.status()["local"]["breaker"]["state"], "closed")
+        self.assertEqual(mgr.call_tool("mcp__local__sleep", {})["text"], "slept")
+
+    def test_chat_client_tool_phase_deadline(self) -> None:
+        cfg = AppConfig(mcp=McpConfig(servers={"local": _server()}, tool_phase_deadline_s=0.4, tool_cache_ttl_s=0))
+        client = ChatClient(cfg)
+        self.addCleanup(client.close)
+        client._mcp.refresh_tools()
+        budget = {"chars": 0, "tool_s": cfg.mcp.tool_phase_deadline_s}
+
+        first = json.loads(client._handle_tool_call(_call({"s": 5}), budget).content)
+        self.assertEqual((first["error"], first["timeout_s"]), ("timeout", 0.4))
+        second = json.loads(client._handle_tool_call(_call({}), budget).content)
+        self.assertEqual(second["timeout_s"], 0)
+
+    def test_cancel_tool_keeps_turn_alive(self) -> None:
+        client = ChatClient(AppConfig(mcp=McpConfig(servers={"local": _server()}, tool_cache_ttl_s=0)))
+        self.addCleanup(client.close)
+        client._mcp.refresh_tools()
+        token = CancelToken()
+        self.assertFalse(token.cancel_tool())
+        client._local.cancel = token
+
+        def cancel_soon() -> None:
+            while not token.cancel_tool():
+                time.sleep(0.01)
+
+        threading.Thread(target=cancel_soon, daemon=True).start()
+        out = json.loads(client._handle_tool_call(_call({"s": 5})).content)
+        self.assertEqual(out["error"], "cancelled")
+        self.assertFalse(token.cancelled)
+
+
+if __name__ == "__main__":
+    unittest.main()
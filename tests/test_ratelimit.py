@@ -0,0 +1,141 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from trpgai.config import AppConfig, ChatConfig, ProviderConfig
+from trpgai.openai_client import ChatClient, ChatMessage
+from trpgai.ratelimit import AdaptiveLimiter, limiter_for, parse_duration_s, parse_retry_after_s
+
+
+class TestParsing(unittest.TestCase):
+    def test_durations(self) -> None:
+        self.assertEqual(parse_duration_s("1.5"), 1.5)
+        self.assertEqual(parse_duration_s("20ms"), 0.02)
+        self.assertEqual(parse_duration_s("6m0s"), 360.0)
+        self.assertEqual(parse_duration_s("1h2m3s"), 3723.0)
+        self.assertIsNone(parse_duration_s("soon"))
+        self.assertIsNone(parse_duration_s(""))
+
+    def test_retry_after(self) -> None:
+        self.assertEqual(parse_retry_after_s({"retry-after": "3"}), 3.0)
+        self.assertEqual(parse_retry_after_s({"retry-after-ms": "250", "retry-after": "3"}), 0.25)
+        self.assertIsNone(parse_retry_after_s({}))
+
+
+class TestAdaptiveLimiter(unittest.TestCase):
+    def test_aimd(self) -> None:
+        lim = AdaptiveLimiter("t", initial=8, max_wait_s=0.05)
+        lease = lim.acquire(10)
+        lim.release(lease, 429, {"retry-after": "0"})
+        self.assertEqual(lim.snapshot()["limit"], 4)
+        self.assertEqual(lim.snapshot()["throttled"], 1)
+
+        for _ in range(20):
+            lim.release(lim.acquire(10), 200, {})
+        self.assertGreater(lim.snapshot()["limit"], 4)
+
+    def test_blocks_until_retry_after(self) -> None:
+        lim = AdaptiveLimiter("t")
+        lim.release(lim.acquire(), 429, {"retry-after-ms": "150"})
+        start = time.monotonic()
+        lim.release(lim.acquire(), 200, {})
+        self.assertGreaterEqual(time.monotonic() - start, 0.1)
+
+    def test_remaining_requests_header(self) -> None:
+        lim = AdaptiveLimiter("t")
+        first = lim.acquire()
+        lim.release(lim.acquire(), 200, {"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "200ms"})
+        self.assertEqual(lim.snapshot()["remaining_requests"], 0)
+
+        got: list[float] = []
+
+        def second() -> None:
+            start = time.monotonic()
+            lim.release(lim.acquire(), 200, {})
+            got.append(time.monotonic() - start)
+
+        t = threading.Thread(target=second)
+        t.start()
+        t.join()
+        lim.release(first, 200, {})
+        self.assertGreaterEqual(got[0], 0.15)
+
+    def test_serial_caller_waits_for_request_reset(self) -> None:
+        lim = AdaptiveLimiter("t")
+        lim.release(lim.acquire(), 200, {"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "150ms"})
+        start = time.monotonic()
+        lim.release(lim.acquire(), 200, {})
+        self.assertGreaterEqual(time.monotonic() - start, 0.1)
+
+        # An oversized token estimate still goes through when nothing else is in flight.
+        lim.release(lim.acquire(), 200, {"x-ratelimit-remaining-tokens": "10", "x-ratelimit-reset-tokens": "5s"})
+        start = time.monotonic()
+        lim.release(lim.acquire(1000), 200, {})
+        self.assertLess(time.monotonic() - start, 0.1)
+
+
+class _ThrottlingProvider(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    calls = 0
+
+    def log_message(self, *_args: object) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers["Content-Length"]))
+        type(self).calls += 1
+        if type(self).calls == 1:
+            data = b'{"error": "slow down"}'
+            self.send_response(429)
+            self.send_header("Retry-After-Ms", "50")
+        else:
+            data = json.dumps({"choices": [{"message": {"content": "ok"}}]}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("x-ratelimit-remaining-requests", "99")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class TestChatClientThrottle(unittest.TestCase):
+    def test_retries_after_429(self) -> None:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _ThrottlingProvider)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            host, port = server.server_address[:2]
+            provider = ProviderConfig(base_url=f"http://{host}:{port}", models=["m"], model="m")
+            cfg = AppConfig(
+                active_provider="p1",
+                providers={"p1": provider},
+                chat=ChatConfig(system_prompt="", enable_tool_roll=False),
+            )
+            text, _messages = ChatClient(cfg).chat([ChatMessage(role="user", content="hi")])
+            self.assertEqual(text, "ok")
+            self.assertEqual(_ThrottlingProvider.calls, 2)
+
+            snap = limiter_for(provider).snapshot()
+            self.assertEqual(snap["throttled"], 1)
+            self.assertEqual(snap["remaining_requests"], 99)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_unexpected_error_releases_lease(self) -> None:
+        class _BrokenPool:
+            def request(self, *_args: object, **_kwargs: object) -> None:
+                raise ValueError("boom")
+
+        provider = ProviderConfig(base_url="http://127.0.0.1:9/leak", models=["m"], model="m")
+        cfg = AppConfig(active_provider="p1", providers={"p1": provider})
+        client = ChatClient(cfg, pool=_BrokenPool())
+        with self.assertRaises(ValueError):
+            with client._send(provider.base_url, {"model": "m"}, {}):
+                pass
+        self.assertEqual(limiter_for(provider).snapshot()["in_flight"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
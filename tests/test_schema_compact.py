@@ -0,0 +1,66 @@
+import unittest
+
+from trpgai.config import McpServerConfig
+from trpgai.mcp_client import McpManager, McpTool
+from trpgai.schema_compact import compact_schema, compact_text, json_size
+
+SCHEMA = {
+    "type": "object",
+    "title": "LookupArgs",
+    "$schema": "https://json-schema.org/draft/2020-12/schema",
+    "properties": {
+        "title": {"type": "string", "description": "  Book   title.\n\n\nCase-insensitive. ", "examples": ["PHB"]},
+        "spell": {"$ref": "#/$defs/Spell"},
+        "extra": {"type": "object", "x-internal": True, "required": [], "description": None, "$comment": ""},
+    },
+    "required": ["spell"],
+    "$defs": {
+        "Spell": {"type": "object", "properties": {"school": {"$ref": "#/$defs/School"}}},
+        "School": {"type": "string", "enum": ["evocation", "abjuration"]},
+        "Unused": {"type": "integer", "description": "never referenced"},
+    },
+}
+
+
+class TestSchemaCompact(unittest.TestCase):
+    def test_level_off_returns_schema_untouched(self) -> None:
+        self.assertIs(compact_schema(SCHEMA, 0), SCHEMA)
+
+    def test_minify_only_drops_empty_annotations(self) -> None:
+        out = compact_schema(SCHEMA, 1)
+        # Text is left exactly as the server wrote it.
+        self.assertEqual(out["properties"]["title"]["description"], SCHEMA["properties"]["title"]["description"])
+        self.assertEqual(compact_text(" a  b\n\n c ", 1), " a  b\n\n c ")
+        self.assertEqual(out["properties"]["title"]["examples"], ["PHB"])
+        self.assertEqual(out["properties"]["extra"], {"type": "object", "x-internal": True})
+        self.assertIn("Unused", out["$defs"])
+        self.assertEqual(out["title"], "LookupArgs")
+
+    def test_strip_drops_docs_and_unreachable_defs(self) -> None:
+        out = compact_schema(SCHEMA, 2)
+        self.assertNotIn("title", out)
+        self.assertNotIn("$schema", out)
+        # A property *named* title is data, not a keyword.
+        self.assertIn("title", out["properties"])
+        self.assertNotIn("examples", out["properties"]["title"])
+        self.assertEqual(out["properties"]["title"]["description"], "Book title.\nCase-insensitive.")
+        self.assertNotIn("x-internal", out["properties"]["extra"])
+        self.assertEqual(set(out["$defs"]), {"Spell", "School"})
+        self.assertEqual(out["required"], ["spell"])
+        self.assertLess(json_size(out), json_size(SCHEMA))
+
+    def test_truncate_descriptions(self) -> None:
+        self.assertEqual(compact_text("a" * 10, 3, max_chars=5), "aaaa…")
+        self.assertEqual(compact_text("a" * 10, 2, max_chars=5), "a" * 10)
+
+    def test_manager_caches_definitions_per_tool(self) -> None:
+        mgr = McpManager({"s": McpServerConfig(url="http://127.0.0.1:9/mcp")}, schema_compaction=2)
+        tool = McpTool(server="s", mcp_name="lookup", public_name="mcp__s__lookup", description="d", input_schema=SCHEMA)
+        fn, stats = mgr._definition(tool)
+        self.assertIs(mgr._definition(tool)[0], fn)
+        self.assertLess(stats["bytes_after"], stats["bytes_before"])
+        self.assertEqual(stats["tokens_after"], stats["bytes_after"] // 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
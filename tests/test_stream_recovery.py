@@ -0,0 +1,104 @@
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from trpgai.config import AppConfig, ChatConfig, ProviderConfig
+from trpgai.openai_client import ChatClient, ChatMessage
+
+
+class _FlakyStream(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    mode = "drop_mid"
+    bodies: list = []
+
+    def log_message(self, *_args: object) -> None:
+        pass
+
+    def _sse(self, *chunks: str, done: bool = True) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for c in chunks:
+            self.wfile.write(b"data: " + json.dumps({"choices": [{"delta": {"content": c}}]}).encode() + b"\n\n")
+        if done:
+            self.wfile.write(b"data: [DONE]\n\n")
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        cls = type(self)
+        cls.bodies.append(body)
+        first = len(cls.bodies) == 1
+
+        if not body.get("stream"):
+            data = json.dumps({"choices": [{"message": {"content": "plain"}}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        elif cls.mode == "drop_mid" and first:
+            self._sse("Hello, ", done=False)
+        elif cls.mode == "reject":
+            data = b'{"error": "stream not supported"}'
+            self.send_response(400)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        else:
+            self._sse("world")
+
+
+class TestStreamRecovery(unittest.TestCase):
+    def setUp(self) -> None:
+        _FlakyStream.bodies = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _FlakyStream)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        host, port = self.server.server_address[:2]
+        self.cfg = AppConfig(
+            active_provider="p1",
+            providers={"p1": ProviderConfig(base_url=f"http://{host}:{port}", models=["m"], model="m")},
+            chat=ChatConfig(system_prompt="", stream=True, enable_tool_roll=False, stream_retries=1),
+        )
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _run(self) -> tuple[str, list, list]:
+        deltas: list[str] = []
+        events: list[dict] = []
+
+        def on_stream(ev: dict) -> None:
+            if ev.get("type") == "content_delta":
+                deltas.append(ev["delta"])
+
+        text, _messages = ChatClient(self.cfg).chat(
+            [ChatMessage(role="user", content="hi")], on_stream=on_stream, on_event=events.append
+        )
+        return text, deltas, [e for e in events if e.get("type") == "stream_fallback"]
+
+    def test_continues_after_mid_stream_drop(self) -> None:
+        _FlakyStream.mode = "drop_mid"
+        text, deltas, fallbacks = self._run()
+        self.assertEqual(text, "Hello, world")
+        self.assertEqual("".join(deltas), "Hello, world")
+        self.assertEqual(fallbacks[0]["action"], "continue")
+        self.assertEqual(fallbacks[0]["wasted_bytes"], 0)
+
+        resumed = _FlakyStream.bodies[1]["messages"]
+        self.assertEqual(resumed[-2], {"role": "assistant", "content": "Hello, "})
+        self.assertEqual(resumed[-1]["role"], "user")
+
+    def test_client_error_falls_back_without_retry(self) -> None:
+        _FlakyStream.mode = "reject"
+        text, deltas, fallbacks = self._run()
+        self.assertEqual(text, "plain")
+        self.assertEqual(deltas, ["plain"])
+        self.assertEqual([f["action"] for f in fallbacks], ["non_stream"])
+        self.assertEqual(len(_FlakyStream.bodies), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
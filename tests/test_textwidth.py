@@ -0,0 +1,85 @@
+import os
+import random
+import textwrap
+import time
+import unittest
+
+from trpgai.textwidth import slice_cols, str_width, wrap
+from trpgai.tui_chat import _Transcript
+
+JA = "呪文の効果を調べる。ゴブリンは三体、ダメージは２ｄ６。"
+MIXED = "The goblin casts 火球 🎲 for 8d6 — café naïve résumé, ｆｕｌｌｗｉｄｔｈ"
+
+
+def _old_wrap_transcript(transcript: list[tuple[str, str]], width: int) -> list[tuple[str, str]]:
+    # The wrapping the TUI used before textwidth: code points, not cells.
+    lines: list[tuple[str, str]] = []
+    for who, text in transcript:
+        prefix = f"{who}> "
+        avail = max(4, max(10, width) - len(prefix) - 1)
+        for part in text.splitlines() or [""]:
+            for seg in textwrap.wrap(part, width=avail) or [""]:
+                lines.append((who, prefix + seg))
+        lines.append((who, ""))
+    return lines
+
+
+class TestTextWidth(unittest.TestCase):
+    def test_widths(self) -> None:
+        self.assertEqual(str_width("abc"), 3)
+        self.assertEqual(str_width("日本"), 4)
+        self.assertEqual(str_width("é"), 1)
+        self.assertEqual(str_width("👍‍"), 2)
+        self.assertEqual(slice_cols("a日本b", 0, 4), ("a日", 2))
+
+    def test_wrap_keeps_indent(self) -> None:
+        self.assertEqual(wrap("  - 2d6 fire", 8), ["  - 2d6", "fire"])
+        self.assertEqual(wrap("   ", 8), [])
+
+    def test_wrap_is_cell_accurate(self) -> None:
+        for width in (1, 2, 5, 11, 20):
+            for text in (JA, MIXED, JA + " " + MIXED):
+                lines = wrap(text, width)
+                self.assertTrue(all(str_width(line) <= max(width, 2) for line in lines), (width, lines))
+                self.assertEqual("".join(lines).replace(" ", ""), text.replace(" ", ""))
+
+    def test_ascii_matches_textwrap(self) -> None:
+        rng = random.Random(5)
+        words = ["a", "roll", "initiative", "supercalifragilistic", "  ", "d20"]
+        for _ in range(200):
+            text = " ".join(rng.choice(words) for _ in range(rng.randint(0, 30))).lstrip()
+            width = rng.randint(1, 40)
+            # textwrap sometimes leaves a trailing space on a line; it draws the same.
+            expected = [line.rstrip() for line in textwrap.wrap(text, width)]
+            self.assertEqual(wrap(text, width), expected, (text, width))
+
+    @unittest.skipUnless(os.environ.get("TRPGAI_BENCH"), "set TRPGAI_BENCH=1 to run the benchmark")
+    def test_benchmark_against_textwrap(self) -> None:
+        rng = random.Random(1)
+        pool = [JA, MIXED, "You swing at the orc and roll 1d20+5 => (14) + 5 = 19. " * 3]
+        entries = [(rng.choice(["you", "ai", "tool"]), rng.choice(pool)) for _ in range(5000)]
+
+        t0 = time.perf_counter()
+        old = _old_wrap_transcript(entries, 40)
+        t_old = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        new = _Transcript(entries)
+        count = new.total_lines(40)
+        t_new = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for _ in range(100):
+            new.window(40, 0, 40)
+        t_redraw = (time.perf_counter() - t0) / 100
+
+        overflow = sum(1 for _who, line in old if str_width(line) > 39)
+        print(
+            f"\nwrap 5000 entries at 40 cols: textwrap {t_old * 1000:.0f} ms ({len(old)} lines, {overflow} overflow), "
+            f"textwidth {t_new * 1000:.0f} ms ({count} lines, 0 overflow); cached redraw {t_redraw * 1e6:.0f} us"
+        )
+        self.assertTrue(all(str_width(line) <= 39 for _who, line in new.window(40, 0, count)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 
-from trpgai.tui_chat import _format_tool_call, _format_tool_result
+from trpgai.tui_chat import _format_progress, _format_tool_call, _format_tool_result, _format_tool_status
 
 
 class TestToolCards(unittest.TestCase):
@@ -25,6 +25,14 @@ class TestToolCards(unittest.TestCase):
         s = _format_tool_result("abc", '{"error":"bad expr"}')
         self.assertIn("error", s)
 
+    def test_format_tool_status_with_progress(self) -> None:
+        call = {"function": {"name": "mcp__maps__make_map"}}
+        detail = _format_progress({"progress": 3, "total": 4, "message": "room 3\nof 4"})
+        self.assertEqual(detail, "75%  room 3 of 4")
+        s = _format_tool_status("abc", call, "RUNNING", 1.5, detail)
+        self.assertEqual(s, "RUNNING  mcp__maps__make_map  id=abc  1.50s  75%  room 3 of 4")
+        self.assertEqual(_format_progress({"progress": 7}), "7")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+
+from trpgai.config import AppConfig, ChatConfig
+from trpgai.mcp_client import McpTool, _mcp_tool_public_name
+from trpgai.openai_client import ChatClient, ChatMessage
+from trpgai.tool_index import ToolIndex, tokenize
+
+
+def _tool(name: str, desc: str, props: list[str] | None = None) -> McpTool:
+    schema = {"type": "object", "properties": {p: {"type": "string"} for p in props or []}}
+    return McpTool(
+        server="rules",
+        mcp_name=name,
+        public_name=_mcp_tool_public_name("rules", name),
+        description=desc,
+        input_schema=schema,
+    )
+
+
+TOOLS = [
+    _tool("lookupSpell", "Return the full rules text of a spell.", ["spell_name", "level"]),
+    _tool("monster_stats", "Stat block for a monster or NPC.", ["monster"]),
+    _tool("campaign_notes", "Search the campaign notes.", ["query"]),
+    _tool("item_price", "Price of mundane equipment.", ["item"]),
+    _tool("呪文検索", "呪文の効果を調べる", ["名前"]),
+]
+
+
+class _StubMcp:
+    def tools(self) -> list[McpTool]:
+        return list(TOOLS)
+
+
+class TestToolIndex(unittest.TestCase):
+    def test_tokenize_splits_identifiers_and_cjk(self) -> None:
+        self.assertEqual(tokenize("lookupSpell spell_names"), ["lookup", "spell", "spell", "name"])
+        self.assertEqual(tokenize("呪文検索"), ["呪文", "文検", "検索"])
+
+    def test_ranks_by_name_description_and_properties(self) -> None:
+        index = ToolIndex()
+        self.assertEqual(index.sync(TOOLS), len(TOOLS))
+        top = index.search("what does the fireball spell do at level 5?", 2)
+        self.assertEqual(top[0][0], "mcp__rules__lookupSpell")
+        self.assertEqual(index.search("ゴブリンに呪文を唱える", 1)[0][0], TOOLS[4].public_name)
+        self.assertEqual(index.search("zzz", 3), [])
+
+    def test_sync_is_incremental(self) -> None:
+        index = ToolIndex()
+        index.sync(TOOLS)
+        self.assertEqual(index.sync(TOOLS), 0)
+        changed = [_tool("monster_stats", "Stat block incl. dragon lairs.", ["monster"])]
+        self.assertEqual(index.sync(TOOLS[:1] + changed), 1)
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.search("dragon", 1)[0][0], "mcp__rules__monster_stats")
+        self.assertEqual(index.search("campaign", 1), [])
+
+    def test_chat_client_sends_top_k_plus_pinned(self) -> None:
+        cfg = AppConfig(chat=ChatConfig(tool_top_k=1, pinned_tools=["item_price"]))
+        client = ChatClient(cfg)
+        client._mcp = _StubMcp()
+        payload = [{"type": "function", "function": {"name": t.public_name}} for t in TOOLS]
+        picked = client._select_mcp_tools(payload, [ChatMessage(role="user", content="stats for an owlbear monster")])
+        self.assertEqual([t["function"]["name"] for t in picked], ["mcp__rules__monster_stats", "mcp__rules__item_price"])
+
+    def test_follow_up_without_match_keeps_tools(self) -> None:
+        client = ChatClient(AppConfig(chat=ChatConfig(tool_top_k=1)))
+        client._mcp = _StubMcp()
+        payload = [{"type": "function", "function": {"name": t.public_name}} for t in TOOLS]
+        names = [t["function"]["name"] for t in payload]
+
+        picked = client._select_mcp_tools(payload, [ChatMessage(role="user", content="yes, do it")])
+        self.assertEqual([t["function"]["name"] for t in picked], names)
+
+        called = ChatMessage(
+            role="assistant",
+            tool_calls=[{"id": "c1", "type": "function", "function": {"name": "mcp__rules__item_price", "arguments": "{}"}}],
+        )
+        history = [ChatMessage(role="user", content="price of rope"), called, ChatMessage(role="user", content="and a spell?")]
+        picked = client._select_mcp_tools(payload, history)
+        self.assertEqual([t["function"]["name"] for t in picked], ["mcp__rules__lookupSpell", "mcp__rules__item_price"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from trpgai.config import AppConfig, McpConfig, McpServerConfig
+from trpgai.openai_client import ChatClient
+from trpgai.tool_results import fit_text, spill_result
+
+
+class _StubMcp:
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+    def has_servers(self) -> bool:
+        return True
+
+    def call_tool(self, name: str, args: dict, timeout_s: float | None = None, cancel: object = None, on_progress: object = None) -> dict:
+        return {"text": self.text, "raw": {"content": [{"type": "text", "text": self.text}]}}
+
+    def tool_timeout(self, public_name: str) -> float:
+        return 60.0
+
+    def result_budget(self, public_name: str, default: int) -> int:
+        return 1000 if public_name == "mcp__rules__big" else default
+
+
+def _call(name: str) -> dict:
+    return {"id": "c1", "function": {"name": name, "arguments": "{}"}}
+
+
+class TestToolResults(unittest.TestCase):
+    def test_fit_text_keeps_head_and_tail(self) -> None:
+        self.assertEqual(fit_text("short", 10), ("short", False))
+        text, cut = fit_text("a" * 80 + "b" * 20, 50)
+        self.assertTrue(cut)
+        self.assertTrue(text.startswith("a" * 40))
+        self.assertTrue(text.endswith("b" * 10))
+
+    def test_spill_writes_full_result(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = spill_result("mcp__rules/x", "c1", {"q": 1}, {"text": "呪文", "raw": {}}, Path(tmp))
+            self.assertIsNotNone(path)
+            body = json.loads(path.read_text(encoding="utf-8"))
+            self.assertEqual(body["text"], "呪文")
+            self.assertNotIn("/", path.name)
+
+    def test_chat_client_budgets_and_drops_raw(self) -> None:
+        cfg = AppConfig(mcp=McpConfig(servers={"rules": McpServerConfig(url="http://x")}, result_budget_chars=3000, turn_result_budget_chars=4000, tool_cache_ttl_s=0))
+        with tempfile.TemporaryDirectory() as tmp:
+            client = ChatClient(cfg)
+            client.spill_dir = Path(tmp)
+            client._mcp = _StubMcp("ルール" * 2000)
+            budget = {"chars": cfg.mcp.turn_result_budget_chars, "tool_s": 60.0}
+
+            first = json.loads(client._handle_tool_call(_call("mcp__rules__big"), budget).content)
+            self.assertNotIn("raw", first)
+            self.assertEqual(first["truncated"], {"shown_chars": len(first["text"]), "total_chars": 6000})
+            self.assertLessEqual(len(first["text"]), 1003)
+            self.assertTrue(Path(first["full_result"]).is_file())
+
+            second = json.loads(client._handle_tool_call(_call("mcp__rules__other"), budget).content)
+            self.assertLessEqual(len(second["text"]), 3003)
+            third = json.loads(client._handle_tool_call(_call("mcp__rules__other"), budget).content)
+            self.assertLessEqual(len(third["text"]), 403)
+            self.assertEqual(budget["chars"], 0)
+
+    def test_small_results_pass_through(self) -> None:
+        client = ChatClient(AppConfig(mcp=McpConfig(servers={"rules": McpServerConfig(url="http://x")}, tool_cache_ttl_s=0)))
+        client._mcp = _StubMcp("ok")
+        content = client._handle_tool_call(_call("mcp__rules__other")).content
+        self.assertEqual(json.loads(content), {"text": "ok"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from unittest import mock
+
+from trpgai import tui_chat
+from trpgai.tui_chat import _Transcript, _wrap_entry
+
+
+def _full(entries: list[tuple[str, str]], width: int) -> list[tuple[str, str]]:
+    return [line for who, text in entries for line in _wrap_entry(who, text, width)]
+
+
+ENTRIES = [("sys", "hello"), ("you", "word " * 40), ("ai", "a\nb\nc"), ("tool", "x" * 90)]
+
+
+class TestTranscript(unittest.TestCase):
+    def test_window_matches_full_wrap(self) -> None:
+        t = _Transcript(ENTRIES)
+        full = _full(ENTRIES, 40)
+        self.assertEqual(t.total_lines(40), len(full))
+        for scroll in range(len(full) + 3):
+            end = len(full) - min(scroll, len(full) - 5)
+            self.assertEqual(t.window(40, scroll, 5), full[end - 5 : end], scroll)
+        self.assertEqual(t.window(40, 0, 500), full)
+
+    def test_only_changed_entries_are_rewrapped(self) -> None:
+        t = _Transcript(ENTRIES)
+        t.total_lines(40)
+        with mock.patch.object(tui_chat, "_wrap_entry", wraps=_wrap_entry) as wrap:
+            t.window(40, 0, 10)
+            self.assertEqual(wrap.call_count, 0)
+            t[2] = ("ai", "streamed " * 20)
+            t.append(("sys", "new"))
+            t.window(40, 0, 10)
+            self.assertEqual(wrap.call_count, 2)
+            t.window(60, 0, 10)
+            self.assertEqual(wrap.call_count, 2 + len(t))
+
+    def test_pop_keeps_counts_consistent(self) -> None:
+        t = _Transcript(ENTRIES)
+        t.total_lines(40)
+        t[3] = ("tool", "RUNNING")
+        t.pop(1)
+        entries = [ENTRIES[0], ENTRIES[2], ("tool", "RUNNING")]
+        self.assertEqual(t.window(40, 0, 100), _full(entries, 40))
+        self.assertEqual(t.total_lines(40), len(_full(entries, 40)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import random
+import time
+import unittest
+
+from trpgai.textwidth import str_width
+from trpgai.tui_input import InputBuffer
+
+
+class TestInputBuffer(unittest.TestCase):
+    def test_edits_match_a_plain_string(self) -> None:
+        rng = random.Random(7)
+        buf = InputBuffer()
+        ref = ""
+        cur = 0
+        for _ in range(3000):
+            op = rng.randrange(6)
+            if op == 0:
+                s = rng.choice(["a", "bc", "漢字", "\n", "é", "x" * 70])
+                buf.insert(s)
+                ref = ref[:cur] + s + ref[cur:]
+                cur += len(s)
+            elif op == 1:
+                buf.backspace()
+                if cur:
+                    ref = ref[: cur - 1] + ref[cur:]
+                    cur -= 1
+            elif op == 2:
+                buf.delete()
+                ref = ref[:cur] + ref[cur + 1 :]
+            else:
+                cur = rng.randrange(len(ref) + 1)
+                buf.move_to(cur)
+            self.assertEqual((buf.text, buf.cursor, len(buf)), (ref, cur, len(ref)))
+            a = rng.randrange(len(ref) + 1)
+            b = rng.randrange(a, len(ref) + 1)
+            self.assertEqual(buf.cols(a, b), str_width(ref[a:b]))
+
+    def test_lines_keep_the_column_across_up_and_down(self) -> None:
+        buf = InputBuffer("abcdef\n漢字\nxy")
+        self.assertEqual(buf.line_count(), 3)
+        buf.move_to(4)
+        buf.down()
+        # Column 4 in cells is after both wide characters.
+        self.assertEqual(buf.cursor, 9)
+        buf.down()
+        self.assertEqual(buf.cursor, len(buf.text))
+        buf.up()
+        buf.up()
+        self.assertEqual(buf.cursor, 4)
+        buf.home()
+        self.assertEqual(buf.cursor, 0)
+        buf.end()
+        self.assertEqual(buf.cursor, 6)
+
+    def test_view_keeps_the_cursor_visible(self) -> None:
+        buf = InputBuffer("x" * 100)
+        rows, y, x = buf.view(20, 1)
+        self.assertEqual((rows, y, x), (["x" * 20], 0, 20))
+        # Moving left inside the visible part does not scroll.
+        buf.move_to(90)
+        self.assertEqual(buf.view(20, 1)[2], 10)
+        buf.move_to(0)
+        self.assertEqual(buf.view(20, 1), (["x" * 20], 0, 0))
+
+        buf = InputBuffer("\n".join(f"line {i}" for i in range(10)))
+        rows, y, x = buf.view(20, 3)
+        self.assertEqual((rows, y, x), (["line 7", "line 8", "line 9"], 2, 6))
+        buf.move_to(0)
+        self.assertEqual(buf.view(20, 3)[:2], (["line 0", "line 1", "line 2"], 0))
+
+        buf = InputBuffer("漢" * 30)
+        rows, _y, x = buf.view(9, 1)
+        self.assertLessEqual(str_width(rows[0]), 9)
+        self.assertLessEqual(x, 9)
+
+    def test_version_tracks_changes(self) -> None:
+        buf = InputBuffer("ab")
+        v = buf.version
+        buf.move_to(2)
+        self.assertEqual(buf.version, v)
+        buf.left()
+        buf.insert("c")
+        self.assertEqual(buf.version, v + 2)
+        buf.clear()
+        self.assertEqual((buf.text, buf.cursor, bool(buf)), ("", 0, False))
+
+    @unittest.skipUnless(os.environ.get("TRPGAI_BENCH") == "1", "set TRPGAI_BENCH=1")
+    def test_bench_paste(self) -> None:
+        # The old loop is cubic in the paste length; 600 characters already show it.
+        paste = ("The party camps by the river. 川辺で野営する。\n" * 20)[:600]
+        avail = 70
+
+        def old() -> None:
+            input_buf = ""
+            cursor = 0
+            for ch in paste:
+                if ch == "\n":
+                    continue
+                input_buf = input_buf[:cursor] + ch + input_buf[cursor:]
+                cursor += 1
+                hoff = 0
+                while hoff < cursor and str_width(input_buf[hoff:cursor]) > avail:
+                    hoff += 1
+
+        def new() -> None:
+            buf = InputBuffer()
+            for ch in paste:
+                buf.insert(ch)
+            buf.view(avail, 6)
+
+        for name, fn in (("string + redraw per key", old), ("gap buffer + one redraw", new)):
+            t0 = time.perf_counter()
+            fn()
+            print(f"\n{name}: {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    unittest.main()
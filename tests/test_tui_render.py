@@ -0,0 +1,134 @@
+import unittest
+
+from trpgai.config import AppConfig
+from trpgai.tui_chat import _format_render_stats
+from trpgai.tui_render import FrameScheduler, Screen
+
+
+class _Win:
+    def __init__(self, log: list[str], name: str, h: int, w: int):
+        self.log = log
+        self.name = name
+        self.size = (h, w)
+        self.rows: dict[int, str] = {}
+
+    def getmaxyx(self) -> tuple[int, int]:
+        return self.size
+
+    def keypad(self, _flag: bool) -> None:
+        pass
+
+    def erase(self) -> None:
+        self.rows.clear()
+
+    def addnstr(self, y: int, x: int, s: str, n: int, *_attr: int) -> None:
+        self.rows[y] = s[:n]
+
+    def noutrefresh(self) -> None:
+        self.log.append(self.name)
+
+
+class _Curses:
+    def __init__(self, stdscr: "_Win"):
+        self.stdscr = stdscr
+        self.log: list[str] = []
+        self.updates = 0
+        self.created = 0
+
+    def newwin(self, h: int, w: int, y: int, _x: int) -> _Win:
+        self.created += 1
+        name = "transcript" if y == 0 else "status" if y == self.stdscr.size[0] - 2 else "input"
+        return _Win(self.log, name, h, w)
+
+    def doupdate(self) -> None:
+        self.updates += 1
+
+
+def _regions(transcript_key: object, status: str, text: str) -> dict:
+    return {
+        "transcript": (transcript_key, lambda win, h, w: win.addnstr(0, 0, "hello", w)),
+        "status": (status, lambda win, h, w: win.addnstr(0, 0, status, w)),
+        "input": (text, lambda win, h, w: win.addnstr(0, 0, "you> " + text, w)),
+    }
+
+
+class TestFrameScheduler(unittest.TestCase):
+    def test_requests_are_coalesced_to_max_fps(self) -> None:
+        f = FrameScheduler(20)
+        self.assertIsNone(f.wait_s(0.0))
+
+        f.request()
+        self.assertTrue(f.due(0.0))
+        f.frame_done(True, now=0.0)
+
+        # A burst of stream deltas inside one frame interval becomes one frame.
+        for _ in range(10):
+            f.request()
+        self.assertFalse(f.due(0.01))
+        self.assertAlmostEqual(f.wait_s(0.01), 0.04)
+        self.assertTrue(f.due(0.05))
+        f.frame_done(True, now=0.05)
+        self.assertEqual(f.stats(), {"max_fps": 20, "frames": 2, "skipped": 9})
+
+        f.request()
+        f.frame_done(False, now=0.2)
+        self.assertEqual(f.stats()["skipped"], 10)
+
+    def test_zero_max_fps_draws_every_request(self) -> None:
+        f = FrameScheduler(0)
+        f.request()
+        f.frame_done(True, now=1.0)
+        f.request()
+        self.assertTrue(f.due(1.0))
+
+
+class TestScreen(unittest.TestCase):
+    def setUp(self) -> None:
+        self.stdscr = _Win([], "stdscr", 24, 80)
+        self.c = _Curses(self.stdscr)
+        self.screen = Screen(self.c, self.stdscr)
+
+    def test_only_changed_regions_are_repainted(self) -> None:
+        self.assertTrue(self.screen.render(_regions(1, "hint", "")))
+        self.assertEqual(self.c.log, ["transcript", "status", "input", "input"])
+        self.assertEqual(self.c.updates, 1)
+
+        # Typing touches the input line only.
+        self.c.log.clear()
+        self.assertTrue(self.screen.render(_regions(1, "hint", "a")))
+        self.assertEqual(self.c.log, ["input", "input"])
+
+        # A stream delta repaints the transcript; the cursor stays on the input line.
+        self.c.log.clear()
+        self.assertTrue(self.screen.render(_regions(2, "hint", "a")))
+        self.assertEqual(self.c.log, ["transcript", "input"])
+
+        self.c.log.clear()
+        self.assertFalse(self.screen.render(_regions(2, "hint", "a")))
+        self.assertEqual(self.c.log, [])
+        self.assertEqual(self.c.updates, 3)
+        self.assertEqual(self.screen.repaints, {"transcript": 2, "status": 1, "input": 2})
+
+    def test_resize_and_invalidate_repaint_everything(self) -> None:
+        self.screen.render(_regions(1, "hint", ""))
+        self.screen.invalidate()
+        self.c.log.clear()
+        self.screen.render(_regions(1, "hint", ""))
+        self.assertEqual(self.c.log, ["transcript", "status", "input", "input"])
+
+        self.stdscr.size = (10, 40)
+        self.c.log.clear()
+        self.screen.render(_regions(1, "hint", ""))
+        self.assertEqual(self.c.created, 6)
+        self.assertEqual(self.c.log, ["transcript", "status", "input", "input"])
+        self.assertEqual(self.screen.input.getmaxyx(), (1, 40))
+
+    def test_render_stats_and_config(self) -> None:
+        line = _format_render_stats({"max_fps": 30, "frames": 4, "skipped": 7}, {"transcript": 2, "input": 4})
+        self.assertEqual(line, "render: frames=4 skipped=7 max_fps=30 repaints: transcript=2 input=4")
+        self.assertEqual(AppConfig.from_dict({}).chat.tui_max_fps, 30)
+        self.assertEqual(AppConfig.from_dict({"chat": {"tui_max_fps": -5}}).chat.tui_max_fps, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from .config import AppConfig
+from .openai_client import ChatClient, ChatMessage
+
+
+@dataclass(frozen=True)
+class BatchItem:
+    id: str
+    messages: list[ChatMessage]
+    meta: Any = None
+    error: str | None = None
+
+
+def default_output_path(input_path: Path) -> Path:
+    return input_path.with_name(input_path.stem + ".out.jsonl")
+
+
+def _parse_item(line: str, lineno: int, system_prompt: str) -> BatchItem:
+    fallback_id = f"line-{lineno}"
+    try:
+        data = json.loads(line)
+    except json.JSONDecodeError as e:
+        return BatchItem(id=fallback_id, messages=[], error=f"invalid json: {e}")
+
+    if isinstance(data, str):
+        data = {"prompt": data}
+    if not isinstance(data, dict):
+        return BatchItem(id=fallback_id, messages=[], error="item must be an object or string")
+
+    raw_id = data.get("id")
+    item_id = str(raw_id) if raw_id is not None and str(raw_id) else fallback_id
+
+    system = data.get("system", system_prompt)
+    messages: list[ChatMessage] = []
+    if isinstance(system, str) and system.strip():
+        messages.append(ChatMessage(role="system", content=system))
+
+    raw_messages = data.get("messages")
+    if isinstance(raw_messages, list):
+        for m in raw_messages:
+            if not isinstance(m, dict) or not isinstance(m.get("role"), str):
+                return BatchItem(id=item_id, messages=[], error="messages must be {role, content} objects")
+            if m["role"] == "system" and messages and messages[0].role == "system":
+                messages = messages[1:]
+            content = m.get("content")
+            messages.append(ChatMessage(role=m["role"], content=None if content is None else str(content)))
+    else:
+        prompt = data.get("prompt")
+        if not isinstance(prompt, str) or not prompt.strip():
+            return BatchItem(id=item_id, messages=[], error="item needs prompt or messages")
+        messages.append(ChatMessage(role="user", content=prompt))
+
+    return BatchItem(id=item_id, messages=messages, meta=data.get("meta"))
+
+
+def iter_batch_items(path: Path, system_prompt: str = "") -> Iterator[BatchItem]:
+    # Streams the input; large files are never loaded at once.
+    with path.open("r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            yield _parse_item(line, lineno, system_prompt)
+
+
+def load_checkpoint(path: Path, retry_failed: bool = False) -> set[str]:
+    # The results file doubles as the checkpoint: every recorded id is done.
+    # A torn trailing line from a crash is ignored and its item re-run.
+    latest: dict[str, bool] = {}
+    if not path.exists():
+        return set()
+    with path.open("r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(rec, dict) and rec.get("id") is not None:
+                latest[str(rec["id"])] = bool(rec.get("ok"))
+    if retry_failed:
+        return {k for k, ok in latest.items() if ok}
+    return set(latest)
+
+
+def _open_results(path: Path) -> Any:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    needs_newline = False
+    if path.exists() and path.stat().st_size > 0:
+        with path.open("rb") as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+    out = path.open("a", encoding="utf-8")
+    if needs_newline:
+        out.write("\n")
+    return out
+
+
+def run_batch(
+    cfg: AppConfig,
+    input_path: Path,
+    output_path: Path,
+    concurrency: int = 4,
+    retry_failed: bool = False,
+    on_result: Callable[[dict[str, Any]], None] | None = None,
+    client: ChatClient | None = None,
+) -> dict[str, int]:
+    concurrency = max(1, int(concurrency))
+    done = load_checkpoint(output_path, retry_failed=retry_failed)
+    counts = {"total": 0, "skipped": 0, "ok": 0, "failed": 0}
+
+    # Callers that pass their own client can read its limiter state afterwards
+    # and close it themselves; a client made here is closed here.
+    owned = client is None
+    if client is None:
+        client = ChatClient(cfg)
+
+    write_lock = threading.Lock()
+    # Bounds queued + running items so the input is read lazily.
+    slots = threading.BoundedSemaphore(concurrency * 2)
+    seen: set[str] = set()
+
+    def record(out: Any, rec: dict[str, Any]) -> None:
+        line = json.dumps(rec, ensure_ascii=False)
+        with write_lock:
+            out.write(line + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+            counts["ok" if rec.get("ok") else "failed"] += 1
+        if on_result is not None:
+            try:
+                on_result(rec)
+            except Exception:
+                pass
+
+    def run_one(out: Any, item: BatchItem) -> None:
+        start = time.monotonic()
+        rec: dict[str, Any] = {"id": item.id}
+        try:
+            if item.error:
+                raise ValueError(item.error)
+            text, new_messages = client.chat(item.messages)
+            rec["ok"] = True
+            rec["content"] = text
+            rec["tool_calls"] = sum(1 for m in new_messages[len(item.messages) :] if m.role == "tool")
+        except Exception as e:
+            rec["ok"] = False
+            rec["error"] = str(e)
+        rec["elapsed_s"] = round(time.monotonic() - start, 3)
+        if item.meta is not None:
+            rec["meta"] = item.meta
+        record(out, rec)
+
+    try:
+        if any(s.enabled for s in cfg.mcp.servers.values()):
+            # Handshake once up front instead of racing it from every worker.
+            try:
+                client.mcp_sync()
+            except Exception:
+                pass
+
+        with _open_results(output_path) as out, ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for item in iter_batch_items(input_path, cfg.chat.system_prompt):
+                counts["total"] += 1
+                if item.id in done or item.id in seen:
+                    counts["skipped"] += 1
+                    continue
+                seen.add(item.id)
+
+                slots.acquire()
+                fut = pool.submit(run_one, out, item)
+                fut.add_done_callback(lambda _f: slots.release())
+    finally:
+        if owned:
+            client.close()
+
+    return counts
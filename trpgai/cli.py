@@ -5,8 +5,10 @@ import json
 import sys
 from pathlib import Path
 
+from .batch import default_output_path, run_batch
 from .config import default_config_path, load_config, save_config
 from .dice import roll_expression
+from .mcp_server import McpDiceServer
 from .openai_client import ChatClient, ChatMessage
 from .tui_chat import run_chat_tui
 from .tui_config import edit_config_tui
@@ -78,7 +80,7 @@ def _cmd_chat(args: argparse.Namespace) -> int:
             updated = edit_config_tui(cfg, path=path)
             save_config(updated, path)
             cfg = updated
-            client = ChatClient(cfg)
+            client.reconfigure(cfg)
             print(f"saved: {path}")
             continue
 
@@ -107,6 +109,65 @@ def _cmd_chat(args: argparse.Namespace) -> int:
     return 0
 
 
+def _cmd_batch(args: argparse.Namespace) -> int:
+    cfg_path = Path(args.config) if args.config else None
+    cfg = load_config(cfg_path)
+
+    input_path = Path(args.input)
+    if not input_path.exists():
+        print(f"error: no such file: {input_path}", file=sys.stderr)
+        return 2
+    output_path = Path(args.output) if args.output else default_output_path(input_path)
+
+    def on_result(rec: dict) -> None:
+        tag = "ok" if rec.get("ok") else "err"
+        line = f"[{tag}] {rec.get('id')}  {rec.get('elapsed_s', 0):.2f}s"
+        if not rec.get("ok"):
+            line += f"  {rec.get('error')}"
+        print(line, file=sys.stderr)
+
+    client = ChatClient(cfg)
+    try:
+        counts = run_batch(
+            cfg,
+            input_path,
+            output_path,
+            concurrency=args.concurrency,
+            retry_failed=bool(args.retry_failed),
+            on_result=on_result,
+            client=client,
+        )
+        lim = client.rate_limit_status()
+    finally:
+        client.close()
+    print(
+        f"batch: total={counts['total']} ok={counts['ok']} failed={counts['failed']} "
+        f"skipped={counts['skipped']} -> {output_path}",
+        file=sys.stderr,
+    )
+    print(
+        f"limiter: limit={lim['limit']} throttled={lim['throttled']} waits={lim['waits']} wait_s={lim['wait_s']}",
+        file=sys.stderr,
+    )
+    return 0 if counts["failed"] == 0 else 1
+
+
+def _cmd_mcp_serve(args: argparse.Namespace) -> int:
+    try:
+        server = McpDiceServer(args.host, args.port, path=args.path)
+    except OSError as e:
+        print(f"error: cannot listen on {args.host}:{args.port}: {e}", file=sys.stderr)
+        return 2
+    print(f"mcp dice server: {server.url}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
 def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(prog="trpgai")
     sub = p.add_subparsers(dest="cmd", required=True)
@@ -125,11 +186,29 @@ def build_parser() -> argparse.ArgumentParser:
     )
     p_chat.set_defaults(func=_cmd_chat)
 
+    p_batch = sub.add_parser("batch", help="run prompts from a jsonl file")
+    p_batch.add_argument("input", help="jsonl: {id, prompt} or {id, messages} per line")
+    p_batch.add_argument("-o", "--output", help="results jsonl, also the resume checkpoint (default: INPUT.out.jsonl)")
+    p_batch.add_argument("--config", help="config path")
+    p_batch.add_argument("-j", "--concurrency", type=int, default=4, help="max requests in flight")
+    p_batch.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="re-run items whose last recorded result failed",
+    )
+    p_batch.set_defaults(func=_cmd_batch)
+
     p_roll = sub.add_parser("roll", help="roll dice expression")
     p_roll.add_argument("expression")
     p_roll.add_argument("--seed", type=int)
     p_roll.set_defaults(func=_cmd_roll)
 
+    p_serve = sub.add_parser("mcp-serve", help="serve the dice roller as an MCP server (Streamable HTTP)")
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=8765)
+    p_serve.add_argument("--path", default="/mcp", help="endpoint path")
+    p_serve.set_defaults(func=_cmd_mcp_serve)
+
     p_cfg = sub.add_parser("config", help="edit config (TUI) or print json")
     p_cfg.add_argument("--path", help="config path")
     p_cfg.add_argument("--print-json", action="store_true")
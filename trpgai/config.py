@@ -14,10 +14,21 @@ def _xdg_config_home() -> Path:
     return Path.home() / ".config"
 
 
+def _xdg_cache_home() -> Path:
+    env = os.environ.get("XDG_CACHE_HOME")
+    if env:
+        return Path(env).expanduser()
+    return Path.home() / ".cache"
+
+
 def default_config_path() -> Path:
     return _xdg_config_home() / "trpgai" / "config.json"
 
 
+def default_cache_dir() -> Path:
+    return _xdg_cache_home() / "trpgai"
+
+
 @dataclass(frozen=True)
 class ProviderConfig:
     base_url: str = "https://api.openai.com"
@@ -40,9 +51,20 @@ class ChatConfig:
     max_output_tokens: int | None = None
 
     stream: bool = False
+    # Mid-stream failures are retried (or continued) this many times before
+    # falling back to a non-streaming request.
+    stream_retries: int = 2
 
     enable_tool_roll: bool = True
 
+    # Send only the K MCP tools most relevant to the conversation (0 = all).
+    # Pinned tools (public or MCP names) are always sent.
+    tool_top_k: int = 0
+    pinned_tools: list[str] = field(default_factory=list)
+
+    # Redraws are coalesced to at most this many frames a second (0 = no cap).
+    tui_max_fps: int = 30
+
 
 @dataclass(frozen=True)
 class McpServerConfig:
@@ -50,13 +72,31 @@ class McpServerConfig:
     # or base host for legacy SSE (we'll probe /sse).
     url: str = ""
 
-    # auto | streamable_http | legacy_sse
+    # auto | streamable_http | legacy_sse | stdio
+    # (auto with a command and no url means stdio)
     transport: str = "auto"
+    # stdio: local server process speaking newline-delimited JSON-RPC.
+    command: str = ""
+    args: list[str] = field(default_factory=list)
+    env: dict[str, str] = field(default_factory=dict)
+    cwd: str = ""
     protocol_version: str = "2025-11-25"
 
     timeout_s: float = 60.0
     verify_tls: bool = True
     headers: dict[str, str] = field(default_factory=dict)
+    # Tool calls in flight to this server at once; extra callers queue.
+    max_concurrency: int = 4
+    # MCP tool names whose results may be cached even without a
+    # readOnlyHint annotation.
+    cache_tools: list[str] = field(default_factory=list)
+    # Stop paging tools/list after this many tools; 0 means no cap.
+    max_tools: int = 0
+    # Per-tool result size limits (MCP tool name -> chars), overriding
+    # McpConfig.result_budget_chars.
+    result_budgets: dict[str, int] = field(default_factory=dict)
+    # Per-tool call timeouts (MCP tool name -> seconds), overriding timeout_s.
+    tool_timeouts: dict[str, float] = field(default_factory=dict)
 
     enabled: bool = True
 
@@ -64,6 +104,23 @@ class McpServerConfig:
 @dataclass(frozen=True)
 class McpConfig:
     servers: dict[str, McpServerConfig] = field(default_factory=dict)
+    # Overall wait for a tool sync; slower servers keep syncing in the background.
+    sync_deadline_s: float = 15.0
+    # How long a cached tools/list stays usable at startup; 0 disables the cache.
+    tool_cache_ttl_s: float = 86400.0
+    # LRU cache for results of read-only tools; 0 disables either.
+    result_cache_ttl_s: float = 300.0
+    result_cache_size: int = 256
+    # Tool definition compaction: 0 off, 1 minify (drop empty annotations),
+    # 2 also collapse whitespace and strip non-essential keywords and unused
+    # $defs, 3 also truncate descriptions.
+    schema_compaction: int = 1
+    # Tool result text sent to the model, per result and per chat turn (chars,
+    # 0 = unlimited). Longer results are cut and saved in full to a file.
+    result_budget_chars: int = 8000
+    turn_result_budget_chars: int = 24000
+    # Total time MCP tool calls may take in one chat turn; 0 = no limit.
+    tool_phase_deadline_s: float = 120.0
 
 
 @dataclass(frozen=True)
@@ -92,16 +149,86 @@ class AppConfig:
                 if isinstance(raw_headers, dict):
                     headers = {str(k): str(v) for k, v in raw_headers.items()}
 
+                env: dict[str, str] = {}
+                raw_env = s.get("env")
+                if isinstance(raw_env, dict):
+                    env = {str(k): str(v) for k, v in raw_env.items()}
+                raw_args = s.get("args")
+                args = [str(x) for x in raw_args] if isinstance(raw_args, list) else []
+                # A bare string names one tool; iterating it would cache per character.
+                raw_cache = s.get("cache_tools")
+                if isinstance(raw_cache, str):
+                    raw_cache = [raw_cache]
+                cache_tools = [str(x) for x in raw_cache if str(x)] if isinstance(raw_cache, list) else []
+
+                result_budgets: dict[str, int] = {}
+                raw_budgets = s.get("result_budgets")
+                if isinstance(raw_budgets, dict):
+                    for k, v in raw_budgets.items():
+                        try:
+                            result_budgets[str(k)] = max(0, int(v))
+                        except (TypeError, ValueError):
+                            continue
+
+                tool_timeouts: dict[str, float] = {}
+                raw_timeouts = s.get("tool_timeouts")
+                if isinstance(raw_timeouts, dict):
+                    for k, v in raw_timeouts.items():
+                        try:
+                            tool_timeouts[str(k)] = max(0.1, float(v))
+                        except (TypeError, ValueError):
+                            continue
+
                 mcp_servers[name] = McpServerConfig(
                     url=str(s.get("url", "")),
                     transport=str(s.get("transport", McpServerConfig.transport)),
+                    command=str(s.get("command", "")),
+                    args=args,
+                    env=env,
+                    cwd=str(s.get("cwd", "")),
                     protocol_version=str(s.get("protocol_version", McpServerConfig.protocol_version)),
                     timeout_s=float(s.get("timeout_s", McpServerConfig.timeout_s)),
                     verify_tls=bool(s.get("verify_tls", McpServerConfig.verify_tls)),
                     headers=headers,
+                    max_concurrency=max(1, int(s.get("max_concurrency", McpServerConfig.max_concurrency))),
+                    cache_tools=cache_tools,
+                    max_tools=max(0, int(s.get("max_tools", McpServerConfig.max_tools))),
+                    result_budgets=result_budgets,
+                    tool_timeouts=tool_timeouts,
                     enabled=bool(s.get("enabled", McpServerConfig.enabled)),
                 )
 
+        try:
+            sync_deadline_s = max(0.0, float(mcp_data.get("sync_deadline_s", McpConfig.sync_deadline_s)))
+        except (TypeError, ValueError):
+            sync_deadline_s = McpConfig.sync_deadline_s
+        try:
+            tool_cache_ttl_s = max(0.0, float(mcp_data.get("tool_cache_ttl_s", McpConfig.tool_cache_ttl_s)))
+        except (TypeError, ValueError):
+            tool_cache_ttl_s = McpConfig.tool_cache_ttl_s
+        try:
+            schema_compaction = min(3, max(0, int(mcp_data.get("schema_compaction", McpConfig.schema_compaction))))
+        except (TypeError, ValueError):
+            schema_compaction = McpConfig.schema_compaction
+        try:
+            result_budget_chars = max(0, int(mcp_data.get("result_budget_chars", McpConfig.result_budget_chars)))
+            turn_result_budget_chars = max(
+                0, int(mcp_data.get("turn_result_budget_chars", McpConfig.turn_result_budget_chars))
+            )
+        except (TypeError, ValueError):
+            result_budget_chars = McpConfig.result_budget_chars
+            turn_result_budget_chars = McpConfig.turn_result_budget_chars
+        try:
+            tool_phase_deadline_s = max(0.0, float(mcp_data.get("tool_phase_deadline_s", McpConfig.tool_phase_deadline_s)))
+        except (TypeError, ValueError):
+            tool_phase_deadline_s = McpConfig.tool_phase_deadline_s
+        try:
+            result_cache_ttl_s = max(0.0, float(mcp_data.get("result_cache_ttl_s", McpConfig.result_cache_ttl_s)))
+            result_cache_size = max(0, int(mcp_data.get("result_cache_size", McpConfig.result_cache_size)))
+        except (TypeError, ValueError):
+            result_cache_ttl_s = McpConfig.result_cache_ttl_s
+            result_cache_size = McpConfig.result_cache_size
+
         providers: dict[str, ProviderConfig] = {}
         providers_data = data.get("providers")
         if isinstance(providers_data, dict):
@@ -194,6 +321,12 @@ class AppConfig:
             except (TypeError, ValueError):
                 return None
 
+        stream_retries = opt_int("stream_retries")
+        tool_top_k = opt_int("tool_top_k")
+        tui_max_fps = opt_int("tui_max_fps")
+        raw_pinned = chat_data.get("pinned_tools")
+        pinned_tools = [str(x) for x in raw_pinned if str(x)] if isinstance(raw_pinned, list) else []
+
         chat = ChatConfig(
             system_prompt=str(chat_data.get("system_prompt", ChatConfig.system_prompt)),
             temperature=opt_float("temperature"),
@@ -201,14 +334,28 @@ class AppConfig:
             max_completion_tokens=opt_int("max_completion_tokens"),
             max_output_tokens=opt_int("max_output_tokens"),
             stream=bool(chat_data.get("stream", ChatConfig.stream)),
+            stream_retries=ChatConfig.stream_retries if stream_retries is None else max(0, stream_retries),
             enable_tool_roll=bool(chat_data.get("enable_tool_roll", ChatConfig.enable_tool_roll)),
+            tool_top_k=ChatConfig.tool_top_k if tool_top_k is None else max(0, tool_top_k),
+            pinned_tools=pinned_tools,
+            tui_max_fps=ChatConfig.tui_max_fps if tui_max_fps is None else max(0, tui_max_fps),
         )
 
         return AppConfig(
             active_provider=active_provider,
             providers=providers,
             chat=chat,
-            mcp=McpConfig(servers=mcp_servers),
+            mcp=McpConfig(
+                servers=mcp_servers,
+                sync_deadline_s=sync_deadline_s,
+                tool_cache_ttl_s=tool_cache_ttl_s,
+                result_cache_ttl_s=result_cache_ttl_s,
+                result_cache_size=result_cache_size,
+                schema_compaction=schema_compaction,
+                result_budget_chars=result_budget_chars,
+                turn_result_budget_chars=turn_result_budget_chars,
+                tool_phase_deadline_s=tool_phase_deadline_s,
+            ),
         )
 
     def to_dict(self) -> dict[str, Any]:
@@ -1,7 +1,13 @@
 from __future__ import annotations
 
+import math
 import random
 from dataclasses import dataclass
+from functools import lru_cache
+from itertools import accumulate
+
+# Dice rolled by one expression, summed over its terms (explosions not counted).
+MAX_DICE = 1000
 
 
 class DiceSyntaxError(ValueError):
@@ -111,6 +117,19 @@ def _parse_expression(s: str) -> list[tuple[int, _IntTerm | _DiceTerm]]:
     return parts
 
 
+@lru_cache(maxsize=1024)
+def _compile(expression: str) -> tuple[tuple[int, _IntTerm | _DiceTerm], ...]:
+    # Terms are frozen, so parsed expressions can be shared across calls and threads.
+    parts = tuple(_parse_expression(expression))
+    if sum(term.count for _sign, term in parts if isinstance(term, _DiceTerm)) > MAX_DICE:
+        raise DiceSyntaxError(f"at most {MAX_DICE} dice per expression")
+    return parts
+
+
+def dice_count(expression: str) -> int:
+    return sum(term.count for _sign, term in _compile(expression) if isinstance(term, _DiceTerm))
+
+
 def _eval_dice(term: _DiceTerm, rng: random.Random) -> tuple[list[int], list[int]]:
     rolls: list[int] = []
     max_rolls = 1000
@@ -156,9 +175,10 @@ def _eval_dice(term: _DiceTerm, rng: random.Random) -> tuple[list[int], list[int
     return rolls, kept_vals
 
 
-def roll_expression(expression: str, seed: int | None = None) -> dict:
-    rng = random.Random(seed)
-    parts = _parse_expression(expression)
+def roll_expression(expression: str, seed: int | None = None, rng: random.Random | None = None) -> dict:
+    # rng, when given, is used instead of a new generator seeded with seed.
+    rng = rng or random.Random(seed)
+    parts = _compile(expression)
 
     total = 0
     term_texts: list[str] = []
@@ -210,3 +230,110 @@ def roll_expression(expression: str, seed: int | None = None) -> dict:
     text = f"{expr_clean} => {breakdown} = {total}"
 
     return {"expr": expr_clean, "total": total, "terms": details, "text": text}
+
+
+def roll_total(expression: str, rng: random.Random) -> int:
+    # roll_expression without the breakdown, for bulk rolling.
+    total = 0
+    for sign, term in _compile(expression):
+        if isinstance(term, _IntTerm):
+            total += sign * term.value
+        else:
+            total += sign * sum(_eval_dice(term, rng)[1])
+    return total
+
+
+# Exact distributions are convolved while their estimated cost (sum of
+# distribution widths, weighted by the size of the integer counts) stays
+# under this; beyond that, or with exploding/keep/drop dice, they are sampled.
+_EXACT_MAX_COST = 30_000_000
+# ...and while the number of distinct totals stays under this, so one very
+# wide die (1d3000000) is sampled rather than convolved.
+_EXACT_MAX_TOTALS = 10_000
+# Sampling stops at this many dice, whatever the requested sample count.
+_MAX_SAMPLED_DICE = 300_000
+# Beyond this many totals the pmf is summed into equal ranges of totals.
+_MAX_PMF_ROWS = 1000
+
+
+def _exact_cost(parts: tuple[tuple[int, _IntTerm | _DiceTerm], ...]) -> int | None:
+    cost = 0
+    width = 1
+    bits = 0.0
+    for _sign, term in parts:
+        if isinstance(term, _DiceTerm):
+            if term.explode or term.keep_drop is not None:
+                return None
+            faces = 3 if term.sides == "F" else int(term.sides)
+            for _ in range(term.count):
+                width += faces - 1
+                if width > _EXACT_MAX_TOTALS:
+                    return None
+                bits += math.log2(faces)
+                cost += width * (1 + int(bits) // 64)
+                if cost > _EXACT_MAX_COST:
+                    return None
+    return cost
+
+
+def _exact_pmf(parts: tuple[tuple[int, _IntTerm | _DiceTerm], ...]) -> dict[int, float] | None:
+    if _exact_cost(parts) is None:
+        return None
+
+    # Integer outcome counts over consecutive totals starting at low. Every die
+    # has consecutive faces, so adding one is a sliding-window sum: prefix sums,
+    # then the difference of each pair faces apart.
+    counts = [1]
+    low = 0
+    denom = 1
+    for sign, term in parts:
+        if isinstance(term, _IntTerm):
+            low += sign * term.value
+            continue
+        lo, faces = (-1, 3) if term.sides == "F" else (1, int(term.sides))
+        for _ in range(term.count):
+            prefix = [0, *accumulate(counts)]
+            padded = [0] * (faces - 1) + prefix + [prefix[-1]] * (faces - 1)
+            counts = [a - b for a, b in zip(padded[faces:], padded)]
+            # A negated die spans -(lo+faces-1)..-lo; uniform counts are symmetric.
+            low += sign * lo if sign > 0 else -(lo + faces - 1)
+            denom *= faces
+    return {low + i: c / denom for i, c in enumerate(counts) if c}
+
+
+def distribution(expression: str, samples: int = 100_000, seed: int | None = 0) -> dict:
+    parts = _compile(expression)
+    pmf = _exact_pmf(parts)
+    exact = pmf is not None
+    if pmf is None:
+        samples = max(1, min(samples, _MAX_SAMPLED_DICE // max(1, dice_count(expression))))
+        rng = random.Random(seed)
+        counts: dict[int, int] = {}
+        for _ in range(samples):
+            v = roll_total(expression, rng)
+            counts[v] = counts.get(v, 0) + 1
+        pmf = {v: c / samples for v, c in counts.items()}
+
+    mean = sum(v * p for v, p in pmf.items())
+    var = sum(p * (v - mean) ** 2 for v, p in pmf.items())
+    low, high = min(pmf), max(pmf)
+    # pmf keys are the lowest total of each range of bucket totals.
+    bucket = 1
+    if len(pmf) > _MAX_PMF_ROWS:
+        bucket = -(-(high - low + 1) // _MAX_PMF_ROWS)
+        ranges: dict[int, float] = {}
+        for v, p in pmf.items():
+            key = low + (v - low) // bucket * bucket
+            ranges[key] = ranges.get(key, 0.0) + p
+        pmf = ranges
+    return {
+        "expr": "".join(ch for ch in expression.strip() if not ch.isspace()),
+        "exact": exact,
+        "samples": 0 if exact else samples,
+        "min": low,
+        "max": high,
+        "mean": mean,
+        "stdev": math.sqrt(var),
+        "bucket": bucket,
+        "pmf": {v: pmf[v] for v in sorted(pmf)},
+    }
@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import http.client
+import socket
+import ssl
+import threading
+import time
+import urllib.parse
+import urllib.request
+from typing import Any, Callable
+
+# Errors that mean a kept-alive connection was closed by the peer while idle.
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+
+class PooledResponse:
+    def __init__(self, pool: "ConnectionPool", key: tuple[Any, ...], conn: Any, sock: Any, resp: Any, reused: bool):
+        self._pool = pool
+        self._key = key
+        self._conn = conn
+        # http.client drops conn.sock for Connection: close responses; keep our own handle.
+        self._sock = sock
+        self._resp = resp
+        # abort() runs on the UI thread while the worker may be closing; whoever
+        # flips this first decides where the connection goes.
+        self._lock = threading.Lock()
+        self._released = False
+
+        self.status: int = int(resp.status)
+        self.reason: str = str(resp.reason or "")
+        self.headers = resp.headers
+        self.reused = reused
+
+    def read(self, amt: int | None = None) -> bytes:
+        return self._resp.read(amt)
+
+    def readline(self) -> bytes:
+        return self._resp.readline()
+
+    def abort(self) -> None:
+        # Safe to call from another thread: unblocks a reader stuck in recv().
+        if not self._claim():
+            return
+        if self._sock is not None:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self._close_conn()
+
+    def close(self) -> None:
+        reusable = bool(self._resp.isclosed() and not self._resp.will_close)
+        if not self._claim():
+            return
+        if reusable:
+            self._pool._put_idle(self._key, self._conn)
+            return
+        self._close_conn()
+
+    def _claim(self) -> bool:
+        with self._lock:
+            if self._released:
+                return False
+            self._released = True
+            return True
+
+    def _close_conn(self) -> None:
+        try:
+            self._resp.close()
+        except Exception:
+            pass
+        try:
+            self._conn.close()
+        except Exception:
+            pass
+
+    def __enter__(self) -> "PooledResponse":
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        self.close()
+
+
+class ConnectionPool:
+    def __init__(self, max_idle_per_host: int = 8, idle_timeout_s: float = 30.0):
+        self._max_idle = max(1, int(max_idle_per_host))
+        self._idle_timeout_s = float(idle_timeout_s)
+        self._lock = threading.Lock()
+        # key -> [(conn, idle_since)]; most recently used last.
+        self._idle: dict[tuple[Any, ...], list[tuple[Any, float]]] = {}
+        self._routes: dict[tuple[Any, ...], tuple[str, int] | None] = {}
+        # Connections opened by prewarm() that no request has picked up yet.
+        self._prewarmed: set[int] = set()
+        self._stats = {
+            "requests": 0,
+            "reused": 0,
+            "opened": 0,
+            "stale": 0,
+            "prewarms": 0,
+            "prewarm_hits": 0,
+            "prewarm_wasted": 0,
+        }
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            out: dict[str, Any] = dict(self._stats)
+            out["idle"] = sum(len(v) for v in self._idle.values())
+            resolved = self._stats["prewarm_hits"] + self._stats["prewarm_wasted"]
+        out["prewarm_hit_rate"] = None if resolved == 0 else round(out["prewarm_hits"] / resolved, 3)
+        return out
+
+    def prewarm(self, url: str, timeout_s: float = 10.0, verify_tls: bool = True) -> bool:
+        # Leaves one freshly connected (DNS + TCP + TLS done) idle connection for url.
+        # Returns False if one was already warm.
+        key, _target = self._key_for(url, verify_tls)
+        now = time.monotonic()
+        refresh_after = self._idle_timeout_s / 2.0
+
+        old: list[Any] = []
+        with self._lock:
+            idle = self._idle.get(key) or []
+            fresh = [(c, t) for c, t in idle if now - t <= refresh_after]
+            if fresh:
+                return False
+            old = [c for c, _t in idle]
+            self._idle[key] = []
+        for c in old:
+            self._discard(c)
+
+        conn = self._open(key, timeout_s)
+        try:
+            conn.connect()
+        except BaseException:
+            conn.close()
+            raise
+        with self._lock:
+            self._stats["prewarms"] += 1
+            self._prewarmed.add(id(conn))
+        self._put_idle(key, conn)
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            idle = self._idle
+            self._idle = {}
+        for conns in idle.values():
+            for conn, _t in conns:
+                self._discard(conn)
+
+    def _discard(self, conn: Any) -> None:
+        with self._lock:
+            if id(conn) in self._prewarmed:
+                self._prewarmed.discard(id(conn))
+                self._stats["prewarm_wasted"] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        body: bytes | None = None,
+        headers: dict[str, str] | None = None,
+        timeout_s: float = 60.0,
+        verify_tls: bool = True,
+        on_socket: Callable[[Any], None] | None = None,
+    ) -> PooledResponse:
+        # on_socket gets the connected socket before the request is sent, so
+        # another thread can shut it down while this one waits for a response.
+        key, target = self._key_for(url, verify_tls)
+        proxied_http = key[0] == "http" and self._route(key) is not None
+        path = url if proxied_http else target
+
+        with self._lock:
+            self._stats["requests"] += 1
+
+        while True:
+            conn, reused = self._get_conn(key, timeout_s)
+            try:
+                if on_socket is not None:
+                    if conn.sock is None:
+                        conn.connect()
+                    on_socket(conn.sock)
+                conn.request(method, path, body=body, headers=dict(headers or {}))
+                sock = conn.sock
+                resp = conn.getresponse()
+            except _STALE_ERRORS:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                if reused:
+                    with self._lock:
+                        self._stats["stale"] += 1
+                    continue
+                raise
+            except BaseException:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                raise
+
+            if reused:
+                with self._lock:
+                    self._stats["reused"] += 1
+            return PooledResponse(self, key, conn, sock, resp, reused)
+
+    def _key_for(self, url: str, verify_tls: bool) -> tuple[tuple[Any, ...], str]:
+        parts = urllib.parse.urlsplit(url)
+        scheme = (parts.scheme or "http").lower()
+        if scheme not in {"http", "https"}:
+            raise ValueError(f"unsupported url scheme: {scheme}")
+        host = parts.hostname or ""
+        if not host:
+            raise ValueError(f"invalid url: {url}")
+        port = parts.port or (443 if scheme == "https" else 80)
+
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+
+        tls = bool(verify_tls) if scheme == "https" else True
+        return (scheme, host, port, tls), target
+
+    def _route(self, key: tuple[Any, ...]) -> tuple[str, int] | None:
+        with self._lock:
+            if key in self._routes:
+                return self._routes[key]
+
+        scheme, host, _port, _tls = key
+        route: tuple[str, int] | None = None
+        proxy = urllib.request.getproxies().get(scheme)
+        if proxy and not urllib.request.proxy_bypass(host):
+            p = urllib.parse.urlsplit(proxy if "://" in proxy else "http://" + proxy)
+            if p.hostname:
+                route = (p.hostname, p.port or 80)
+
+        with self._lock:
+            self._routes[key] = route
+        return route
+
+    def _open(self, key: tuple[Any, ...], timeout_s: float) -> Any:
+        scheme, host, port, verify_tls = key
+        route = self._route(key)
+
+        if scheme == "https":
+            context = ssl.create_default_context() if verify_tls else ssl._create_unverified_context()
+            if route is not None:
+                conn = http.client.HTTPSConnection(route[0], route[1], timeout=timeout_s, context=context)
+                conn.set_tunnel(host, port)
+            else:
+                conn = http.client.HTTPSConnection(host, port, timeout=timeout_s, context=context)
+        elif route is not None:
+            conn = http.client.HTTPConnection(route[0], route[1], timeout=timeout_s)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=timeout_s)
+
+        with self._lock:
+            self._stats["opened"] += 1
+        return conn
+
+    def _get_conn(self, key: tuple[Any, ...], timeout_s: float) -> tuple[Any, bool]:
+        now = time.monotonic()
+        expired: list[Any] = []
+        conn = None
+
+        with self._lock:
+            idle = self._idle.get(key) or []
+            while idle:
+                c, since = idle.pop()
+                if now - since > self._idle_timeout_s:
+                    expired.append(c)
+                    continue
+                conn = c
+                break
+
+        for c in expired:
+            self._discard(c)
+
+        if conn is None:
+            return self._open(key, timeout_s), False
+
+        with self._lock:
+            if id(conn) in self._prewarmed:
+                self._prewarmed.discard(id(conn))
+                self._stats["prewarm_hits"] += 1
+
+        conn.timeout = timeout_s
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout_s)
+        return conn, True
+
+    def _put_idle(self, key: tuple[Any, ...], conn: Any) -> None:
+        drop = None
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            idle.append((conn, time.monotonic()))
+            if len(idle) > self._max_idle:
+                drop, _t = idle.pop(0)
+        if drop is not None:
+            self._discard(drop)
+
+
+_DEFAULT_POOL = ConnectionPool()
+
+
+def default_pool() -> ConnectionPool:
+    return _DEFAULT_POOL
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from .config import McpServerConfig, default_cache_dir
+
+_CACHE_VERSION = 1
+
+# One lock per cache file, shared by every ToolCatalogCache on it, so a
+# read-modify-write from one instance cannot drop another's entries.
+_path_locks: dict[str, threading.Lock] = {}
+_path_locks_guard = threading.Lock()
+
+
+def _lock_for(path: Path) -> threading.Lock:
+    with _path_locks_guard:
+        return _path_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+def default_tool_cache_path() -> Path:
+    return default_cache_dir() / "mcp_tools.json"
+
+
+def _cache_key(server: McpServerConfig) -> str:
+    # Anything that can change what tools/list returns; headers and env are hashed, never stored.
+    material = json.dumps(
+        {
+            "url": server.url,
+            "transport": server.transport,
+            "command": [server.command, *server.args],
+            "env": server.env or {},
+            "cwd": server.cwd,
+            "protocol_version": server.protocol_version,
+            "headers": server.headers or {},
+        },
+        ensure_ascii=True,
+        sort_keys=True,
+    )
+    target = server.url or server.command
+    return f"{target}#{hashlib.sha256(material.encode('utf-8')).hexdigest()[:16]}"
+
+
+class ToolCatalogCache:
+    def __init__(self, path: Path | None = None, ttl_s: float = 86400.0):
+        self._path = path or default_tool_cache_path()
+        self._ttl_s = float(ttl_s)
+        self._lock = _lock_for(self._path)
+
+    def load(self, server: McpServerConfig) -> dict[str, Any] | None:
+        # {"tools": [...raw tools/list entries], "protocol_version": str, "fetched_at": float}
+        with self._lock:
+            entry = self._read().get(_cache_key(server))
+        if not isinstance(entry, dict) or not isinstance(entry.get("tools"), list):
+            return None
+        fetched_at = entry.get("fetched_at")
+        if not isinstance(fetched_at, (int, float)) or time.time() - fetched_at > self._ttl_s:
+            return None
+        return entry
+
+    def store(self, server: McpServerConfig, tools: list[Any], protocol_version: str) -> None:
+        entry = {"tools": tools, "protocol_version": protocol_version, "fetched_at": time.time()}
+        with self._lock:
+            entries = self._read()
+            entries[_cache_key(server)] = entry
+            self._write(entries)
+
+    def invalidate(self, server: McpServerConfig) -> None:
+        with self._lock:
+            entries = self._read()
+            if entries.pop(_cache_key(server), None) is not None:
+                self._write(entries)
+
+    def _read(self) -> dict[str, Any]:
+        try:
+            data = json.loads(self._path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != _CACHE_VERSION:
+            return {}
+        entries = data.get("entries")
+        return entries if isinstance(entries, dict) else {}
+
+    def _write(self, entries: dict[str, Any]) -> None:
+        now = time.time()
+        live = {
+            k: v
+            for k, v in entries.items()
+            if isinstance(v, dict) and isinstance(v.get("fetched_at"), (int, float)) and now - v["fetched_at"] <= self._ttl_s
+        }
+        data = json.dumps({"version": _CACHE_VERSION, "entries": live}, ensure_ascii=True)
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            # A fresh temp file per write: other caches on this path (in this
+            # process or another) may be writing at the same time.
+            fd, tmp = tempfile.mkstemp(prefix=self._path.name + ".", suffix=".tmp", dir=self._path.parent)
+        except OSError:
+            # The cache is an optimisation; a read-only home must not break syncing.
+            return
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp, self._path)
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
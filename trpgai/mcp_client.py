@@ -1,25 +1,45 @@
 from __future__ import annotations
 
+import concurrent.futures
+import copy
 import hashlib
+import http.client
+import itertools
 import json
-import queue
+import os
 import re
-import ssl
+import socket
+import subprocess
 import threading
 import time
-import urllib.error
 import urllib.parse
-import urllib.request
-from dataclasses import dataclass
-from typing import Any
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable
 
 from .config import McpServerConfig
+from .http_pool import ConnectionPool, default_pool
+from .mcp_cache import ToolCatalogCache
+from .schema_compact import compact_schema, compact_text, json_size
 
 
 class McpError(RuntimeError):
     pass
 
 
+class McpTimeout(McpError):
+    pass
+
+
+class McpCancelled(McpError):
+    pass
+
+
+class McpRpcError(McpError):
+    # The server answered with a JSON-RPC error: it is reachable, the call failed.
+    pass
+
+
 def _mcp_tool_public_name(server_name: str, tool_name: str) -> str:
     # OpenAI tool names: ^[a-zA-Z0-9_-]{1,64}$
     # MCP tool names may include '.' or '/'.
@@ -32,10 +52,12 @@ def _mcp_tool_public_name(server_name: str, tool_name: str) -> str:
     return f"{sanitized[:54]}_{h}"
 
 
-def _iter_sse_events(resp: Any) -> Any:
+def _iter_sse_events(resp: Any, on_id: Callable[[str], None] | None = None) -> Any:
     # Incremental SSE parser.
     # Yields (event_name, data_text) for each event separated by a blank line.
+    # on_id receives the event's id field just before the event is yielded.
     event_name: str | None = None
+    event_id: str | None = None
     data_lines: list[str] = []
 
     while True:
@@ -45,6 +67,9 @@ def _iter_sse_events(resp: Any) -> Any:
         line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
 
         if line == "":
+            if event_id is not None and on_id is not None:
+                on_id(event_id)
+            event_id = None
             if data_lines:
                 yield event_name, "\n".join(data_lines)
                 event_name = None
@@ -55,6 +80,12 @@ def _iter_sse_events(resp: Any) -> Any:
             event_name = line[len("event:") :].strip() or None
             continue
 
+        if line.startswith("id:"):
+            value = line[len("id:") :].strip()
+            if "\0" not in value:
+                event_id = value
+            continue
+
         if line.startswith("data:"):
             data_lines.append(line[len("data:") :].lstrip())
             continue
@@ -77,6 +108,10 @@ def _jsonrpc_is_response(msg: Any) -> bool:
     )
 
 
+def _jsonrpc_is_notification(msg: Any) -> bool:
+    return isinstance(msg, dict) and isinstance(msg.get("method"), str) and "id" not in msg
+
+
 def _jsonrpc_raise_if_error(resp: dict[str, Any]) -> None:
     err = resp.get("error")
     if not err:
@@ -84,8 +119,8 @@ def _jsonrpc_raise_if_error(resp: dict[str, Any]) -> None:
     if isinstance(err, dict):
         code = err.get("code")
         msg = err.get("message")
-        raise McpError(f"mcp error {code}: {msg}")
-    raise McpError(f"mcp error: {err}")
+        raise McpRpcError(f"mcp error {code}: {msg}")
+    raise McpRpcError(f"mcp error: {err}")
 
 
 @dataclass
@@ -95,20 +130,259 @@ class McpTool:
     public_name: str
     description: str
     input_schema: dict[str, Any]
+    annotations: dict[str, Any] = field(default_factory=dict)
+
+
+class _ResultCache:
+    # LRU + TTL cache of tools/call results, keyed by server, tool and arguments.
+    def __init__(self, ttl_s: float = 300.0, max_entries: int = 256):
+        self._ttl_s = float(ttl_s)
+        self._max = int(max_entries)
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[str, str, str], tuple[float, dict[str, Any]]] = OrderedDict()
+        self._stats: dict[str, dict[str, int]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self._ttl_s > 0 and self._max > 0
+
+    def configure(self, ttl_s: float | None = None, max_entries: int | None = None) -> None:
+        # New limits apply to cached entries too: none outlives the new TTL.
+        with self._lock:
+            if ttl_s is not None:
+                self._ttl_s = float(ttl_s)
+            if max_entries is not None:
+                self._max = int(max_entries)
+            latest = time.monotonic() + self._ttl_s
+            for k, (expires, value) in self._entries.items():
+                if expires > latest:
+                    self._entries[k] = (latest, value)
+            while len(self._entries) > max(0, self._max):
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def key(server: str, tool: str, arguments: dict[str, Any]) -> tuple[str, str, str]:
+        canonical = json.dumps(arguments, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        return server, tool, canonical
+
+    def get(self, key: tuple[str, str, str]) -> dict[str, Any] | None:
+        now = time.monotonic()
+        with self._lock:
+            st = self._stats.setdefault(key[0], {"hits": 0, "misses": 0})
+            hit = self._entries.get(key)
+            if hit is not None and hit[0] > now:
+                self._entries.move_to_end(key)
+                st["hits"] += 1
+                # Callers own what they get back; the cached entry stays intact.
+                return copy.deepcopy(hit[1])
+            if hit is not None:
+                del self._entries[key]
+            st["misses"] += 1
+            return None
+
+    def put(self, key: tuple[str, str, str], value: dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl_s, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, server: str) -> None:
+        with self._lock:
+            for k in [k for k in self._entries if k[0] == server]:
+                del self._entries[k]
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            hits = sum(v["hits"] for v in self._stats.values())
+            misses = sum(v["misses"] for v in self._stats.values())
+            per_server = {name: dict(v) for name, v in self._stats.items()}
+            entries = len(self._entries)
+        total = hits + misses
+        return {
+            "entries": entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": None if total == 0 else round(hits / total, 3),
+            "servers": per_server,
+        }
+
+
+def _await_response(
+    fut: concurrent.futures.Future[dict[str, Any]],
+    req_id: int,
+    timeout_s: float,
+    cancel: threading.Event | None = None,
+) -> dict[str, Any]:
+    # A Future cannot also wait on an Event, so with a cancel event the wait
+    # runs in short slices.
+    deadline = time.monotonic() + float(timeout_s)
+    while True:
+        if cancel is not None and cancel.is_set():
+            raise McpCancelled(f"request id={req_id} cancelled")
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise McpTimeout(f"timeout waiting for response id={req_id}")
+        try:
+            return fut.result(timeout=left if cancel is None else min(left, 0.05))
+        except concurrent.futures.TimeoutError:
+            continue
+
+
+def _cancel_request(client: Any, req_id: int, reason: str) -> None:
+    # Tells the server to stop working on a request nobody waits for anymore.
+    client.notify("notifications/cancelled", {"requestId": req_id, "reason": reason})
+
+
+def _acquire_slot(
+    slots: threading.BoundedSemaphore,
+    timeout_s: float,
+    cancel: threading.Event | None = None,
+) -> bool:
+    # Like _await_response: with a cancel event, wait for a free slot in short slices.
+    if cancel is None:
+        return slots.acquire(timeout=timeout_s)
+    deadline = time.monotonic() + float(timeout_s)
+    while True:
+        if cancel.is_set():
+            raise McpCancelled("cancelled waiting for a free server slot")
+        left = deadline - time.monotonic()
+        if left <= 0:
+            return False
+        if slots.acquire(timeout=min(left, 0.05)):
+            return True
+
+
+class _Abortable:
+    # Cuts the connection of a request running on another thread: the socket
+    # while waiting for headers, then the response while reading the body.
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._abort: Callable[[], None] | None = None
+        self._aborted = False
+
+    def watch(self, abort: Callable[[], None]) -> None:
+        with self._lock:
+            self._abort = abort
+            if not self._aborted:
+                return
+        abort()
+
+    def watch_socket(self, sock: Any) -> None:
+        def shutdown() -> None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+        self.watch(shutdown)
+
+    def abort(self) -> None:
+        with self._lock:
+            self._aborted = True
+            abort = self._abort
+        if abort is not None:
+            abort()
+
+
+class _ResponseDispatcher:
+    # Hands JSON-RPC responses read on a receiver thread to the callers waiting
+    # for them, so any number of requests can share one inbound stream.
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._pending: dict[int, concurrent.futures.Future[dict[str, Any]]] = {}
+
+    def register(self) -> tuple[int, concurrent.futures.Future[dict[str, Any]]]:
+        fut: concurrent.futures.Future[dict[str, Any]] = concurrent.futures.Future()
+        with self._lock:
+            req_id = next(self._ids)
+            self._pending[req_id] = fut
+        return req_id, fut
+
+    def discard(self, req_id: int) -> None:
+        with self._lock:
+            self._pending.pop(req_id, None)
+
+    def resolve(self, msg: dict[str, Any]) -> bool:
+        raw_id = msg.get("id")
+        try:
+            req_id = int(raw_id)
+        except (TypeError, ValueError):
+            return False
+        with self._lock:
+            fut = self._pending.pop(req_id, None)
+        if fut is None:
+            return False
+        fut.set_result(msg)
+        return True
+
+    def wait(
+        self,
+        req_id: int,
+        fut: concurrent.futures.Future[dict[str, Any]],
+        timeout_s: float,
+        cancel: threading.Event | None = None,
+    ) -> dict[str, Any]:
+        try:
+            return _await_response(fut, req_id, timeout_s, cancel)
+        finally:
+            self.discard(req_id)
+
+    def fail_all(self, error: str) -> None:
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for fut in pending:
+            fut.set_exception(McpError(error))
 
 
 class _StreamableHttpTransport:
-    def __init__(self, server: McpServerConfig):
+    def __init__(self, server: McpServerConfig, pool: ConnectionPool | None = None):
         self._server = server
+        self._pool = pool or default_pool()
+        self._lock = threading.Lock()
         self._session_id: str | None = None
-        self._next_id = 1
-
-    def call(self, method: str, params: dict[str, Any]) -> dict[str, Any]:
-        req_id = self._next_id
-        self._next_id += 1
+        self._ids = itertools.count(1)
+        self.on_notification: Callable[[dict[str, Any]], None] | None = None
+
+    def call(
+        self,
+        method: str,
+        params: dict[str, Any],
+        timeout_s: float | None = None,
+        cancel: threading.Event | None = None,
+        on_message: Callable[[dict[str, Any]], None] | None = None,
+    ) -> dict[str, Any]:
+        # on_message gets the notifications the server streams back with this
+        # request's response.
+        with self._lock:
+            req_id = next(self._ids)
 
         msg = _jsonrpc_request(method, params=params, request_id=req_id)
-        resp = self._post(msg)
+        if timeout_s is None and cancel is None:
+            resp = self._post(msg, on_message=on_message)
+        else:
+            # The POST blocks until the server answers; wait for it on a side
+            # thread so a timeout or cancel can return right away.
+            fut: concurrent.futures.Future[dict[str, Any]] = concurrent.futures.Future()
+            abortable = _Abortable()
+
+            def post() -> None:
+                try:
+                    fut.set_result(self._post(msg, on_message=on_message, abortable=abortable))
+                except BaseException as e:
+                    fut.set_exception(e)
+
+            threading.Thread(target=post, daemon=True).start()
+            try:
+                resp = _await_response(fut, req_id, float(self._server.timeout_s if timeout_s is None else timeout_s), cancel)
+            except (McpTimeout, McpCancelled) as e:
+                _cancel_request(self, req_id, str(e))
+                # Nobody reads the answer now; free the connection instead of
+                # leaving it busy until the server-wide timeout.
+                abortable.abort()
+                raise
         if not _jsonrpc_is_response(resp):
             raise McpError("invalid json-rpc response")
 
@@ -132,35 +406,68 @@ class _StreamableHttpTransport:
         except Exception:
             pass
 
-    def _post(self, payload: dict[str, Any], expect_response: bool = True) -> dict[str, Any]:
+    def close(self) -> None:
+        # Ends the server-side session; best effort.
+        with self._lock:
+            sid = self._session_id
+            self._session_id = None
+        if not sid:
+            return
+        headers = {"MCP-Session-Id": sid, "MCP-Protocol-Version": self._server.protocol_version}
+        headers.update(self._server.headers or {})
+        try:
+            with self._pool.request(
+                "DELETE",
+                self._server.url,
+                headers=headers,
+                timeout_s=min(5.0, float(self._server.timeout_s)),
+                verify_tls=self._server.verify_tls,
+            ) as resp:
+                resp.read()
+        except (OSError, http.client.HTTPException, ValueError):
+            pass
+
+    def _post(
+        self,
+        payload: dict[str, Any],
+        expect_response: bool = True,
+        on_message: Callable[[dict[str, Any]], None] | None = None,
+        abortable: _Abortable | None = None,
+    ) -> dict[str, Any]:
         url = self._server.url
         headers = {
             "Content-Type": "application/json",
             "Accept": "application/json, text/event-stream",
             "MCP-Protocol-Version": self._server.protocol_version,
         }
-        if self._session_id:
-            headers["MCP-Session-Id"] = self._session_id
+        with self._lock:
+            if self._session_id:
+                headers["MCP-Session-Id"] = self._session_id
         headers.update(self._server.headers or {})
 
-        req = urllib.request.Request(
-            url,
-            data=json.dumps(payload).encode("utf-8"),
-            headers=headers,
-            method="POST",
-        )
-
-        context = None
-        if not self._server.verify_tls:
-            context = ssl._create_unverified_context()
-
         try:
-            with urllib.request.urlopen(req, timeout=float(self._server.timeout_s), context=context) as resp:
+            with self._pool.request(
+                "POST",
+                url,
+                body=json.dumps(payload).encode("utf-8"),
+                headers=headers,
+                timeout_s=float(self._server.timeout_s),
+                verify_tls=self._server.verify_tls,
+                on_socket=None if abortable is None else abortable.watch_socket,
+            ) as resp:
+                if abortable is not None:
+                    abortable.watch(resp.abort)
+                if resp.status >= 400:
+                    raw = resp.read().decode("utf-8", errors="replace")
+                    raise McpError(f"http {resp.status}: {raw}")
+
                 sid = resp.headers.get("MCP-Session-Id")
                 if sid:
-                    self._session_id = str(sid)
+                    with self._lock:
+                        self._session_id = str(sid)
 
                 if not expect_response:
+                    resp.read()
                     return {}
 
                 ctype = resp.headers.get("Content-Type") or ""
@@ -175,13 +482,16 @@ class _StreamableHttpTransport:
                             continue
                         if _jsonrpc_is_response(msg):
                             return msg
+                        if not _jsonrpc_is_notification(msg):
+                            continue
+                        if on_message is not None:
+                            on_message(msg)
+                        elif self.on_notification is not None:
+                            self.on_notification(msg)
                     raise McpError("stream ended without json-rpc response")
 
                 raw = resp.read().decode("utf-8", errors="replace")
-        except urllib.error.HTTPError as e:
-            raw = e.read().decode("utf-8", errors="replace")
-            raise McpError(f"http {e.code}: {raw}") from None
-        except urllib.error.URLError as e:
+        except (OSError, http.client.HTTPException, ValueError) as e:
             raise McpError(f"network error: {e}") from None
 
         try:
@@ -195,50 +505,83 @@ class _StreamableHttpTransport:
 
 
 class _LegacySseTransport:
-    def __init__(self, server: McpServerConfig):
+    _RECONNECT_BASE_S = 0.5
+    _RECONNECT_MAX_S = 30.0
+
+    def __init__(self, server: McpServerConfig, pool: ConnectionPool | None = None):
         self._server = server
-        self._next_id = 1
+        self._pool = pool or default_pool()
+        self._dispatcher = _ResponseDispatcher()
 
         self._session_id: str | None = None
         self._post_url: str | None = None
+        # Set once the endpoint event arrived (or the receiver gave up).
+        self._endpoint_ready = threading.Event()
+
+        # Event stream state, kept across reconnects.
+        self._connected = threading.Event()
+        self._last_event_id: str | None = None
+        self._reconnects = 0
+        self._down_since: float | None = None
+        self._downtime_s = 0.0
 
         self._stop = threading.Event()
-        self._inbox: "queue.Queue[dict[str, Any]]" = queue.Queue()
         self._thread: threading.Thread | None = None
+        self._sse_resp: Any = None
+        self.on_notification: Callable[[dict[str, Any]], None] | None = None
 
         self._start_receiver()
 
     def close(self) -> None:
         self._stop.set()
+        # Unblocks the receiver thread stuck reading the event stream.
+        resp = self._sse_resp
+        if resp is not None:
+            resp.abort()
+
+    def stream_stats(self) -> dict[str, Any]:
+        down_since = self._down_since
+        downtime = self._downtime_s
+        if down_since is not None:
+            downtime += time.monotonic() - down_since
+        return {
+            "connected": self._connected.is_set(),
+            "reconnects": self._reconnects,
+            "downtime_s": round(downtime, 3),
+            "last_event_id": self._last_event_id,
+        }
 
-    def call(self, method: str, params: dict[str, Any]) -> dict[str, Any]:
-        req_id = self._next_id
-        self._next_id += 1
-
+    def call(
+        self,
+        method: str,
+        params: dict[str, Any],
+        timeout_s: float | None = None,
+        cancel: threading.Event | None = None,
+        on_message: Callable[[dict[str, Any]], None] | None = None,
+    ) -> dict[str, Any]:
+        # Notifications arrive on the shared event stream with no tie to a
+        # request, so on_message is unused; progress goes by progressToken.
+        # Register before checking the stream: a disconnect after this point
+        # fails the call through fail_all() instead of leaving it to time out.
+        req_id, fut = self._dispatcher.register()
         msg = _jsonrpc_request(method, params=params, request_id=req_id)
-        self._post(msg)
-
-        deadline = time.time() + float(self._server.timeout_s)
-        while time.time() < deadline:
-            try:
-                incoming = self._inbox.get(timeout=0.1)
-            except queue.Empty:
-                continue
-
-            if _jsonrpc_is_response(incoming):
-                incoming_id = incoming.get("id")
-                if incoming_id is None:
-                    continue
-                try:
-                    incoming_id_i = int(incoming_id)
-                except (TypeError, ValueError):
-                    continue
-
-                if incoming_id_i == req_id:
-                    _jsonrpc_raise_if_error(incoming)
-                    return incoming
+        try:
+            if self._post_url and not self._connected.wait(timeout=float(self._server.timeout_s)):
+                raise McpError("legacy sse: event stream down")
+            self._post(msg)
+        except BaseException:
+            self._dispatcher.discard(req_id)
+            raise
 
-        raise McpError(f"timeout waiting for response id={req_id}")
+        try:
+            resp = self._dispatcher.wait(
+                req_id, fut, float(self._server.timeout_s if timeout_s is None else timeout_s), cancel
+            )
+        except (McpTimeout, McpCancelled) as e:
+            _cancel_request(self, req_id, str(e))
+            raise
+        _jsonrpc_raise_if_error(resp)
+        return resp
 
     def notify(self, method: str, params: dict[str, Any]) -> None:
         msg = _jsonrpc_notification(method, params=params)
@@ -259,41 +602,80 @@ class _LegacySseTransport:
         self._thread = t
 
         # Wait briefly for endpoint discovery so calls can proceed.
-        deadline = time.time() + 5.0
-        while self._post_url is None and time.time() < deadline:
-            time.sleep(0.05)
+        self._endpoint_ready.wait(timeout=5.0)
 
     def _receiver_loop(self) -> None:
         url = self._sse_url()
+        attempt = 0
+        try:
+            while not self._stop.is_set():
+                established = self._read_stream(url)
+                if self._post_url is None or self._stop.is_set():
+                    # Never got an endpoint: nothing to resume.
+                    return
+
+                if self._connected.is_set():
+                    self._connected.clear()
+                    self._down_since = time.monotonic()
+                # Responses for calls already posted went out on the dropped stream.
+                self._dispatcher.fail_all("legacy sse: event stream disconnected")
+
+                attempt = 1 if established else attempt + 1
+                delay = min(self._RECONNECT_MAX_S, self._RECONNECT_BASE_S * (2 ** (attempt - 1)))
+                if self._stop.wait(delay):
+                    return
+                self._reconnects += 1
+        finally:
+            self._connected.clear()
+            self._endpoint_ready.set()
+            self._dispatcher.fail_all("legacy sse: transport closed")
+
+    def _read_stream(self, url: str) -> bool:
+        # Reads one event stream until it ends; returns whether it was established.
         headers = {
             "Accept": "text/event-stream",
             "Cache-Control": "no-cache",
             "MCP-Protocol-Version": self._server.protocol_version,
         }
-        if self._session_id:
-            headers["MCP-Session-Id"] = self._session_id
+        sid = self._session_id
+        if sid:
+            headers["MCP-Session-Id"] = sid
+        if self._last_event_id is not None:
+            headers["Last-Event-ID"] = self._last_event_id
         headers.update(self._server.headers or {})
 
-        req = urllib.request.Request(url, headers=headers, method="GET")
-        context = None
-        if not self._server.verify_tls:
-            context = ssl._create_unverified_context()
-
+        established = False
         try:
-            with urllib.request.urlopen(req, timeout=float(self._server.timeout_s), context=context) as resp:
+            with self._pool.request(
+                "GET",
+                url,
+                headers=headers,
+                timeout_s=float(self._server.timeout_s),
+                verify_tls=self._server.verify_tls,
+            ) as resp:
+                self._sse_resp = resp
+                if self._stop.is_set() or resp.status >= 400:
+                    resp.abort()
+                    return False
+
+                established = True
                 sid = resp.headers.get("MCP-Session-Id")
                 if sid:
                     self._session_id = str(sid)
+                if self._post_url is not None:
+                    self._mark_connected()
 
-                for ev_name, data in _iter_sse_events(resp):
+                for ev_name, data in _iter_sse_events(resp, on_id=self._set_last_event_id):
                     if self._stop.is_set():
                         break
 
-                    if ev_name == "endpoint" and self._post_url is None:
+                    if ev_name == "endpoint":
                         ep = data.strip()
                         if ep:
                             # Server may send relative or absolute.
                             self._post_url = urllib.parse.urljoin(url + "/", ep)
+                            self._mark_connected()
+                            self._endpoint_ready.set()
                         continue
 
                     if not data.strip():
@@ -302,11 +684,24 @@ class _LegacySseTransport:
                         msg = json.loads(data)
                     except json.JSONDecodeError:
                         continue
-                    if isinstance(msg, dict):
-                        self._inbox.put(msg)
-
+                    if _jsonrpc_is_notification(msg):
+                        if self.on_notification is not None:
+                            self.on_notification(msg)
+                        continue
+                    if _jsonrpc_is_response(msg):
+                        self._dispatcher.resolve(msg)
         except Exception:
-            return
+            pass
+        return established
+
+    def _set_last_event_id(self, event_id: str) -> None:
+        self._last_event_id = event_id
+
+    def _mark_connected(self) -> None:
+        if self._down_since is not None:
+            self._downtime_s += time.monotonic() - self._down_since
+            self._down_since = None
+        self._connected.set()
 
     def _post(self, payload: dict[str, Any]) -> None:
         if not self._post_url:
@@ -317,205 +712,858 @@ class _LegacySseTransport:
             "Accept": "application/json",
             "MCP-Protocol-Version": self._server.protocol_version,
         }
-        if self._session_id:
-            headers["MCP-Session-Id"] = self._session_id
+        sid = self._session_id
+        if sid:
+            headers["MCP-Session-Id"] = sid
         headers.update(self._server.headers or {})
 
-        req = urllib.request.Request(
-            self._post_url,
-            data=json.dumps(payload).encode("utf-8"),
-            headers=headers,
-            method="POST",
-        )
-
-        context = None
-        if not self._server.verify_tls:
-            context = ssl._create_unverified_context()
-
         try:
-            with urllib.request.urlopen(req, timeout=float(self._server.timeout_s), context=context) as resp:
+            with self._pool.request(
+                "POST",
+                self._post_url,
+                body=json.dumps(payload).encode("utf-8"),
+                headers=headers,
+                timeout_s=float(self._server.timeout_s),
+                verify_tls=self._server.verify_tls,
+            ) as resp:
+                raw = resp.read()
+                if resp.status >= 400:
+                    raise McpError(f"http {resp.status}: {raw.decode('utf-8', errors='replace')}")
                 sid = resp.headers.get("MCP-Session-Id")
                 if sid:
                     self._session_id = str(sid)
-                _ = resp.read()
-        except urllib.error.HTTPError as e:
-            raw = e.read().decode("utf-8", errors="replace")
-            raise McpError(f"http {e.code}: {raw}") from None
-        except urllib.error.URLError as e:
+        except (OSError, http.client.HTTPException, ValueError) as e:
             raise McpError(f"network error: {e}") from None
 
 
+class _StdioTransport:
+    # Local server as a child process speaking newline-delimited JSON-RPC over
+    # stdin/stdout. Requests are multiplexed by id, so calls may overlap. A child
+    # that exits is restarted on the next call, replaying initialize first.
+    # Each child gets its own dispatcher so a dying one only fails its own calls.
+    def __init__(self, server: McpServerConfig):
+        self._server = server
+        # Guards process (re)start; held while initialize is replayed.
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._proc: subprocess.Popen[bytes] | None = None
+        self._dispatcher = _ResponseDispatcher()
+        self._init_params: dict[str, Any] | None = None
+        self._starts = 0
+        self._stderr_tail: deque[str] = deque(maxlen=5)
+        self._closed = False
+        self.on_notification: Callable[[dict[str, Any]], None] | None = None
+
+    def call(
+        self,
+        method: str,
+        params: dict[str, Any],
+        timeout_s: float | None = None,
+        cancel: threading.Event | None = None,
+        on_message: Callable[[dict[str, Any]], None] | None = None,
+    ) -> dict[str, Any]:
+        # As with legacy SSE, notifications are not tied to a request here.
+        if method == "initialize":
+            self._init_params = params
+        proc, dispatcher = self._ensure_process()
+        return self._request(proc, dispatcher, method, params, timeout_s, cancel)
+
+    def notify(self, method: str, params: dict[str, Any]) -> None:
+        try:
+            proc, _dispatcher = self._ensure_process()
+            self._write(proc, _jsonrpc_notification(method, params=params))
+        except McpError:
+            pass
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            proc = self._proc
+            dispatcher = self._dispatcher
+            self._proc = None
+        if proc is not None:
+            self._stop_process(proc)
+        dispatcher.fail_all("stdio: transport closed")
+
+    def process_stats(self) -> dict[str, Any]:
+        proc = self._proc
+        running = proc is not None and proc.poll() is None
+        return {
+            "pid": proc.pid if running else None,
+            "running": running,
+            "restarts": max(0, self._starts - 1),
+        }
+
+    def _request(
+        self,
+        proc: subprocess.Popen[bytes],
+        dispatcher: _ResponseDispatcher,
+        method: str,
+        params: dict[str, Any],
+        timeout_s: float | None = None,
+        cancel: threading.Event | None = None,
+    ) -> dict[str, Any]:
+        req_id, fut = dispatcher.register()
+        try:
+            self._write(proc, _jsonrpc_request(method, params=params, request_id=req_id))
+        except BaseException:
+            dispatcher.discard(req_id)
+            raise
+        try:
+            resp = dispatcher.wait(req_id, fut, float(self._server.timeout_s if timeout_s is None else timeout_s), cancel)
+        except (McpTimeout, McpCancelled) as e:
+            try:
+                self._write(proc, _jsonrpc_notification("notifications/cancelled", {"requestId": req_id, "reason": str(e)}))
+            except McpError:
+                pass
+            raise
+        _jsonrpc_raise_if_error(resp)
+        return resp
+
+    def _ensure_process(self) -> tuple[subprocess.Popen[bytes], _ResponseDispatcher]:
+        with self._lock:
+            if self._closed:
+                raise McpError("stdio: transport closed")
+            proc = self._proc
+            if proc is not None and proc.poll() is None:
+                return proc, self._dispatcher
+
+            dispatcher = _ResponseDispatcher()
+            proc = self._spawn(dispatcher)
+            self._proc = proc
+            self._dispatcher = dispatcher
+            self._starts += 1
+            if self._starts > 1 and self._init_params is not None:
+                # The new child knows nothing of the old session.
+                try:
+                    self._request(proc, dispatcher, "initialize", self._init_params)
+                    self._write(proc, _jsonrpc_notification("initialized", params={}))
+                except McpError as e:
+                    raise McpError(f"stdio: restart failed: {e}") from None
+            return proc, dispatcher
+
+    def _spawn(self, dispatcher: _ResponseDispatcher) -> subprocess.Popen[bytes]:
+        cfg = self._server
+        env = None
+        if cfg.env:
+            env = dict(os.environ)
+            env.update(cfg.env)
+        try:
+            proc = subprocess.Popen(
+                [cfg.command, *cfg.args],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=cfg.cwd or None,
+                env=env,
+            )
+        except (OSError, ValueError) as e:
+            raise McpError(f"stdio: cannot start {cfg.command}: {e}") from None
+        threading.Thread(target=self._reader_loop, args=(proc, dispatcher), daemon=True).start()
+        threading.Thread(target=self._stderr_loop, args=(proc,), daemon=True).start()
+        return proc
+
+    def _write(self, proc: subprocess.Popen[bytes], msg: dict[str, Any]) -> None:
+        line = json.dumps(msg, ensure_ascii=False, separators=(",", ":")) + "\n"
+        stdin = proc.stdin
+        if stdin is None:
+            raise McpError("stdio: no pipe to server")
+        with self._write_lock:
+            try:
+                stdin.write(line.encode("utf-8"))
+                stdin.flush()
+            except (OSError, ValueError):
+                raise McpError(f"stdio: server exited{self._exit_detail(proc)}") from None
+
+    def _reader_loop(self, proc: subprocess.Popen[bytes], dispatcher: _ResponseDispatcher) -> None:
+        stdout = proc.stdout
+        try:
+            while stdout is not None:
+                line = stdout.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    msg = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+                if not isinstance(msg, dict):
+                    continue
+                if _jsonrpc_is_response(msg):
+                    dispatcher.resolve(msg)
+                elif "id" in msg and isinstance(msg.get("method"), str):
+                    self._answer_server_request(proc, msg)
+                elif _jsonrpc_is_notification(msg) and self.on_notification is not None:
+                    self.on_notification(msg)
+        except (OSError, ValueError):
+            pass
+        try:
+            proc.wait(timeout=5.0)
+        except subprocess.TimeoutExpired:
+            pass
+        # Calls waiting on this child will never get an answer.
+        dispatcher.fail_all(f"stdio: server exited{self._exit_detail(proc)}")
+
+    def _answer_server_request(self, proc: subprocess.Popen[bytes], msg: dict[str, Any]) -> None:
+        # The client advertises no capabilities beyond answering ping.
+        if msg.get("method") == "ping":
+            reply: dict[str, Any] = {"jsonrpc": "2.0", "id": msg["id"], "result": {}}
+        else:
+            reply = {"jsonrpc": "2.0", "id": msg["id"], "error": {"code": -32601, "message": "method not found"}}
+        try:
+            self._write(proc, reply)
+        except McpError:
+            pass
+
+    def _stderr_loop(self, proc: subprocess.Popen[bytes]) -> None:
+        # Drained so a chatty server never blocks on a full pipe.
+        stderr = proc.stderr
+        if stderr is None:
+            return
+        try:
+            for line in iter(stderr.readline, b""):
+                text = line.decode("utf-8", errors="replace").strip()
+                if text:
+                    self._stderr_tail.append(text)
+        except (OSError, ValueError):
+            pass
+
+    def _exit_detail(self, proc: subprocess.Popen[bytes]) -> str:
+        rc = proc.poll()
+        detail = f" (code {rc})" if rc is not None else ""
+        if self._stderr_tail:
+            detail += f": {self._stderr_tail[-1]}"
+        return detail
+
+    @staticmethod
+    def _stop_process(proc: subprocess.Popen[bytes]) -> None:
+        # EOF on stdin is the polite shutdown; escalate if it is ignored.
+        try:
+            if proc.stdin is not None:
+                proc.stdin.close()
+        except OSError:
+            pass
+        for stop in (None, proc.terminate, proc.kill):
+            if stop is not None:
+                try:
+                    stop()
+                except OSError:
+                    pass
+            try:
+                proc.wait(timeout=2.0)
+                return
+            except subprocess.TimeoutExpired:
+                continue
+
+
+def _transport_name(cfg: McpServerConfig) -> str:
+    transport = (cfg.transport or "auto").lower().strip()
+    if transport == "auto" and cfg.command and not cfg.url:
+        return "stdio"
+    return transport
+
+
+def _is_configured(cfg: McpServerConfig) -> bool:
+    if _transport_name(cfg) == "stdio":
+        return bool(cfg.command)
+    return bool(cfg.url)
+
+
+def _new_runtime(cfg: McpServerConfig) -> dict[str, Any]:
+    return {
+        "enabled": bool(cfg.enabled),
+        "initialized": False,
+        "syncing": False,
+        "tool_count": None,
+        "last_error": None,
+        "last_sync": None,
+        "sync_ms": None,
+        "cached_at": None,
+        "truncated": False,
+    }
+
+
+def _tools_from_list(
+    server_name: str,
+    raw_tools: list[Any],
+    schemas: dict[str, dict[str, Any]] | None = None,
+) -> list[McpTool]:
+    # schemas, when given, interns identical inputSchema documents so large
+    # catalogs hold one copy of each distinct schema.
+    tools: list[McpTool] = []
+    for t in raw_tools:
+        if not isinstance(t, dict):
+            continue
+        mcp_name = t.get("name")
+        if not isinstance(mcp_name, str) or not mcp_name:
+            continue
+        desc = t.get("description")
+        desc_s = str(desc) if desc is not None else ""
+        schema = t.get("inputSchema")
+        if not isinstance(schema, dict):
+            schema = {"type": "object", "properties": {}}
+        if schemas is not None:
+            digest = hashlib.sha1(
+                json.dumps(schema, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+            ).hexdigest()
+            schema = schemas.setdefault(digest, schema)
+        annotations = t.get("annotations")
+
+        tools.append(
+            McpTool(
+                server=server_name,
+                mcp_name=mcp_name,
+                public_name=_mcp_tool_public_name(server_name, mcp_name),
+                description=desc_s,
+                input_schema=schema,
+                annotations=annotations if isinstance(annotations, dict) else {},
+            )
+        )
+    return tools
+
+
+class _Breaker:
+    # closed -> open on failure; open -> half_open once the cooldown passes, which
+    # admits a single probe; the probe closes it again or reopens it with the
+    # cooldown doubled. Callers hold McpManager's lock.
+    def __init__(self, base_cooldown_s: float = 5.0, max_cooldown_s: float = 300.0):
+        self._base = float(base_cooldown_s)
+        self._max = float(max_cooldown_s)
+        self.state = "closed"
+        self.failures = 0
+        self.open_until = 0.0
+        self._probing = False
+
+    def allow(self, now: float) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if now < self.open_until:
+                return False
+            self.state = "half_open"
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def force_probe(self) -> None:
+        if self.state != "closed":
+            self.state = "half_open"
+            self._probing = True
+
+    def release_probe(self) -> None:
+        # The probe was abandoned (e.g. cancelled by the user) without a verdict.
+        self._probing = False
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self.open_until = 0.0
+        self._probing = False
+
+    def record_failure(self, now: float) -> None:
+        self.failures += 1
+        self._probing = False
+        self.state = "open"
+        self.open_until = now + min(self._max, self._base * (2 ** (self.failures - 1)))
+
+    def snapshot(self, now: float) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_in_s": round(max(0.0, self.open_until - now), 1) if self.state == "open" else None,
+        }
+
+
 class McpManager:
-    def __init__(self, servers: dict[str, McpServerConfig]):
+    def __init__(
+        self,
+        servers: dict[str, McpServerConfig],
+        pool: ConnectionPool | None = None,
+        sync_deadline_s: float = 15.0,
+        cache: ToolCatalogCache | None = None,
+        result_cache_ttl_s: float = 0.0,
+        result_cache_size: int = 256,
+        schema_compaction: int = 0,
+    ):
         # Keep disabled servers too; UI needs to display them.
         self._servers = dict(servers)
+        self._pool = pool or default_pool()
+        self._sync_deadline_s = float(sync_deadline_s)
+        self._cache = cache
+        self._results = _ResultCache(ttl_s=result_cache_ttl_s, max_entries=result_cache_size)
+        self._compaction = int(schema_compaction)
+        # public name -> (source tool, level, function definition, size stats)
+        self._definitions: dict[str, tuple[McpTool, int, dict[str, Any], dict[str, int]]] = {}
+
+        # Guards every registry below; handshakes run on per-server threads.
+        self._cond = threading.Condition(threading.RLock())
         self._clients: dict[str, Any] = {}
         self._tools: list[McpTool] = []
         self._public_to_tool: dict[str, McpTool] = {}
         self._runtime: dict[str, dict[str, Any]] = {}
+        self._inflight: dict[str, threading.Event] = {}
+        self._breakers: dict[str, _Breaker] = {}
+        # Bounds concurrent tool calls per server (McpServerConfig.max_concurrency).
+        self._slots: dict[str, threading.BoundedSemaphore] = {}
+        # Servers whose tools changed while a sync was already running.
+        self._resync: set[str] = set()
+        # progressToken -> listener of the tools/call that sent it.
+        self._progress: dict[str, Callable[[dict[str, Any]], None]] = {}
+        self._progress_ids = itertools.count(1)
+        self._started = False
 
         for name, cfg in self._servers.items():
-            self._runtime[name] = {
-                "enabled": bool(cfg.enabled),
-                "initialized": False,
-                "tool_count": None,
-                "last_error": None,
-                "last_sync": None,
-            }
+            self._runtime[name] = _new_runtime(cfg)
+            self._load_cached_locked(name, cfg)
+
+    def reconfigure(
+        self,
+        servers: dict[str, McpServerConfig],
+        sync_deadline_s: float | None = None,
+        cache: ToolCatalogCache | None = None,
+        schema_compaction: int | None = None,
+        result_cache_ttl_s: float | None = None,
+        result_cache_size: int | None = None,
+    ) -> None:
+        # Sessions of servers whose settings are unchanged are kept as they are;
+        # removed or changed servers are closed, added or changed ones resynced.
+        closing: list[Any] = []
+        resync: list[str] = []
+        with self._cond:
+            if sync_deadline_s is not None:
+                self._sync_deadline_s = float(sync_deadline_s)
+            if schema_compaction is not None:
+                self._compaction = int(schema_compaction)
+            self._results.configure(result_cache_ttl_s, result_cache_size)
+            self._cache = cache
+
+            old = self._servers
+            merged: dict[str, McpServerConfig] = {}
+            for name, cfg in servers.items():
+                prev = old.get(name)
+                if prev is not None and prev == cfg:
+                    # Keep the old object: in-flight syncs compare by identity.
+                    merged[name] = prev
+                    continue
+                merged[name] = cfg
+                if prev is not None:
+                    closing.extend(self._forget_locked(name))
+                self._runtime[name] = _new_runtime(cfg)
+                self._load_cached_locked(name, cfg)
+                if cfg.enabled and _is_configured(cfg):
+                    resync.append(name)
+
+            for name in old:
+                if name not in servers:
+                    closing.extend(self._forget_locked(name))
+                    self._runtime.pop(name, None)
+
+            self._servers = merged
+            started = self._started
+
+        for client in closing:
+            threading.Thread(target=client.close, daemon=True).start()
+        if started:
+            for name in resync:
+                self.refresh_tools(server_name=name, deadline_s=0)
+
+    def close(self) -> None:
+        with self._cond:
+            closing: list[Any] = []
+            for name in list(self._servers):
+                closing.extend(self._forget_locked(name))
+        for client in closing:
+            client.close()
+
+    def _forget_locked(self, name: str) -> list[Any]:
+        # Drops every trace of a server's session; returns the client to close.
+        self._drop_server_tools_locked(name)
+        self._results.invalidate(name)
+        self._breakers.pop(name, None)
+        self._slots.pop(name, None)
+        self._inflight.pop(name, None)
+        self._resync.discard(name)
+        client = self._clients.pop(name, None)
+        return [] if client is None else [client]
 
     def has_servers(self) -> bool:
         for cfg in self._servers.values():
-            if cfg.enabled and cfg.url:
+            if cfg.enabled and _is_configured(cfg):
                 return True
         return False
 
+    def prewarm(self) -> dict[str, bool]:
+        # name -> whether a new connection was opened.
+        out: dict[str, bool] = {}
+        for name, cfg in self._servers.items():
+            if not cfg.enabled or not cfg.url or _transport_name(cfg) == "stdio":
+                continue
+            url = cfg.url
+            with self._cond:
+                client = self._clients.get(name)
+            if isinstance(client, _LegacySseTransport):
+                if not client._post_url:
+                    continue
+                url = client._post_url
+            elif _transport_name(cfg) == "legacy_sse":
+                continue
+            try:
+                out[name] = self._pool.prewarm(url, timeout_s=min(10.0, float(cfg.timeout_s)), verify_tls=cfg.verify_tls)
+            except (OSError, ValueError):
+                out[name] = False
+        return out
+
     def status(self) -> dict[str, dict[str, Any]]:
         # name -> runtime snapshot
         out: dict[str, dict[str, Any]] = {}
-        for name, cfg in self._servers.items():
-            rt = dict(self._runtime.get(name) or {})
-            rt["enabled"] = bool(cfg.enabled)
-            rt["url"] = cfg.url
-            rt["transport"] = cfg.transport
-            out[name] = rt
+        now = time.monotonic()
+        with self._cond:
+            for name, cfg in self._servers.items():
+                rt = dict(self._runtime.get(name) or {})
+                rt["breaker"] = self._breaker_locked(name).snapshot(now)
+                client = self._clients.get(name)
+                if isinstance(client, _LegacySseTransport):
+                    rt["stream"] = client.stream_stats()
+                elif isinstance(client, _StdioTransport):
+                    rt["process"] = client.process_stats()
+                rt["enabled"] = bool(cfg.enabled)
+                rt["url"] = cfg.url
+                rt["transport"] = cfg.transport
+                out[name] = rt
         return out
 
-    def refresh_tools(self, server_name: str | None = None) -> None:
-        tools: list[McpTool] = []
-        public_to_tool: dict[str, McpTool] = {}
-
+    def refresh_tools(
+        self,
+        server_name: str | None = None,
+        deadline_s: float | None = None,
+        wait_all: bool = True,
+        force: bool = False,
+    ) -> None:
+        # Handshakes run concurrently; each server's tools are merged into the
+        # registry as soon as it answers. Returns when every target finished, the
+        # deadline passed, or (wait_all=False) the first server delivered tools.
+        # Servers still pending at the deadline keep syncing in the background.
+        # Servers with an open circuit are skipped unless force is set.
         if server_name is None:
             target_names: list[str] = list(self._servers.keys())
         else:
             target_names = [server_name]
 
-        for name in target_names:
-            cfg = self._servers.get(name)
-            if cfg is None:
-                continue
+        waits: list[threading.Event] = []
+        with self._cond:
+            for name in target_names:
+                cfg = self._servers.get(name)
+                if cfg is None:
+                    continue
 
-            # Keep runtime in sync with current config.
-            if name not in self._runtime:
-                self._runtime[name] = {
-                    "enabled": bool(cfg.enabled),
-                    "initialized": False,
-                    "tool_count": None,
-                    "last_error": None,
-                    "last_sync": None,
-                }
-            self._runtime[name]["enabled"] = bool(cfg.enabled)
-
-            if not cfg.enabled:
-                self._runtime[name]["initialized"] = False
-                continue
+                rt = self._runtime.setdefault(name, _new_runtime(cfg))
+                rt["enabled"] = bool(cfg.enabled)
 
-            if not cfg.url:
-                self._runtime[name]["initialized"] = False
-                self._runtime[name]["last_error"] = "missing url"
-                continue
+                if not cfg.enabled or not _is_configured(cfg):
+                    rt["initialized"] = False
+                    if cfg.enabled:
+                        rt["last_error"] = "missing command" if _transport_name(cfg) == "stdio" else "missing url"
+                    self._drop_server_tools_locked(name)
+                    continue
 
-            client = self._clients.get(name)
-            if client is None:
-                client = self._make_client(cfg)
-                self._clients[name] = client
+                ev = self._inflight.get(name)
+                if ev is None:
+                    breaker = self._breaker_locked(name)
+                    if force:
+                        breaker.force_probe()
+                    elif not breaker.allow(time.monotonic()):
+                        continue
+                    ev = threading.Event()
+                    self._inflight[name] = ev
+                    rt["syncing"] = True
+                    threading.Thread(target=self._sync_worker, args=(name, cfg, ev), daemon=True).start()
+                waits.append(ev)
+
+            if server_name is None:
+                # Forget tools of servers that were removed from the config.
+                stale = {t.server for t in self._tools} - set(self._servers)
+                for name in stale:
+                    self._drop_server_tools_locked(name)
+
+            limit = self._sync_deadline_s if deadline_s is None else float(deadline_s)
+            deadline = time.monotonic() + max(0.0, limit)
+            ready_before = {t.server for t in self._tools}
+            while waits:
+                if all(ev.is_set() for ev in waits):
+                    break
+                if not wait_all and ({t.server for t in self._tools} - ready_before):
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(timeout=remaining)
+
+    def _sync_worker(self, name: str, cfg: McpServerConfig, done: threading.Event) -> None:
+        start = time.monotonic()
+        tools: list[McpTool] | None = None
+        error: str | None = None
+        truncated = False
+
+        def on_page(page: list[McpTool]) -> None:
+            with self._cond:
+                if self._servers.get(name) is cfg:
+                    self._merge_server_tools_locked(name, page)
+                    self._cond.notify_all()
 
-            # Initialize handshake.
-            init_params = {
-                "protocolVersion": cfg.protocol_version,
-                "clientInfo": {"name": "trpgai", "version": "0.1"},
-                "capabilities": {"tools": {}},
-            }
+        try:
+            raw_tools, tools, protocol_version, truncated = self._handshake(name, cfg, on_page)
+            if self._cache is not None:
+                self._cache.store(cfg, raw_tools, protocol_version)
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
 
+        with self._cond:
             try:
-                try:
-                    _ = client.call("initialize", init_params)
-                except McpError:
-                    # auto-transport fallback: if streamable HTTP fails, try legacy SSE.
-                    if (cfg.transport or "auto").lower().strip() == "auto" and not isinstance(
-                        client, _LegacySseTransport
-                    ):
-                        client = _LegacySseTransport(cfg)
-                        self._clients[name] = client
-                        _ = client.call("initialize", init_params)
-                    else:
-                        raise
-
-                client.notify("initialized", {})
-
-                resp = client.call("tools/list", {})
-                result = resp.get("result")
-                raw_tools = None
-                if isinstance(result, dict):
-                    raw_tools = result.get("tools")
-
-                if not isinstance(raw_tools, list):
-                    raise McpError("tools/list returned no tools")
-
-            except Exception as e:
-                self._runtime[name]["initialized"] = False
-                self._runtime[name]["last_error"] = str(e)
-                continue
+                # A config change while we were connecting makes this result stale.
+                if self._servers.get(name) is not cfg:
+                    return
+                rt = self._runtime.setdefault(name, _new_runtime(cfg))
+                rt["sync_ms"] = round((time.monotonic() - start) * 1000.0, 1)
+                if tools is None:
+                    rt["initialized"] = False
+                    rt["last_error"] = error
+                    self._breaker_locked(name).record_failure(time.monotonic())
+                    self._drop_server_tools_locked(name)
+                    return
+
+                self._breaker_locked(name).record_success()
+                rt["initialized"] = True
+                rt["last_error"] = None
+                rt["last_sync"] = time.time()
+                rt["tool_count"] = len(tools)
+                rt["cached_at"] = None
+                rt["truncated"] = truncated
+                self._set_server_tools_locked(name, tools)
+            finally:
+                if self._servers.get(name) is cfg:
+                    self._runtime[name]["syncing"] = False
+                if self._inflight.get(name) is done:
+                    self._inflight.pop(name, None)
+                done.set()
+                self._cond.notify_all()
+
+        with self._cond:
+            again = name in self._resync
+            self._resync.discard(name)
+        if again:
+            self.refresh_tools(server_name=name, deadline_s=0)
+
+    def _handshake(
+        self,
+        name: str,
+        cfg: McpServerConfig,
+        on_page: Callable[[list[McpTool]], None],
+    ) -> tuple[list[Any], list[McpTool], str, bool]:
+        # Returns the raw tools/list entries, the parsed tools, the negotiated
+        # protocol version and whether max_tools cut the catalog short.
+        with self._cond:
+            client = self._clients.get(name)
+        if client is None:
+            client = self._make_client(cfg)
+            self._attach_client(name, cfg, client)
+
+        # Initialize handshake.
+        init_params = {
+            "protocolVersion": cfg.protocol_version,
+            "clientInfo": {"name": "trpgai", "version": "0.1"},
+            "capabilities": {"tools": {}},
+        }
 
-            self._runtime[name]["initialized"] = True
-            self._runtime[name]["last_error"] = None
-            self._runtime[name]["last_sync"] = time.time()
-            self._runtime[name]["tool_count"] = int(len(raw_tools))
+        try:
+            init = client.call("initialize", init_params)
+        except McpError:
+            # auto-transport fallback: if streamable HTTP fails, try legacy SSE.
+            if _transport_name(cfg) == "auto" and not isinstance(client, _LegacySseTransport):
+                client = _LegacySseTransport(cfg, self._pool)
+                self._attach_client(name, cfg, client)
+                init = client.call("initialize", init_params)
+            else:
+                raise
+
+        protocol_version = cfg.protocol_version
+        init_result = init.get("result")
+        if isinstance(init_result, dict) and isinstance(init_result.get("protocolVersion"), str):
+            protocol_version = init_result["protocolVersion"]
+
+        client.notify("initialized", {})
+
+        raw_tools: list[Any] = []
+        tools: list[McpTool] = []
+        schemas: dict[str, dict[str, Any]] = {}
+        limit = max(0, int(cfg.max_tools))
+        seen_cursors: set[str] = set()
+        cursor: str | None = None
+        while True:
+            resp = client.call("tools/list", {"cursor": cursor} if cursor is not None else {})
+            result = resp.get("result")
+            page = result.get("tools") if isinstance(result, dict) else None
+            if not isinstance(page, list):
+                raise McpError("tools/list returned no tools")
+
+            if limit and len(raw_tools) + len(page) > limit:
+                page = page[: limit - len(raw_tools)]
+            raw_tools.extend(page)
+            page_tools = _tools_from_list(name, page, schemas)
+            tools.extend(page_tools)
+            on_page(page_tools)
+
+            if limit and len(raw_tools) >= limit:
+                return raw_tools, tools, protocol_version, True
+
+            next_cursor = result.get("nextCursor") if isinstance(result, dict) else None
+            if not isinstance(next_cursor, str) or not next_cursor:
+                return raw_tools, tools, protocol_version, False
+            if next_cursor in seen_cursors:
+                raise McpError("tools/list pagination loop")
+            seen_cursors.add(next_cursor)
+            cursor = next_cursor
+
+    def _attach_client(self, name: str, cfg: McpServerConfig, client: Any) -> None:
+        client.on_notification = lambda msg: self._on_notification(name, msg)
+        with self._cond:
+            if self._servers.get(name) is cfg:
+                self._clients[name] = client
+                return
+        # Reconfigured while connecting: this session belongs to the old settings.
+        threading.Thread(target=client.close, daemon=True).start()
+        raise McpError(f"mcp server reconfigured: {name}")
+
+    def _on_notification(self, name: str, msg: dict[str, Any]) -> None:
+        if msg.get("method") == "notifications/progress":
+            params = msg.get("params") or {}
+            with self._cond:
+                listener = self._progress.get(str(params.get("progressToken")))
+            if listener is not None:
+                update = {k: params[k] for k in ("progress", "total", "message") if params.get(k) is not None}
+                self._notify_progress(listener, update)
+            return
+        if msg.get("method") != "notifications/tools/list_changed":
+            return
+        cfg = self._servers.get(name)
+        if cfg is None:
+            return
+        if self._cache is not None:
+            self._cache.invalidate(cfg)
+        self._results.invalidate(name)
+        with self._cond:
+            if name in self._inflight:
+                self._resync.add(name)
+                return
+        self.refresh_tools(server_name=name, deadline_s=0)
+
+    def _on_call_message(
+        self,
+        name: str,
+        msg: dict[str, Any],
+        on_progress: Callable[[dict[str, Any]], None] | None,
+    ) -> None:
+        # Log messages streamed back with a tools/call response belong to that call.
+        if msg.get("method") == "notifications/message" and on_progress is not None:
+            data = (msg.get("params") or {}).get("data")
+            self._notify_progress(on_progress, {"message": data if isinstance(data, str) else json.dumps(data, ensure_ascii=False)})
+            return
+        self._on_notification(name, msg)
 
-            for t in raw_tools:
-                if not isinstance(t, dict):
-                    continue
-                mcp_name = t.get("name")
-                if not isinstance(mcp_name, str) or not mcp_name:
-                    continue
-                desc = t.get("description")
-                desc_s = str(desc) if desc is not None else ""
-                schema = t.get("inputSchema")
-                if not isinstance(schema, dict):
-                    schema = {"type": "object", "properties": {}}
-
-                public = _mcp_tool_public_name(name, mcp_name)
-                tool = McpTool(
-                    server=name,
-                    mcp_name=mcp_name,
-                    public_name=public,
-                    description=desc_s,
-                    input_schema=schema,
-                )
-                tools.append(tool)
-                public_to_tool[public] = tool
+    @staticmethod
+    def _notify_progress(listener: Callable[[dict[str, Any]], None], update: dict[str, Any]) -> None:
+        # Runs on a transport's reader thread, which a UI error must not kill.
+        try:
+            listener(update)
+        except Exception:
+            pass
 
-        # Only replace registry when refreshing all servers.
-        if server_name is None:
-            self._tools = tools
-            self._public_to_tool = public_to_tool
-        else:
-            # Merge: keep other tools intact.
-            keep = [t for t in self._tools if t.server != server_name]
-            self._tools = keep + tools
-            self._public_to_tool = {k: v for k, v in self._public_to_tool.items() if v.server != server_name}
-            self._public_to_tool.update(public_to_tool)
+    def _load_cached_locked(self, name: str, cfg: McpServerConfig) -> None:
+        if self._cache is None or not cfg.enabled or not _is_configured(cfg):
+            return
+        entry = self._cache.load(cfg)
+        if entry is None:
+            return
+        tools = _tools_from_list(name, entry["tools"])
+        rt = self._runtime[name]
+        rt["tool_count"] = len(tools)
+        rt["cached_at"] = entry.get("fetched_at")
+        self._set_server_tools_locked(name, tools)
+
+    def _breaker_locked(self, name: str) -> _Breaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = _Breaker()
+            self._breakers[name] = breaker
+        return breaker
+
+    def _set_server_tools_locked(self, name: str, tools: list[McpTool]) -> None:
+        # Registries are replaced, never mutated, so readers can iterate a snapshot.
+        keep = [t for t in self._tools if t.server != name]
+        self._tools = keep + tools
+        public_to_tool = {k: v for k, v in self._public_to_tool.items() if v.server != name}
+        for t in tools:
+            public_to_tool[t.public_name] = t
+        self._public_to_tool = public_to_tool
+        for public in [k for k in self._definitions if k not in public_to_tool]:
+            del self._definitions[public]
+
+    def _merge_server_tools_locked(self, name: str, tools: list[McpTool]) -> None:
+        # Adds or replaces tools by public name; the final page set removes leftovers.
+        fresh = {t.public_name for t in tools}
+        self._tools = [t for t in self._tools if t.public_name not in fresh] + tools
+        public_to_tool = dict(self._public_to_tool)
+        for t in tools:
+            public_to_tool[t.public_name] = t
+        self._public_to_tool = public_to_tool
+
+    def _drop_server_tools_locked(self, name: str) -> None:
+        if any(t.server == name for t in self._tools):
+            self._set_server_tools_locked(name, [])
 
     def openai_tools(self) -> list[dict[str, Any]]:
         if not self.has_servers():
             return []
 
+        if not self._started:
+            self._started = True
+            if self._tools:
+                # Cached catalog: answer now, revalidate in the background.
+                self.refresh_tools(deadline_s=0)
         if not self._tools:
-            self.refresh_tools()
+            self.refresh_tools(wait_all=False)
 
         out: list[dict[str, Any]] = []
         for t in self._tools:
-            out.append(
-                {
-                    "type": "function",
-                    "function": {
-                        "name": t.public_name,
-                        "description": t.description,
-                        "parameters": t.input_schema,
-                    },
-                }
-            )
+            fn, _stats = self._definition(t)
+            out.append({"type": "function", "function": fn})
         return out
 
+    def definition_stats(self, tool: McpTool) -> dict[str, int]:
+        # Bytes and estimated tokens of the tool definition before/after compaction.
+        return self._definition(tool)[1]
+
+    def _definition(self, tool: McpTool) -> tuple[dict[str, Any], dict[str, int]]:
+        level = self._compaction
+        hit = self._definitions.get(tool.public_name)
+        if hit is not None and hit[0] is tool and hit[1] == level:
+            return hit[2], hit[3]
+
+        raw = {"name": tool.public_name, "description": tool.description, "parameters": tool.input_schema}
+        fn = {
+            "name": tool.public_name,
+            "description": compact_text(tool.description, level),
+            "parameters": compact_schema(tool.input_schema, level),
+        }
+        before = json_size(raw)
+        after = json_size(fn)
+        # ~4 bytes per token, as in ratelimit.estimate_tokens.
+        stats = {"bytes_before": before, "bytes_after": after, "tokens_before": before // 4, "tokens_after": after // 4}
+        with self._cond:
+            self._definitions[tool.public_name] = (tool, level, fn, stats)
+        return fn, stats
+
     def tools(self, server_name: str | None = None) -> list[McpTool]:
         if not self._tools:
             self.refresh_tools(server_name=None)
@@ -523,20 +1571,104 @@ class McpManager:
             return list(self._tools)
         return [t for t in self._tools if t.server == server_name]
 
-    def call_tool(self, public_name: str, arguments: dict[str, Any]) -> dict[str, Any]:
-        tool = self._public_to_tool.get(public_name)
-        if tool is None:
-            raise McpError(f"unknown mcp tool: {public_name}")
-
-        cfg = self._servers.get(tool.server)
-        if cfg is None or not cfg.enabled:
-            raise McpError(f"mcp server disabled: {tool.server}")
-
-        client = self._clients.get(tool.server)
-        if client is None:
-            raise McpError(f"mcp server not initialized: {tool.server}")
+    def call_tool(
+        self,
+        public_name: str,
+        arguments: dict[str, Any],
+        timeout_s: float | None = None,
+        cancel: threading.Event | None = None,
+        on_progress: Callable[[dict[str, Any]], None] | None = None,
+    ) -> dict[str, Any]:
+        # on_progress receives {"progress", "total", "message"} updates while
+        # the call runs; any of them may be missing.
+        self._ensure_client(public_name)
+        with self._cond:
+            tool = self._public_to_tool.get(public_name)
+            if tool is None:
+                raise McpError(f"unknown mcp tool: {public_name}")
+
+            cfg = self._servers.get(tool.server)
+            if cfg is None or not cfg.enabled:
+                raise McpError(f"mcp server disabled: {tool.server}")
+
+            client = self._clients.get(tool.server)
+            if client is None:
+                raise McpError(f"mcp server not initialized: {tool.server}")
+
+            slots = self._slots.get(tool.server)
+            if slots is None:
+                slots = threading.BoundedSemaphore(max(1, int(cfg.max_concurrency)))
+                self._slots[tool.server] = slots
+
+        cache_key = None
+        if self._results.enabled and self._cacheable(tool, cfg):
+            cache_key = _ResultCache.key(tool.server, tool.mcp_name, arguments)
+            cached = self._results.get(cache_key)
+            if cached is not None:
+                return cached
+
+        if timeout_s is None:
+            timeout_s = float(cfg.tool_timeouts.get(tool.mcp_name, cfg.timeout_s))
+        started = time.monotonic()
+        if not _acquire_slot(slots, timeout_s, cancel):
+            raise McpTimeout(f"mcp server busy: {tool.server}")
+        try:
+            with self._cond:
+                breaker = self._breaker_locked(tool.server)
+                if not breaker.allow(time.monotonic()):
+                    wait = breaker.snapshot(time.monotonic()).get("retry_in_s") or 0
+                    raise McpError(f"mcp server unavailable: {tool.server} (circuit open, retry in {wait:.0f}s)")
+
+            params: dict[str, Any] = {"name": tool.mcp_name, "arguments": arguments}
+            token = None
+            if on_progress is not None:
+                token = f"trpgai-{next(self._progress_ids)}"
+                params["_meta"] = {"progressToken": token}
+                with self._cond:
+                    self._progress[token] = on_progress
+            try:
+                resp = client.call(
+                    "tools/call",
+                    params,
+                    timeout_s=max(0.1, timeout_s - (time.monotonic() - started)),
+                    cancel=cancel,
+                    on_message=lambda msg: self._on_call_message(tool.server, msg, on_progress),
+                )
+            except McpCancelled:
+                with self._cond:
+                    breaker.release_probe()
+                raise
+            except McpTimeout:
+                # Only a timeout at the server-wide limit says the server is unwell;
+                # a shorter per-tool or per-turn limit is about this one call.
+                with self._cond:
+                    if timeout_s < float(cfg.timeout_s):
+                        breaker.release_probe()
+                    else:
+                        breaker.record_failure(time.monotonic())
+                raise
+            except McpRpcError:
+                with self._cond:
+                    breaker.record_success()
+                raise
+            except McpError:
+                with self._cond:
+                    breaker.record_failure(time.monotonic())
+                raise
+            except BaseException:
+                # Not the server's fault (a bug, KeyboardInterrupt); just let the next probe in.
+                with self._cond:
+                    breaker.release_probe()
+                raise
+            finally:
+                if token is not None:
+                    with self._cond:
+                        self._progress.pop(token, None)
+        finally:
+            slots.release()
+        with self._cond:
+            breaker.record_success()
 
-        resp = client.call("tools/call", {"name": tool.mcp_name, "arguments": arguments})
         result = resp.get("result")
         if not isinstance(result, dict):
             return {"text": json.dumps(resp, ensure_ascii=True)}
@@ -552,17 +1684,58 @@ class McpManager:
                     text_parts.append(text_val)
 
         text = "\n".join(text_parts).strip()
-        return {"text": text or json.dumps(result, ensure_ascii=True), "raw": result}
+        out = {"text": text or json.dumps(result, ensure_ascii=True), "raw": result}
+        if cache_key is not None and not result.get("isError"):
+            self._results.put(cache_key, out)
+        return out
+
+    def tool_timeout(self, public_name: str) -> float | None:
+        tool = self._public_to_tool.get(public_name)
+        cfg = self._servers.get(tool.server) if tool is not None else None
+        if tool is None or cfg is None:
+            return None
+        return float(cfg.tool_timeouts.get(tool.mcp_name, cfg.timeout_s))
+
+    def result_budget(self, public_name: str, default: int) -> int:
+        # Per-tool override from McpServerConfig.result_budgets, by MCP tool name.
+        tool = self._public_to_tool.get(public_name)
+        cfg = self._servers.get(tool.server) if tool is not None else None
+        if tool is None or cfg is None:
+            return default
+        return int(cfg.result_budgets.get(tool.mcp_name, default))
+
+    def result_cache_stats(self) -> dict[str, Any]:
+        return self._results.stats()
+
+    @staticmethod
+    def _cacheable(tool: McpTool, cfg: McpServerConfig) -> bool:
+        if tool.mcp_name in cfg.cache_tools:
+            return True
+        # idempotentHint alone describes a tool with side effects; a cache hit
+        # would silently skip them.
+        return tool.annotations.get("readOnlyHint") is True
+
+    def _ensure_client(self, public_name: str) -> None:
+        # Tools served from the cache have no session yet; connect on first use.
+        with self._cond:
+            tool = self._public_to_tool.get(public_name)
+            if tool is None or (tool.server in self._clients and self._runtime[tool.server].get("initialized")):
+                return
+            cfg = self._servers.get(tool.server)
+        if cfg is not None and cfg.enabled:
+            self.refresh_tools(server_name=tool.server, deadline_s=float(cfg.timeout_s))
 
     def _make_client(self, cfg: McpServerConfig) -> Any:
-        transport = (cfg.transport or "auto").lower().strip()
+        transport = _transport_name(cfg)
+        if transport == "stdio":
+            return _StdioTransport(cfg)
         if transport == "streamable_http":
-            return _StreamableHttpTransport(cfg)
+            return _StreamableHttpTransport(cfg, self._pool)
         if transport == "legacy_sse":
-            return _LegacySseTransport(cfg)
+            return _LegacySseTransport(cfg, self._pool)
 
         # auto: try streamable http first.
         try:
-            return _StreamableHttpTransport(cfg)
+            return _StreamableHttpTransport(cfg, self._pool)
         except Exception:
-            return _LegacySseTransport(cfg)
+            return _LegacySseTransport(cfg, self._pool)
@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import json
+import random
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from . import __version__
+from .dice import DiceSyntaxError, dice_count, distribution, roll_expression, roll_total
+
+PROTOCOL_VERSIONS = ("2025-11-25", "2025-06-18", "2025-03-26")
+_MAX_BODY = 1 << 20
+_MAX_BATCH_DICE = 100_000
+_MAX_SAMPLES = 1_000_000
+
+# Rolls are not cacheable: leave readOnly/idempotent unset so clients
+# (including ours, see McpManager._cacheable) never reuse a result.
+_ROLL_ANNOTATIONS = {"destructiveHint": False, "openWorldHint": False}
+
+TOOLS: list[dict[str, Any]] = [
+    {
+        "name": "roll_dice",
+        "description": "Roll a dice expression like 2d6+1, 4d6kh3, 1d20!, 4dF or d%.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "expression": {"type": "string"},
+                "seed": {"type": "integer"},
+            },
+            "required": ["expression"],
+        },
+        "annotations": _ROLL_ANNOTATIONS,
+    },
+    {
+        "name": "roll_batch",
+        "description": "Roll each expression count times and return the totals.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "expressions": {"type": "array", "items": {"type": "string"}},
+                "count": {"type": "integer", "minimum": 1},
+                "seed": {"type": "integer"},
+            },
+            "required": ["expressions"],
+        },
+        "annotations": _ROLL_ANNOTATIONS,
+    },
+    {
+        "name": "dice_distribution",
+        "description": "Probability of each total (or range of totals) of a dice expression, with mean and stdev.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "expression": {"type": "string"},
+                "samples": {"type": "integer", "minimum": 1},
+            },
+            "required": ["expression"],
+        },
+        "annotations": {"readOnlyHint": True, "idempotentHint": True, "openWorldHint": False},
+    },
+]
+
+
+class _ToolArgumentError(ValueError):
+    pass
+
+
+_local = threading.local()
+
+
+def _thread_rng() -> random.Random:
+    # One generator per serving thread; seeding a fresh one per roll is slow.
+    rng = getattr(_local, "rng", None)
+    if rng is None:
+        rng = random.Random()
+        _local.rng = rng
+    return rng
+
+
+def _rng_for(args: dict[str, Any]) -> random.Random:
+    seed = args.get("seed")
+    if seed is None:
+        return _thread_rng()
+    if not isinstance(seed, int):
+        raise _ToolArgumentError("seed must be an integer")
+    return random.Random(seed)
+
+
+def _expression(args: dict[str, Any]) -> str:
+    expr = args.get("expression")
+    if not isinstance(expr, str) or not expr.strip():
+        raise _ToolArgumentError("expression is required")
+    return expr
+
+
+def _tool_roll_dice(args: dict[str, Any]) -> dict[str, Any]:
+    result = roll_expression(_expression(args), rng=_rng_for(args))
+    return {"content": [{"type": "text", "text": result["text"]}], "structuredContent": result}
+
+
+def _tool_roll_batch(args: dict[str, Any]) -> dict[str, Any]:
+    exprs = args.get("expressions")
+    if not isinstance(exprs, list) or not exprs or not all(isinstance(e, str) for e in exprs):
+        raise _ToolArgumentError("expressions must be a non-empty list of strings")
+    count = args.get("count", 1)
+    if not isinstance(count, int) or count < 1:
+        raise _ToolArgumentError("count must be a positive integer")
+    # Bound the work per request by dice rolled, not by expressions.
+    if count * sum(max(1, dice_count(e)) for e in exprs) > _MAX_BATCH_DICE:
+        raise _ToolArgumentError(f"at most {_MAX_BATCH_DICE} dice per batch")
+
+    rng = _rng_for(args)
+    results = [{"expr": e, "totals": [roll_total(e, rng) for _ in range(count)]} for e in exprs]
+    text = "\n".join(f"{r['expr']}: {', '.join(str(t) for t in r['totals'])}" for r in results)
+    return {"content": [{"type": "text", "text": text}], "structuredContent": {"results": results}}
+
+
+def _tool_dice_distribution(args: dict[str, Any]) -> dict[str, Any]:
+    samples = args.get("samples", 100_000)
+    if not isinstance(samples, int) or not 1 <= samples <= _MAX_SAMPLES:
+        raise _ToolArgumentError(f"samples must be between 1 and {_MAX_SAMPLES}")
+    dist = distribution(_expression(args), samples=samples)
+    how = "exact" if dist["exact"] else f"{dist['samples']} samples"
+    lines = [f"{dist['expr']} ({how}): mean={dist['mean']:.3f} stdev={dist['stdev']:.3f}"]
+    b = dist["bucket"]
+    lines.extend(f"{v if b == 1 else f'{v}..{v + b - 1}'}: {p * 100:.2f}%" for v, p in dist["pmf"].items())
+    # JSON object keys must be strings.
+    structured = dict(dist, pmf={str(v): p for v, p in dist["pmf"].items()})
+    return {"content": [{"type": "text", "text": "\n".join(lines)}], "structuredContent": structured}
+
+
+_HANDLERS = {
+    "roll_dice": _tool_roll_dice,
+    "roll_batch": _tool_roll_batch,
+    "dice_distribution": _tool_dice_distribution,
+}
+
+
+def _error(req_id: Any, code: int, message: str) -> dict[str, Any]:
+    return {"jsonrpc": "2.0", "id": req_id, "error": {"code": code, "message": message}}
+
+
+def handle_message(msg: Any) -> dict[str, Any] | None:
+    # One JSON-RPC message in, its response out (None for notifications).
+    if not isinstance(msg, dict) or msg.get("jsonrpc") != "2.0" or not isinstance(msg.get("method"), str):
+        return _error(None, -32600, "invalid request")
+    if "id" not in msg:
+        return None
+
+    req_id = msg["id"]
+    method = msg["method"]
+    params = msg.get("params") if isinstance(msg.get("params"), dict) else {}
+
+    if method == "initialize":
+        asked = params.get("protocolVersion")
+        version = asked if asked in PROTOCOL_VERSIONS else PROTOCOL_VERSIONS[0]
+        result = {
+            "protocolVersion": version,
+            "capabilities": {"tools": {"listChanged": False}},
+            "serverInfo": {"name": "trpgai-dice", "version": __version__},
+        }
+        return {"jsonrpc": "2.0", "id": req_id, "result": result}
+    if method == "ping":
+        return {"jsonrpc": "2.0", "id": req_id, "result": {}}
+    if method == "tools/list":
+        return {"jsonrpc": "2.0", "id": req_id, "result": {"tools": TOOLS}}
+    if method != "tools/call":
+        return _error(req_id, -32601, f"method not found: {method}")
+
+    handler = _HANDLERS.get(str(params.get("name")))
+    if handler is None:
+        return _error(req_id, -32602, f"unknown tool: {params.get('name')}")
+    args = params.get("arguments") if isinstance(params.get("arguments"), dict) else {}
+    try:
+        result = handler(args)
+    except (DiceSyntaxError, _ToolArgumentError) as e:
+        # Bad input is a tool error the model can read and fix, not a protocol error.
+        result = {"content": [{"type": "text", "text": f"error: {e}"}], "isError": True}
+    return {"jsonrpc": "2.0", "id": req_id, "result": result}
+
+
+class _McpHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server_version = f"trpgai-mcp/{__version__}"
+
+    def log_message(self, *_args: Any) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        if self.path.split("?", 1)[0].rstrip("/") != self.server.mcp_path:
+            self._send(404, b"")
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0 or length > _MAX_BODY:
+            self.close_connection = True
+            self._send(413, b"")
+            return
+
+        try:
+            msg = json.loads(self.rfile.read(length))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            self._send_json(_error(None, -32700, "parse error"))
+            return
+
+        resp = handle_message(msg)
+        if resp is None:
+            self._send(202, b"")
+            return
+        headers = {}
+        if isinstance(msg, dict) and msg.get("method") == "initialize":
+            # Stateless server: the id only satisfies clients that expect one.
+            headers["MCP-Session-Id"] = uuid.uuid4().hex
+        self._send_json(resp, headers)
+
+    def do_GET(self) -> None:
+        # No server-initiated stream.
+        self._send(405, b"", {"Allow": "POST, DELETE"})
+
+    def do_DELETE(self) -> None:
+        self._send(204, b"")
+
+    def _send_json(self, payload: dict[str, Any], headers: dict[str, str] | None = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self._send(200, body, {"Content-Type": "application/json", **(headers or {})})
+
+    def _send(self, status: int, body: bytes, headers: dict[str, str] | None = None) -> None:
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+
+class McpDiceServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Many clients connect at once; the default backlog of 5 drops SYNs.
+    request_queue_size = 128
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, path: str = "/mcp"):
+        self.mcp_path = "/" + path.strip("/")
+        super().__init__((host, port), _McpHandler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{self.mcp_path}"
@@ -1,15 +1,23 @@
 from __future__ import annotations
 
+import contextlib
+import http.client
 import json
-import ssl
-import urllib.error
-import urllib.request
+import socket
+import threading
+import time
 from dataclasses import dataclass
-from typing import Any
+from pathlib import Path
+from typing import Any, Callable, Iterator
 
 from .config import AppConfig, ProviderConfig
 from .dice import DiceSyntaxError, roll_expression
-from .mcp_client import McpError, McpManager
+from .http_pool import ConnectionPool, PooledResponse, default_pool
+from .mcp_cache import ToolCatalogCache
+from .mcp_client import McpCancelled, McpError, McpManager, McpTimeout
+from .ratelimit import THROTTLE_STATUSES, estimate_tokens, limiter_for
+from .tool_index import ToolIndex
+from .tool_results import MIN_RESULT_CHARS, fit_text, spill_result
 
 
 def _accumulate_tool_calls(
@@ -61,6 +69,122 @@ def _accumulate_tool_calls(
     return out
 
 
+class ChatCancelled(RuntimeError):
+    pass
+
+
+class _StreamInterrupted(RuntimeError):
+    def __init__(
+        self,
+        reason: str,
+        content: str = "",
+        tool_calls: list[dict[str, Any]] | None = None,
+        received_bytes: int = 0,
+        retryable: bool = True,
+    ):
+        super().__init__(reason)
+        self.content = content
+        self.tool_calls = tool_calls or []
+        self.received_bytes = received_bytes
+        self.retryable = retryable
+
+
+_CONTINUE_PROMPT = "Your previous reply was cut off. Continue exactly where it stopped, without repeating any of it."
+
+
+def _continuation_payload(payload: dict[str, Any], partial: str) -> dict[str, Any]:
+    out = dict(payload)
+    out["messages"] = list(payload.get("messages") or []) + [
+        {"role": "assistant", "content": partial},
+        {"role": "user", "content": _CONTINUE_PROMPT},
+    ]
+    return out
+
+
+class CancelToken:
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._responses: list[PooledResponse] = []
+        # Sockets of requests still waiting for their response headers.
+        self._sockets: list[Any] = []
+        # Set to give up on the tool call in progress while the turn goes on.
+        self._tool = threading.Event()
+        self._tool_running = False
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        self._event.set()
+        with self._lock:
+            self._tool.set()
+            responses = list(self._responses)
+            sockets = list(self._sockets)
+        # Closing the socket wakes a worker blocked reading the stream.
+        for resp in responses:
+            resp.abort()
+        for sock in sockets:
+            _shutdown(sock)
+
+    def cancel_tool(self) -> bool:
+        # Returns False when no tool call is running, so callers can fall back to cancel().
+        with self._lock:
+            if not self._tool_running:
+                return False
+            self._tool.set()
+        return True
+
+    def wait(self, timeout_s: float) -> bool:
+        return self._event.wait(timeout_s)
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise ChatCancelled("request cancelled")
+
+    def _attach(self, resp: PooledResponse) -> None:
+        with self._lock:
+            self._responses.append(resp)
+        if self._event.is_set():
+            resp.abort()
+
+    def _tool_started(self) -> threading.Event:
+        with self._lock:
+            self._tool_running = True
+            self._tool = threading.Event()
+            if self._event.is_set():
+                self._tool.set()
+            return self._tool
+
+    def _tool_finished(self) -> None:
+        with self._lock:
+            self._tool_running = False
+
+    def _detach(self, resp: PooledResponse) -> None:
+        with self._lock:
+            if resp in self._responses:
+                self._responses.remove(resp)
+
+    def _attach_socket(self, sock: Any) -> None:
+        with self._lock:
+            self._sockets.append(sock)
+        if self._event.is_set():
+            raise ChatCancelled("request cancelled")
+
+    def _detach_socket(self, sock: Any) -> None:
+        with self._lock:
+            if sock in self._sockets:
+                self._sockets.remove(sock)
+
+
+def _shutdown(sock: Any) -> None:
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
 @dataclass(frozen=True)
 class ChatMessage:
     role: str
@@ -83,17 +207,59 @@ class ChatMessage:
 
 
 class ChatClient:
-    def __init__(self, cfg: AppConfig):
+    # 429/503 responses are retried after the limiter's Retry-After pause.
+    _THROTTLE_RETRIES = 3
+
+    def __init__(self, cfg: AppConfig, pool: ConnectionPool | None = None):
         self._cfg = cfg
-        self._mcp = McpManager(cfg.mcp.servers)
+        self._pool = pool or default_pool()
+        self._mcp = McpManager(
+            cfg.mcp.servers,
+            pool=self._pool,
+            sync_deadline_s=cfg.mcp.sync_deadline_s,
+            cache=self._tool_cache(cfg),
+            result_cache_ttl_s=cfg.mcp.result_cache_ttl_s,
+            result_cache_size=cfg.mcp.result_cache_size,
+            schema_compaction=cfg.mcp.schema_compaction,
+        )
+        # Per-thread cancel token of the chat() call in progress.
+        self._local = threading.local()
+        self._tool_index = ToolIndex()
+        self._tool_index_lock = threading.Lock()
+        # Where oversized tool results are written; None means the cache dir.
+        self.spill_dir: Path | None = None
+
+    @staticmethod
+    def _tool_cache(cfg: AppConfig) -> ToolCatalogCache | None:
+        if cfg.mcp.tool_cache_ttl_s <= 0:
+            return None
+        return ToolCatalogCache(ttl_s=cfg.mcp.tool_cache_ttl_s)
+
+    def reconfigure(self, cfg: AppConfig) -> None:
+        # Applies a new config in place; unchanged MCP servers keep their sessions.
+        self._cfg = cfg
+        self._mcp.reconfigure(
+            cfg.mcp.servers,
+            sync_deadline_s=cfg.mcp.sync_deadline_s,
+            cache=self._tool_cache(cfg),
+            schema_compaction=cfg.mcp.schema_compaction,
+            result_cache_ttl_s=cfg.mcp.result_cache_ttl_s,
+            result_cache_size=cfg.mcp.result_cache_size,
+        )
+
+    def close(self) -> None:
+        self._mcp.close()
 
     def mcp_status(self) -> dict[str, dict[str, Any]]:
         return self._mcp.status()
 
     def mcp_sync(self, server_name: str | None = None) -> dict[str, dict[str, Any]]:
-        self._mcp.refresh_tools(server_name=server_name)
+        self._mcp.refresh_tools(server_name=server_name, force=True)
         return self._mcp.status()
 
+    def mcp_result_cache_stats(self) -> dict[str, Any]:
+        return self._mcp.result_cache_stats()
+
     def mcp_tools(self, server_name: str | None = None) -> list[dict[str, Any]]:
         tools = self._mcp.tools(server_name=server_name)
         out: list[dict[str, Any]] = []
@@ -104,10 +270,33 @@ class ChatClient:
                     "mcp_name": t.mcp_name,
                     "public_name": t.public_name,
                     "description": t.description,
+                    **self._mcp.definition_stats(t),
                 }
             )
         return out
 
+    def prewarm(self) -> dict[str, bool]:
+        # Opens (or refreshes) pooled connections so the next turn skips DNS/TCP/TLS.
+        provider = self._provider()
+        out: dict[str, bool] = {}
+        try:
+            out["provider"] = self._pool.prewarm(
+                provider.base_url.rstrip("/") + "/v1/chat/completions",
+                timeout_s=min(10.0, float(provider.timeout_s)),
+                verify_tls=provider.verify_tls,
+            )
+        except (OSError, ValueError):
+            out["provider"] = False
+        for name, opened in self._mcp.prewarm().items():
+            out[f"mcp:{name}"] = opened
+        return out
+
+    def pool_stats(self) -> dict[str, Any]:
+        return self._pool.stats()
+
+    def rate_limit_status(self) -> dict[str, Any]:
+        return limiter_for(self._provider()).snapshot()
+
     def _provider(self) -> ProviderConfig:
         p = self._cfg.providers.get(self._cfg.active_provider)
         if p is None:
@@ -119,7 +308,32 @@ class ChatClient:
         messages: list[ChatMessage],
         on_stream: Any | None = None,
         on_event: Any | None = None,
+        cancel: CancelToken | None = None,
     ) -> tuple[str, list[ChatMessage]]:
+        self._local.cancel = cancel
+        try:
+            return self._chat(messages, on_stream, on_event, cancel)
+        except ChatCancelled:
+            raise
+        except Exception:
+            # An aborted socket surfaces as whatever error the read hit first.
+            if cancel is not None and cancel.cancelled:
+                raise ChatCancelled("request cancelled") from None
+            raise
+        finally:
+            self._local.cancel = None
+
+    def _chat(
+        self,
+        messages: list[ChatMessage],
+        on_stream: Any | None,
+        on_event: Any | None,
+        cancel: CancelToken | None,
+    ) -> tuple[str, list[ChatMessage]]:
+        def check_cancel() -> None:
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+
         def emit(ev: dict[str, Any]) -> None:
             try:
                 if callable(on_event):
@@ -154,14 +368,21 @@ class ChatClient:
 
         if self._mcp.has_servers():
             try:
-                tools.extend(self._mcp.openai_tools())
+                tools.extend(self._select_mcp_tools(self._mcp.openai_tools(), messages))
             except Exception as e:
                 emit({"type": "mcp_error", "error": str(e)})
 
         max_iters = 8
         current = list(messages)
+        # Characters of tool output the model may still receive this turn, and
+        # seconds MCP tool calls may still take.
+        turn_budget: dict[str, float] = {
+            "chars": self._cfg.mcp.turn_result_budget_chars,
+            "tool_s": self._cfg.mcp.tool_phase_deadline_s,
+        }
 
         for _ in range(max_iters):
+            check_cancel()
             model = provider.model
             if not model and provider.models:
                 model = provider.models[0]
@@ -192,19 +413,24 @@ class ChatClient:
             assistant_content: str | None = None
             tool_calls: list[dict[str, Any]] = []
 
+            kept = ""
+            fell_back = False
             if stream_enabled:
-                try:
-                    if callable(on_stream):
-                        on_stream({"type": "start"})
-                    assistant_content, tool_calls = self._post_json_stream(endpoint, payload, on_stream=on_stream)
-                    if callable(on_stream):
-                        on_stream({"type": "end", "content": assistant_content or "", "tool_calls": tool_calls})
-                except Exception:
-                    stream_enabled = False
+                if callable(on_stream):
+                    on_stream({"type": "start"})
+                assistant_content, tool_calls, stream_enabled, kept = self._stream_with_recovery(
+                    endpoint, payload, on_stream, emit, cancel
+                )
+                check_cancel()
+                if stream_enabled and callable(on_stream):
+                    on_stream({"type": "end", "content": assistant_content or "", "tool_calls": tool_calls})
+                if not stream_enabled:
+                    fell_back = True
                     payload.pop("stream", None)
 
             if not stream_enabled:
-                data = self._post_json(endpoint, payload)
+                data = self._post_json(endpoint, payload if not kept else _continuation_payload(payload, kept))
+                check_cancel()
 
                 choices = data.get("choices") or []
                 if not choices:
@@ -232,6 +458,15 @@ class ChatClient:
                         }
                     ]
 
+                if fell_back:
+                    # Finish the streamed slot instead of showing the reply a second time.
+                    rest = str(assistant_content or "")
+                    assistant_content = kept + rest
+                    if callable(on_stream):
+                        if rest:
+                            on_stream({"type": "content_delta", "delta": rest})
+                        on_stream({"type": "end", "content": assistant_content, "tool_calls": tool_calls})
+
             if tool_calls:
                 current.append(
                     ChatMessage(
@@ -257,9 +492,11 @@ class ChatClient:
                     if not call.get("id"):
                         call["id"] = f"call_{i}"  # noqa: PERF401
 
+                    check_cancel()
+
                     emit({"type": "tool_start", "call": call, "tool_call_id": str(call.get("id") or "")})
 
-                    tool_msg = self._handle_tool_call(call)
+                    tool_msg = self._handle_tool_call(call, turn_budget, emit)
                     current.append(tool_msg)
                     emit(
                         {
@@ -278,7 +515,39 @@ class ChatClient:
 
         raise RuntimeError("tool call loop did not converge")
 
-    def _handle_tool_call(self, call: dict[str, Any]) -> ChatMessage:
+    def _select_mcp_tools(self, tools: list[dict[str, Any]], messages: list[ChatMessage]) -> list[dict[str, Any]]:
+        top_k = self._cfg.chat.tool_top_k
+        if top_k <= 0 or len(tools) <= top_k:
+            return tools
+
+        # Rank against the latest user turns; earlier history adds mostly noise.
+        recent = [m.content for m in messages if m.role == "user" and m.content][-2:]
+        with self._tool_index_lock:
+            self._tool_index.sync(self._mcp.tools())
+            ranked = self._tool_index.search("\n".join(recent), top_k)
+
+        if not ranked:
+            # A follow-up like "yes, do it" matches nothing; keep every tool rather than none.
+            return tools
+
+        keep = {name for name, _score in ranked}
+        # Tools the conversation already called stay available for follow-ups.
+        for m in messages:
+            for call in m.tool_calls or []:
+                keep.add(str((call.get("function") or {}).get("name") or ""))
+        pinned = set(self._cfg.chat.pinned_tools)
+        if pinned:
+            for t in self._mcp.tools():
+                if t.public_name in pinned or t.mcp_name in pinned:
+                    keep.add(t.public_name)
+        return [t for t in tools if t["function"]["name"] in keep]
+
+    def _handle_tool_call(
+        self,
+        call: dict[str, Any],
+        turn_budget: dict[str, float] | None = None,
+        emit: Callable[[dict[str, Any]], None] | None = None,
+    ) -> ChatMessage:
         call_id = str(call.get("id") or "")
         fn = call.get("function") or {}
         name = str(fn.get("name") or "")
@@ -295,13 +564,57 @@ class ChatClient:
                     except json.JSONDecodeError:
                         args = {}
 
+                timeout_s = self._mcp.tool_timeout(name)
+                limited = turn_budget is not None and self._cfg.mcp.tool_phase_deadline_s > 0
+                if limited:
+                    left = max(0.0, turn_budget["tool_s"])
+                    if left <= 0:
+                        content = json.dumps(
+                            {"error": "timeout", "timeout_s": 0, "message": "tool time for this turn is used up; not called"},
+                            ensure_ascii=False,
+                        )
+                        return ChatMessage(role="tool", tool_call_id=call_id, content=content)
+                    timeout_s = left if timeout_s is None else min(timeout_s, left)
+
+                def on_progress(update: dict[str, Any]) -> None:
+                    if emit is not None:
+                        emit({"type": "tool_progress", "call": call, "tool_call_id": call_id, **update})
+
+                token: CancelToken | None = getattr(self._local, "cancel", None)
+                started = time.monotonic()
                 try:
-                    result = self._mcp.call_tool(name, args)
+                    result = self._mcp.call_tool(
+                        name,
+                        args,
+                        timeout_s=timeout_s,
+                        cancel=token._tool_started() if token is not None else None,
+                        on_progress=on_progress if emit is not None else None,
+                    )
+                except McpTimeout as e:
+                    content = json.dumps(
+                        {
+                            "error": "timeout",
+                            "timeout_s": round(float(timeout_s or 0), 1),
+                            "message": f"no result in time; the call was cancelled ({e})",
+                        },
+                        ensure_ascii=False,
+                    )
+                    return ChatMessage(role="tool", tool_call_id=call_id, content=content)
+                except McpCancelled:
+                    if token is not None and token.cancelled:
+                        raise ChatCancelled("request cancelled") from None
+                    content = json.dumps({"error": "cancelled", "message": "cancelled by the user"}, ensure_ascii=False)
+                    return ChatMessage(role="tool", tool_call_id=call_id, content=content)
                 except McpError as e:
-                    content = json.dumps({"error": str(e)}, ensure_ascii=True)
+                    content = json.dumps({"error": str(e)}, ensure_ascii=False)
                     return ChatMessage(role="tool", tool_call_id=call_id, content=content)
+                finally:
+                    if token is not None:
+                        token._tool_finished()
+                    if limited:
+                        turn_budget["tool_s"] -= time.monotonic() - started
 
-                content = json.dumps(result, ensure_ascii=True)
+                content = self._budget_tool_result(name, call_id, args, result, turn_budget)
                 return ChatMessage(role="tool", tool_call_id=call_id, content=content)
 
             content = json.dumps({"error": f"unknown tool: {name}"}, ensure_ascii=True)
@@ -339,6 +652,37 @@ class ChatClient:
         content = json.dumps(rolled, ensure_ascii=True)
         return ChatMessage(role="tool", tool_call_id=call_id, content=content)
 
+    def _budget_tool_result(
+        self,
+        name: str,
+        call_id: str,
+        args: dict[str, Any],
+        result: dict[str, Any],
+        turn_budget: dict[str, float] | None,
+    ) -> str:
+        # The model only gets the text; raw stays out of the transcript. Text over
+        # the per-tool or per-turn budget is cut and the full result spilled to disk.
+        text = str(result.get("text") or "")
+        limit = self._mcp.result_budget(name, self._cfg.mcp.result_budget_chars)
+        if turn_budget is not None and self._cfg.mcp.turn_result_budget_chars > 0:
+            left = int(turn_budget["chars"])
+            limit = max(MIN_RESULT_CHARS, min(limit, left) if limit > 0 else left)
+
+        fitted, truncated = fit_text(text, limit)
+        body: dict[str, Any] = {"text": fitted}
+        raw = result.get("raw")
+        if isinstance(raw, dict) and raw.get("isError"):
+            body["isError"] = True
+        if truncated:
+            body["truncated"] = {"shown_chars": len(fitted), "total_chars": len(text)}
+            path = spill_result(name, call_id, args, result, self.spill_dir)
+            if path is not None:
+                body["full_result"] = str(path)
+
+        if turn_budget is not None:
+            turn_budget["chars"] = max(0, int(turn_budget["chars"]) - len(fitted))
+        return json.dumps(body, ensure_ascii=False)
+
     def _post_json(self, url: str, payload: dict[str, Any]) -> dict[str, Any]:
         provider = self._provider()
         headers = {
@@ -349,26 +693,16 @@ class ChatClient:
             headers["Authorization"] = f"Bearer {provider.api_key}"
         headers.update(provider.extra_headers or {})
 
-        req = urllib.request.Request(
-            url,
-            data=json.dumps(payload).encode("utf-8"),
-            headers=headers,
-            method="POST",
-        )
-
-        context = None
-        if not provider.verify_tls:
-            context = ssl._create_unverified_context()
-
         try:
-            with urllib.request.urlopen(req, timeout=float(provider.timeout_s), context=context) as resp:
+            with self._send(url, payload, headers) as resp:
+                status = resp.status
                 raw = resp.read().decode("utf-8", errors="replace")
-        except urllib.error.HTTPError as e:
-            raw = e.read().decode("utf-8", errors="replace")
-            raise RuntimeError(f"http {e.code}: {raw}") from None
-        except urllib.error.URLError as e:
+        except (OSError, http.client.HTTPException) as e:
             raise RuntimeError(f"network error: {e}") from None
 
+        if status >= 400:
+            raise RuntimeError(f"http {status}: {raw}")
+
         try:
             data = json.loads(raw)
         except json.JSONDecodeError:
@@ -394,30 +728,36 @@ class ChatClient:
             headers["Authorization"] = f"Bearer {provider.api_key}"
         headers.update(provider.extra_headers or {})
 
-        req = urllib.request.Request(
-            url,
-            data=json.dumps(payload).encode("utf-8"),
-            headers=headers,
-            method="POST",
-        )
-
-        context = None
-        if not provider.verify_tls:
-            context = ssl._create_unverified_context()
-
         assistant_parts: list[str] = []
         tool_calls_acc: list[dict[str, Any]] = []
+        received = 0
+        finished = False
 
         def emit(event: dict[str, Any]) -> None:
             if callable(on_stream):
                 on_stream(event)
 
+        def interrupted(reason: str, retryable: bool = True) -> _StreamInterrupted:
+            return _StreamInterrupted(
+                reason,
+                content="".join(assistant_parts),
+                tool_calls=tool_calls_acc,
+                received_bytes=received,
+                retryable=retryable,
+            )
+
         try:
-            with urllib.request.urlopen(req, timeout=float(provider.timeout_s), context=context) as resp:
+            with self._send(url, payload, headers) as resp:
+                if resp.status >= 400:
+                    raw = resp.read().decode("utf-8", errors="replace")
+                    # Client errors (e.g. streaming unsupported) won't go away on retry.
+                    raise interrupted(f"http {resp.status}: {raw}", retryable=resp.status >= 500)
+
                 while True:
                     raw = resp.readline()
                     if not raw:
                         break
+                    received += len(raw)
                     line = raw.decode("utf-8", errors="replace").strip()
                     if not line:
                         continue
@@ -426,6 +766,7 @@ class ChatClient:
 
                     data_str = line[len("data:") :].strip()
                     if data_str == "[DONE]":
+                        finished = True
                         break
 
                     try:
@@ -443,6 +784,8 @@ class ChatClient:
                     choice0 = choices[0]
                     if not isinstance(choice0, dict):
                         continue
+                    if choice0.get("finish_reason"):
+                        finished = True
 
                     delta = choice0.get("delta")
                     if not isinstance(delta, dict):
@@ -457,10 +800,144 @@ class ChatClient:
                     if tool_calls_acc:
                         emit({"type": "tool_calls", "tool_calls": tool_calls_acc})
 
-        except urllib.error.HTTPError as e:
-            raw = e.read().decode("utf-8", errors="replace")
-            raise RuntimeError(f"http {e.code}: {raw}") from None
-        except urllib.error.URLError as e:
-            raise RuntimeError(f"network error: {e}") from None
+                # Drain the chunked trailer so the connection can go back to the pool.
+                resp.read()
 
+        except (ChatCancelled, _StreamInterrupted):
+            raise
+        except RuntimeError as e:
+            raise interrupted(str(e)) from None
+        except (OSError, http.client.HTTPException) as e:
+            raise interrupted(f"network error: {e}") from None
+
+        if not finished:
+            raise interrupted("stream ended before the reply was complete")
         return "".join(assistant_parts), tool_calls_acc
+
+    def _stream_with_recovery(
+        self,
+        url: str,
+        payload: dict[str, Any],
+        on_stream: Any,
+        emit: Any,
+        cancel: CancelToken | None,
+    ) -> tuple[str | None, list[dict[str, Any]], bool, str]:
+        # Returns (content, tool_calls, streamed_ok, kept_prefix). When streaming gives
+        # up, kept_prefix is text already shown that the fallback request must extend.
+        retries = max(0, int(self._cfg.chat.stream_retries))
+        kept = ""
+        attempt = 0
+
+        while True:
+            req = payload if not kept else _continuation_payload(payload, kept)
+            try:
+                content, tool_calls = self._post_json_stream(url, req, on_stream=on_stream)
+                return kept + content, tool_calls, True, ""
+            except _StreamInterrupted as e:
+                if cancel is not None:
+                    cancel.raise_if_cancelled()
+
+                wasted = 0
+                if e.tool_calls:
+                    # Half-streamed tool arguments can't be resumed; start over.
+                    action = "restart"
+                    wasted = e.received_bytes + len(kept.encode("utf-8"))
+                    kept = ""
+                    if callable(on_stream):
+                        on_stream({"type": "reset"})
+                elif e.content:
+                    action = "continue"
+                    kept += e.content
+                else:
+                    action = "retry"
+                    wasted = e.received_bytes
+
+                attempt += 1
+                give_up = not e.retryable or attempt > retries
+                emit(
+                    {
+                        "type": "stream_fallback",
+                        "reason": str(e),
+                        "action": "non_stream" if give_up else action,
+                        "attempt": attempt,
+                        "received_bytes": e.received_bytes,
+                        "wasted_bytes": wasted,
+                    }
+                )
+                if give_up:
+                    return None, [], False, kept
+
+                delay = min(4.0, 0.5 * 2 ** (attempt - 1))
+                if cancel is not None:
+                    cancel.wait(delay)
+                    cancel.raise_if_cancelled()
+                else:
+                    time.sleep(delay)
+
+    @contextlib.contextmanager
+    def _send(self, url: str, payload: dict[str, Any], headers: dict[str, str]) -> Iterator[PooledResponse]:
+        provider = self._provider()
+        limiter = limiter_for(provider)
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        tokens = estimate_tokens(body, payload)
+
+        cancel: CancelToken | None = getattr(self._local, "cancel", None)
+        attempt = 0
+        while True:
+            # The limiter wait covers Retry-After backoff; Esc must cut it short too.
+            lease = limiter.acquire(tokens, cancelled=None if cancel is None else lambda: cancel.cancelled)
+            if lease is None:
+                raise ChatCancelled("request cancelled")
+            sockets: list[Any] = []
+
+            def watch(sock: Any) -> None:
+                sockets.append(sock)
+                cancel._attach_socket(sock)
+
+            try:
+                resp = self._pool.request(
+                    "POST",
+                    url,
+                    body=body,
+                    headers=headers,
+                    timeout_s=float(provider.timeout_s),
+                    verify_tls=provider.verify_tls,
+                    on_socket=None if cancel is None else watch,
+                )
+            except (OSError, http.client.HTTPException) as e:
+                limiter.release(lease)
+                if cancel is not None and cancel.cancelled:
+                    raise ChatCancelled("request cancelled") from None
+                raise RuntimeError(f"network error: {e}") from None
+            except BaseException:
+                # Anything else must not leak the lease's in-flight slot either.
+                limiter.release(lease)
+                raise
+            finally:
+                for sock in sockets:
+                    cancel._detach_socket(sock)
+
+            if resp.status in THROTTLE_STATUSES and attempt < self._THROTTLE_RETRIES:
+                try:
+                    resp.read()
+                except (OSError, http.client.HTTPException):
+                    pass
+                resp.close()
+                limiter.release(lease, resp.status, resp.headers)
+                attempt += 1
+                continue
+            break
+
+        if cancel is not None:
+            cancel._attach(resp)
+        try:
+            yield resp
+        except (OSError, http.client.HTTPException):
+            if cancel is not None and cancel.cancelled:
+                raise ChatCancelled("request cancelled") from None
+            raise
+        finally:
+            if cancel is not None:
+                cancel._detach(resp)
+            resp.close()
+            limiter.release(lease, resp.status, resp.headers)
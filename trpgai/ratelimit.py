@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import email.utils
+import hashlib
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from .config import ProviderConfig
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+THROTTLE_STATUSES = {429, 503}
+
+
+def parse_duration_s(raw: Any) -> float | None:
+    # Accepts "1.5", "20ms", "6m0s", "1h2m3s" (OpenAI style x-ratelimit-reset-*).
+    if raw is None:
+        return None
+    s = str(raw).strip().lower()
+    if not s:
+        return None
+    try:
+        v = float(s)
+    except ValueError:
+        pass
+    else:
+        # Some providers send an absolute epoch instead of a delta.
+        if v > 1e9:
+            return max(0.0, v - time.time())
+        return max(0.0, v)
+
+    total = 0.0
+    pos = 0
+    for m in _DURATION_PART.finditer(s):
+        if m.start() != pos:
+            return None
+        n = float(m.group(1))
+        unit = m.group(2)
+        total += n / 1000.0 if unit == "ms" else n * {"s": 1, "m": 60, "h": 3600}[unit]
+        pos = m.end()
+    if pos != len(s) or pos == 0:
+        return None
+    return total
+
+
+def parse_retry_after_s(headers: Any) -> float | None:
+    if headers is None:
+        return None
+    ms = headers.get("retry-after-ms")
+    if ms is not None:
+        try:
+            return max(0.0, float(ms) / 1000.0)
+        except ValueError:
+            pass
+    raw = headers.get("retry-after")
+    if raw is None:
+        return None
+    secs = parse_duration_s(raw)
+    if secs is not None:
+        return secs
+    try:
+        when = email.utils.parsedate_to_datetime(str(raw))
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def _header_int(headers: Any, name: str) -> int | None:
+    raw = headers.get(name) if headers is not None else None
+    if raw is None:
+        return None
+    try:
+        return int(float(str(raw).strip()))
+    except ValueError:
+        return None
+
+
+def estimate_tokens(body: bytes, payload: dict[str, Any]) -> int:
+    # Rough prompt estimate (~4 bytes/token) plus the requested output budget.
+    out = 0
+    for key in ("max_completion_tokens", "max_output_tokens", "max_tokens"):
+        v = payload.get(key)
+        if isinstance(v, int):
+            out = v
+            break
+    return max(1, len(body) // 4 + out)
+
+
+@dataclass
+class Lease:
+    tokens: int
+    start: float
+
+
+class AdaptiveLimiter:
+    def __init__(self, name: str, initial: int = 8, min_limit: int = 1, max_limit: int = 64, max_wait_s: float = 60.0):
+        self.name = name
+        self._cond = threading.Condition()
+        self._min = max(1, int(min_limit))
+        self._max = max(self._min, int(max_limit))
+        self._max_wait_s = float(max_wait_s)
+
+        # AIMD-controlled concurrency windows.
+        self._limit = float(min(max(initial, self._min), self._max))
+        self._token_limit: float | None = None
+
+        self._in_flight = 0
+        self._tokens_in_flight = 0
+
+        # Last values advertised by the provider (monotonic deadlines).
+        self._remaining_requests: int | None = None
+        self._remaining_tokens: int | None = None
+        self._requests_reset_at = 0.0
+        self._tokens_reset_at = 0.0
+        self._blocked_until = 0.0
+
+        self._stats = {"requests": 0, "throttled": 0, "waits": 0, "wait_s": 0.0}
+
+    def acquire(self, tokens: int = 0, cancelled: Callable[[], bool] | None = None) -> Lease | None:
+        # Returns None, holding nothing, if cancelled() turns true while waiting.
+        tokens = max(0, int(tokens))
+        start = time.monotonic()
+        waited = False
+        # Nothing notifies the condition on cancel, so poll it in short slices.
+        slice_s = 1.0 if cancelled is None else 0.05
+        with self._cond:
+            while True:
+                if cancelled is not None and cancelled():
+                    return None
+                now = time.monotonic()
+                delay = self._delay_locked(now, tokens)
+                if delay <= 0:
+                    break
+                waited = True
+                self._cond.wait(timeout=min(delay, slice_s))
+
+            self._in_flight += 1
+            self._tokens_in_flight += tokens
+            self._stats["requests"] += 1
+            if waited:
+                self._stats["waits"] += 1
+                self._stats["wait_s"] += time.monotonic() - start
+        return Lease(tokens=tokens, start=start)
+
+    def release(self, lease: Lease, status: int | None = None, headers: Any = None) -> None:
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._tokens_in_flight = max(0, self._tokens_in_flight - lease.tokens)
+            self._observe_locked(lease, status, headers)
+            self._cond.notify_all()
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._cond:
+            now = time.monotonic()
+            return {
+                "limit": int(self._limit),
+                "token_limit": None if self._token_limit is None else int(self._token_limit),
+                "in_flight": self._in_flight,
+                "tokens_in_flight": self._tokens_in_flight,
+                "remaining_requests": self._remaining_requests if now < self._requests_reset_at else None,
+                "remaining_tokens": self._remaining_tokens if now < self._tokens_reset_at else None,
+                "blocked_for_s": round(max(0.0, self._blocked_until - now), 3),
+                "requests": self._stats["requests"],
+                "throttled": self._stats["throttled"],
+                "waits": self._stats["waits"],
+                "wait_s": round(self._stats["wait_s"], 3),
+            }
+
+    def _delay_locked(self, now: float, tokens: int) -> float:
+        if now < self._blocked_until:
+            return self._blocked_until - now
+
+        if self._in_flight >= int(self._limit):
+            return self._max_wait_s
+
+        if self._remaining_requests is not None and now < self._requests_reset_at:
+            if self._remaining_requests - self._in_flight <= 0:
+                return self._requests_reset_at - now
+
+        # Always let one request through so an oversized token estimate cannot deadlock.
+        if self._in_flight == 0:
+            return 0.0
+
+        budget = self._token_limit
+        if self._remaining_tokens is not None and now < self._tokens_reset_at:
+            budget = self._remaining_tokens if budget is None else min(budget, self._remaining_tokens)
+        if budget is not None and self._tokens_in_flight + tokens > budget:
+            if now < self._tokens_reset_at:
+                return self._tokens_reset_at - now
+            return self._max_wait_s
+
+        return 0.0
+
+    def _observe_locked(self, lease: Lease, status: int | None, headers: Any) -> None:
+        now = time.monotonic()
+
+        if headers is not None:
+            rr = _header_int(headers, "x-ratelimit-remaining-requests")
+            rt = _header_int(headers, "x-ratelimit-remaining-tokens")
+            if rr is not None:
+                self._remaining_requests = rr
+                reset = parse_duration_s(headers.get("x-ratelimit-reset-requests"))
+                self._requests_reset_at = now + (reset if reset is not None else 1.0)
+            if rt is not None:
+                self._remaining_tokens = rt
+                reset = parse_duration_s(headers.get("x-ratelimit-reset-tokens"))
+                self._tokens_reset_at = now + (reset if reset is not None else 1.0)
+
+        if status in THROTTLE_STATUSES:
+            self._stats["throttled"] += 1
+            # Multiplicative decrease.
+            self._limit = max(float(self._min), self._limit / 2.0)
+            token_bound = self._remaining_tokens is not None and self._remaining_tokens < lease.tokens
+            if token_bound or self._token_limit is not None:
+                base = self._token_limit if self._token_limit is not None else float(self._tokens_in_flight + lease.tokens)
+                self._token_limit = max(float(lease.tokens), base / 2.0)
+
+            wait = parse_retry_after_s(headers)
+            if wait is None:
+                wait = 1.0
+            self._blocked_until = max(self._blocked_until, now + min(wait, self._max_wait_s))
+            return
+
+        if status is not None and 200 <= status < 400:
+            # Additive increase: about +1 per window of successful requests.
+            self._limit = min(float(self._max), self._limit + 1.0 / max(1.0, self._limit))
+            if self._token_limit is not None:
+                self._token_limit += float(lease.tokens) / max(1.0, self._limit)
+
+
+_LIMITERS: dict[str, AdaptiveLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def _limiter_key(provider: ProviderConfig) -> str:
+    # Provider limits are per account, so split by key without storing it.
+    key_hash = hashlib.sha256(provider.api_key.encode("utf-8")).hexdigest()[:8] if provider.api_key else "-"
+    return f"{provider.base_url.rstrip('/')}#{key_hash}"
+
+
+def limiter_for(provider: ProviderConfig) -> AdaptiveLimiter:
+    key = _limiter_key(provider)
+    with _LIMITERS_LOCK:
+        lim = _LIMITERS.get(key)
+        if lim is None:
+            lim = AdaptiveLimiter(provider.base_url.rstrip("/"))
+            _LIMITERS[key] = lim
+        return lim
+
+
+def limiter_snapshots() -> dict[str, dict[str, Any]]:
+    with _LIMITERS_LOCK:
+        limiters = list(_LIMITERS.items())
+    return {key: lim.snapshot() for key, lim in limiters}
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any
+
+# 0 = off, 1 = lossless minify (drop empty/null annotations), 2 = also collapse
+# whitespace and strip non-essential keywords, 3 = also truncate descriptions.
+LEVEL_OFF = 0
+LEVEL_MINIFY = 1
+LEVEL_STRIP = 2
+LEVEL_TRUNCATE = 3
+
+# Keywords that document a schema but do not constrain arguments.
+_NON_ESSENTIAL = {
+    "title",
+    "examples",
+    "example",
+    "$comment",
+    "$schema",
+    "$id",
+    "deprecated",
+    "readOnly",
+    "writeOnly",
+}
+# Annotations that say nothing when null or empty; dropping them never changes validation.
+_DROP_IF_EMPTY = {"description", "title", "$comment", "examples", "required"}
+# Keywords whose value maps names to sub-schemas (keys are not keywords).
+_SCHEMA_MAPS = {"properties", "patternProperties", "$defs", "definitions", "dependentSchemas"}
+_SCHEMA_LISTS = {"allOf", "anyOf", "oneOf", "prefixItems"}
+_SCHEMA_VALUES = {"items", "additionalProperties", "not", "if", "then", "else", "contains", "propertyNames"}
+
+_SPACE = re.compile(r"[ \t]+")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+_REF = re.compile(r"#/(\$defs|definitions)/([^/\"]+)")
+
+
+def compact_text(text: str, level: int, max_chars: int = 160) -> str:
+    if level < LEVEL_STRIP:
+        return text
+    out = _BLANK_LINES.sub("\n", _SPACE.sub(" ", text)).strip()
+    if level >= LEVEL_TRUNCATE and len(out) > max_chars:
+        out = out[: max(1, max_chars - 1)].rstrip() + "…"
+    return out
+
+
+def compact_schema(schema: dict[str, Any], level: int, max_chars: int = 160) -> dict[str, Any]:
+    if level <= LEVEL_OFF:
+        return schema
+    out = _compact_node(schema, level, max_chars)
+    if level >= LEVEL_STRIP:
+        _prune_defs(out)
+    return out
+
+
+def json_size(value: Any) -> int:
+    return len(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def _compact_node(node: Any, level: int, max_chars: int) -> Any:
+    if not isinstance(node, dict):
+        return node
+    out: dict[str, Any] = {}
+    for key, value in node.items():
+        if level >= LEVEL_STRIP and (key in _NON_ESSENTIAL or key.startswith("x-")):
+            continue
+        if key in _DROP_IF_EMPTY and (value is None or value == "" or value == []):
+            continue
+        if key == "description" and isinstance(value, str):
+            value = compact_text(value, level, max_chars)
+            if not value:
+                continue
+        elif key in _SCHEMA_MAPS and isinstance(value, dict):
+            value = {name: _compact_node(sub, level, max_chars) for name, sub in value.items()}
+        elif key in _SCHEMA_LISTS and isinstance(value, list):
+            value = [_compact_node(sub, level, max_chars) for sub in value]
+        elif key in _SCHEMA_VALUES:
+            value = _compact_node(value, level, max_chars)
+        out[key] = value
+    return out
+
+
+def _prune_defs(schema: dict[str, Any]) -> None:
+    # Drops $defs/definitions entries no $ref can reach.
+    for bucket in ("$defs", "definitions"):
+        defs = schema.get(bucket)
+        if not isinstance(defs, dict):
+            continue
+        rest = {k: v for k, v in schema.items() if k != bucket}
+        pending = [name for b, name in _REF.findall(json.dumps(rest)) if b == bucket]
+        reachable: set[str] = set()
+        while pending:
+            name = pending.pop()
+            if name in reachable or name not in defs:
+                continue
+            reachable.add(name)
+            pending.extend(n for b, n in _REF.findall(json.dumps(defs[name])) if b == bucket)
+        if reachable:
+            schema[bucket] = {k: v for k, v in defs.items() if k in reachable}
+        else:
+            del schema[bucket]
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+
+# Terminal cell widths. ASCII text takes the fast path (one cell per char);
+# other code points are classified once and memoized.
+_WIDTHS: dict[str, int] = {}
+_TOKEN = re.compile(r"\s+|\S+")
+
+
+def char_width(ch: str) -> int:
+    w = _WIDTHS.get(ch)
+    if w is None:
+        w = _classify(ch)
+        _WIDTHS[ch] = w
+    return w
+
+
+def _classify(ch: str) -> int:
+    # Combining marks, variation selectors and format characters (ZWJ, ZWSP)
+    # take no cell of their own.
+    if unicodedata.category(ch) in ("Mn", "Me", "Cf"):
+        return 0
+    if unicodedata.east_asian_width(ch) in ("W", "F"):
+        return 2
+    return 1
+
+
+def str_width(s: str) -> int:
+    if s.isascii():
+        return len(s)
+    widths = _WIDTHS
+    total = 0
+    for ch in s:
+        w = widths.get(ch)
+        if w is None:
+            w = char_width(ch)
+        total += w
+    return total
+
+
+def slice_cols(s: str, start: int, max_cols: int) -> tuple[str, int]:
+    # The longest run from start that fits in max_cols cells, and its end index.
+    end = _fit(s, start, max_cols)
+    return s[start:end], end
+
+
+def _fit(s: str, start: int, max_cols: int) -> int:
+    if s.isascii():
+        return min(len(s), start + max(0, max_cols))
+    cols = 0
+    i = start
+    n = len(s)
+    while i < n:
+        w = char_width(s[i])
+        if cols + w > max_cols:
+            break
+        cols += w
+        i += 1
+    return i
+
+
+def wrap(text: str, width: int) -> list[str]:
+    # Greedy word wrap measured in cells, like textwrap.wrap with its defaults:
+    # leading indentation of the paragraph is kept, whitespace at breaks dropped,
+    # words longer than a line split. Runs containing wide (CJK) characters break
+    # anywhere, filling the current line first.
+    width = max(1, int(width))
+    text = text.expandtabs()
+    ascii_only = text.isascii()
+    if ascii_only and len(text) <= width:
+        line = text.rstrip()
+        return [line] if line else []
+
+    lines: list[str] = []
+    cur: list[str] = []
+    cur_w = 0
+    measure = len if ascii_only else str_width
+
+    def flush() -> None:
+        nonlocal cur, cur_w
+        line = "".join(cur).rstrip()
+        if line:
+            lines.append(line)
+        cur = []
+        cur_w = 0
+
+    for m in _TOKEN.finditer(text):
+        tok = m.group()
+        tw = measure(tok)
+        if tok[0].isspace():
+            if cur or not lines:
+                cur.append(tok)
+                cur_w += tw
+            continue
+        if cur_w + tw <= width:
+            cur.append(tok)
+            cur_w += tw
+            continue
+        if tw <= width and tw <= len(tok):
+            # A narrow word that fits on a line of its own moves there whole.
+            flush()
+            cur.append(tok)
+            cur_w = tw
+            continue
+
+        i = 0
+        while i < len(tok):
+            room = width - cur_w
+            end = _fit(tok, i, room)
+            if end == i and not cur:
+                end = i + 1
+            while end < len(tok) and char_width(tok[end]) == 0:
+                end += 1
+            if end > i:
+                piece = tok[i:end]
+                cur.append(piece)
+                cur_w += measure(piece)
+                i = end
+            if i < len(tok):
+                flush()
+
+    flush()
+    return lines
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from typing import Any
+
+from .mcp_client import McpTool
+
+_CAMEL = re.compile(r"([a-z0-9])([A-Z])")
+_TOKEN = re.compile(r"[a-z0-9]+|[^\x00-\x7f\s\W]+")
+
+
+def tokenize(text: str) -> list[str]:
+    # ASCII words (camelCase/snake_case split, light plural folding) and
+    # character bigrams for non-ASCII runs such as Japanese.
+    out: list[str] = []
+    for tok in _TOKEN.findall(_CAMEL.sub(r"\1 \2", text).lower()):
+        if tok.isascii():
+            if len(tok) > 3 and tok.endswith("s") and not tok.endswith("ss"):
+                tok = tok[:-1]
+            out.append(tok)
+        elif len(tok) == 1:
+            out.append(tok)
+        else:
+            out.extend(tok[i : i + 2] for i in range(len(tok) - 1))
+    return out
+
+
+def _schema_terms(schema: Any, out: list[str], depth: int = 0) -> None:
+    if depth > 4 or not isinstance(schema, dict):
+        return
+    props = schema.get("properties")
+    if isinstance(props, dict):
+        for key, sub in props.items():
+            out.append(str(key))
+            _schema_terms(sub, out, depth + 1)
+    items = schema.get("items")
+    if isinstance(items, dict):
+        _schema_terms(items, out, depth + 1)
+
+
+def _tool_terms(tool: McpTool) -> Counter[str]:
+    name = tokenize(tool.mcp_name)
+    # Names are the strongest signal; count them twice.
+    terms = name + name + tokenize(tool.description)
+    props: list[str] = []
+    _schema_terms(tool.input_schema, props)
+    for p in props:
+        terms.extend(tokenize(p))
+    return Counter(terms)
+
+
+class ToolIndex:
+    # Okapi BM25 over MCP tool names, descriptions and schema property names.
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self._k1 = float(k1)
+        self._b = float(b)
+        # public name -> (tool object it was built from, term frequencies, length)
+        self._docs: dict[str, tuple[McpTool, Counter[str], int]] = {}
+        self._postings: dict[str, dict[str, int]] = {}
+        self._total_len = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def sync(self, tools: list[McpTool]) -> int:
+        # Re-indexes only tools that were added or replaced; returns how many.
+        current = {t.public_name: t for t in tools}
+        for name in [n for n in self._docs if n not in current]:
+            self._remove(name)
+
+        changed = 0
+        for name, tool in current.items():
+            doc = self._docs.get(name)
+            if doc is not None and doc[0] is tool:
+                continue
+            if doc is not None:
+                self._remove(name)
+            tf = _tool_terms(tool)
+            length = sum(tf.values())
+            self._docs[name] = (tool, tf, length)
+            self._total_len += length
+            for term, n in tf.items():
+                self._postings.setdefault(term, {})[name] = n
+            changed += 1
+        return changed
+
+    def search(self, query: str, k: int) -> list[tuple[str, float]]:
+        n_docs = len(self._docs)
+        if n_docs == 0 or k <= 0:
+            return []
+        avg_len = self._total_len / n_docs
+        scores: dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1.0 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for name, tf in postings.items():
+                length = self._docs[name][2]
+                norm = tf + self._k1 * (1.0 - self._b + self._b * length / avg_len)
+                scores[name] = scores.get(name, 0.0) + idf * tf * (self._k1 + 1.0) / norm
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        return ranked[:k]
+
+    def _remove(self, name: str) -> None:
+        _tool, tf, length = self._docs.pop(name)
+        self._total_len -= length
+        for term in tf:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(name, None)
+            if not postings:
+                del self._postings[term]
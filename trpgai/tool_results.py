@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any
+
+from .config import default_cache_dir
+
+# Spilled results older than the newest _KEEP_SPILLS are deleted on write.
+_KEEP_SPILLS = 200
+# Even an exhausted turn budget leaves each result this much room.
+MIN_RESULT_CHARS = 400
+
+
+def default_spill_dir() -> Path:
+    return default_cache_dir() / "tool_results"
+
+
+def fit_text(text: str, limit: int) -> tuple[str, bool]:
+    # Keeps the head and a short tail, which is where tables and totals tend to be.
+    if limit <= 0 or len(text) <= limit:
+        return text, False
+    tail = limit // 5
+    head = limit - tail
+    return text[:head].rstrip() + "\n…\n" + text[len(text) - tail :].lstrip(), True
+
+
+def spill_result(
+    tool_name: str,
+    call_id: str,
+    arguments: dict[str, Any],
+    result: dict[str, Any],
+    spill_dir: Path | None = None,
+) -> Path | None:
+    spill_dir = spill_dir or default_spill_dir()
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", f"{tool_name}-{call_id}")[:80]
+    path = spill_dir / f"{time.strftime('%Y%m%d-%H%M%S')}-{safe}.json"
+    body = {"tool": tool_name, "arguments": arguments, "text": result.get("text"), "raw": result.get("raw")}
+    try:
+        spill_dir.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(body, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        _prune(spill_dir)
+    except OSError:
+        return None
+    return path
+
+
+def _prune(spill_dir: Path) -> None:
+    files = sorted(spill_dir.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in files[_KEEP_SPILLS:]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
@@ -1,18 +1,23 @@
 from __future__ import annotations
 
+import collections
+import dataclasses
 import importlib
 import json
 import locale
-import textwrap
+import queue
+import threading
 import time
-import unicodedata
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
-from .config import AppConfig, McpConfig, McpServerConfig, ProviderConfig, default_config_path, save_config
+from .config import AppConfig, ProviderConfig, default_config_path, save_config
 from .dice import DiceSyntaxError, roll_expression
-from .openai_client import ChatClient, ChatMessage
+from .openai_client import CancelToken, ChatCancelled, ChatClient, ChatMessage
+from .textwidth import wrap
 from .tui_config import edit_config_tui_in_session
+from .tui_input import InputBuffer
+from .tui_render import FrameScheduler, Screen
 
 
 def _format_tool_call(call: dict[str, Any]) -> str:
@@ -72,6 +77,16 @@ def _format_tool_result(tool_call_id: str | None, content: str | None) -> str:
     return header + "\n" + body
 
 
+def _tool_result_state(content: Any) -> str:
+    try:
+        parsed = json.loads(content) if isinstance(content, str) else None
+    except json.JSONDecodeError:
+        parsed = None
+    if isinstance(parsed, dict) and parsed.get("error") in ("timeout", "cancelled"):
+        return str(parsed["error"]).upper()
+    return "DONE"
+
+
 def _tool_name_from_call(call: dict[str, Any]) -> str:
     fn = call.get("function")
     if isinstance(fn, dict):
@@ -81,7 +96,45 @@ def _tool_name_from_call(call: dict[str, Any]) -> str:
     return ""
 
 
-def _format_tool_status(tool_call_id: str, call: dict[str, Any], state: str, elapsed_s: float | None) -> str:
+# How long a pre-warmed connection is trusted before typing triggers a refresh.
+_PREWARM_INTERVAL_S = 15.0
+
+_ENTER_KEYS = (10, 13, "\n", "\r")
+# Input region height cap, and how many queued keys are handled before a redraw.
+_MAX_INPUT_ROWS = 6
+_MAX_KEY_BURST = 65536
+
+
+def _format_net_stats(pool: dict[str, Any], limiter: dict[str, Any]) -> str:
+    rate = pool.get("prewarm_hit_rate")
+    rate_s = "--" if rate is None else f"{rate * 100:.0f}%"
+    return "\n".join(
+        [
+            f"pool: requests={pool.get('requests')} reused={pool.get('reused')} opened={pool.get('opened')} "
+            f"stale={pool.get('stale')} idle={pool.get('idle')}",
+            f"prewarm: count={pool.get('prewarms')} hits={pool.get('prewarm_hits')} "
+            f"wasted={pool.get('prewarm_wasted')} hit_rate={rate_s}",
+            f"limiter: limit={limiter.get('limit')} in_flight={limiter.get('in_flight')} "
+            f"throttled={limiter.get('throttled')} waits={limiter.get('waits')} wait_s={limiter.get('wait_s')}",
+        ]
+    )
+
+
+def _format_render_stats(frames: dict[str, int], repaints: dict[str, int]) -> str:
+    regions = " ".join(f"{k}={v}" for k, v in repaints.items())
+    return (
+        f"render: frames={frames.get('frames')} skipped={frames.get('skipped')} "
+        f"max_fps={frames.get('max_fps')} repaints: {regions}"
+    )
+
+
+def _format_tool_status(
+    tool_call_id: str,
+    call: dict[str, Any],
+    state: str,
+    elapsed_s: float | None,
+    detail: str = "",
+) -> str:
     name = _tool_name_from_call(call)
     header = f"{state}"
     if name:
@@ -90,9 +143,26 @@ def _format_tool_status(tool_call_id: str, call: dict[str, Any], state: str, ela
         header += f"  id={tool_call_id}"
     if elapsed_s is not None:
         header += f"  {elapsed_s:.2f}s"
+    if detail:
+        header += f"  {detail}"
     return header
 
 
+def _format_progress(ev: dict[str, Any]) -> str:
+    progress = ev.get("progress")
+    total = ev.get("total")
+    parts: list[str] = []
+    if isinstance(progress, (int, float)) and isinstance(total, (int, float)) and total > 0:
+        parts.append(f"{min(100.0, 100.0 * progress / total):.0f}%")
+    elif isinstance(progress, (int, float)):
+        parts.append(f"{progress:g}")
+    message = ev.get("message")
+    if isinstance(message, str) and message.strip():
+        # Status slots are a single line.
+        parts.append(" ".join(message.split())[:120])
+    return "  ".join(parts)
+
+
 def run_chat_tui(cfg: AppConfig, share_roll: bool, config_path: Path | None = None) -> int:
     try:
         locale.setlocale(locale.LC_ALL, "")
@@ -124,63 +194,118 @@ def _ensure_system_message(messages: list[ChatMessage], system_prompt: str) -> l
     return out
 
 
-def _wcwidth_char(ch: str) -> int:
-    if not ch:
-        return 0
-    if unicodedata.combining(ch):
-        return 0
-    eaw = unicodedata.east_asian_width(ch)
-    if eaw in {"W", "F"}:
-        return 2
-    return 1
-
-
-def _wcswidth(s: str) -> int:
-    return sum(_wcwidth_char(ch) for ch in s)
-
-
-def _slice_to_cols(s: str, start: int, max_cols: int) -> tuple[str, int]:
-    cols = 0
-    i = start
-    out: list[str] = []
-    while i < len(s):
-        w = _wcwidth_char(s[i])
-        if cols + w > max_cols:
-            break
-        cols += w
-        out.append(s[i])
-        i += 1
-    return "".join(out), i
-
-
-def _wrap_transcript(transcript: list[tuple[str, str]], width: int) -> list[tuple[str, str]]:
+def _wrap_entry(who: str, text: str, width: int) -> list[tuple[str, str]]:
     lines: list[tuple[str, str]] = []
     w = max(10, width)
+    prefix = f"{who}> "
+    avail = max(4, w - len(prefix) - 1)
+    parts = text.splitlines() or [""]
+    first = True
+    for part in parts:
+        wrapped = wrap(part, avail) or [""]
+        for seg in wrapped:
+            if first:
+                lines.append((who, prefix + seg))
+                first = False
+            else:
+                lines.append((who, " " * len(prefix) + seg))
+        first = False
 
-    for who, text in transcript:
-        prefix = f"{who}> "
-        avail = max(4, w - len(prefix) - 1)
-        parts = text.splitlines() or [""]
-        first = True
-        for part in parts:
-            wrapped = textwrap.wrap(part, width=avail) or [""]
-            for seg in wrapped:
-                if first:
-                    lines.append((who, prefix + seg))
-                    first = False
-                else:
-                    lines.append((who, " " * len(prefix) + seg))
-            first = False
+    lines.append((who, ""))
+    return lines
 
-        lines.append((who, ""))
 
-    return lines
+class _Transcript:
+    # The chat log plus each entry's wrapped lines at the current width. An entry
+    # is rewrapped only when replaced (streaming and tool status slots) or when
+    # the width changes, and drawing walks back from the bottom over cached line
+    # counts, so a redraw costs the visible lines rather than the whole history.
+    def __init__(self, entries: list[tuple[str, str]] | None = None):
+        self._entries: list[tuple[str, str]] = []
+        self._lines: list[list[tuple[str, str]] | None] = []
+        self._dirty: set[int] = set()
+        self._width = 0
+        self._total = 0
+        # Bumped on every change, so the screen can tell when to repaint.
+        self.version = 0
+        for entry in entries or []:
+            self.append(entry)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __getitem__(self, i: int) -> tuple[str, str]:
+        return self._entries[i]
+
+    def __setitem__(self, i: int, entry: tuple[str, str]) -> None:
+        i = range(len(self._entries))[i]
+        self._entries[i] = entry
+        self._forget(i)
+        self._dirty.add(i)
+        self.version += 1
+
+    def append(self, entry: tuple[str, str]) -> None:
+        self._entries.append(entry)
+        self._lines.append(None)
+        self._dirty.add(len(self._entries) - 1)
+        self.version += 1
+
+    def pop(self, i: int = -1) -> tuple[str, str]:
+        i = range(len(self._entries))[i]
+        self._forget(i)
+        self._lines.pop(i)
+        self._dirty = {j - 1 if j > i else j for j in self._dirty if j != i}
+        self.version += 1
+        return self._entries.pop(i)
+
+    def total_lines(self, width: int) -> int:
+        if width != self._width:
+            self._width = width
+            self._total = 0
+            self._lines = [None] * len(self._entries)
+            self._dirty = set(range(len(self._entries)))
+        for i in self._dirty:
+            lines = _wrap_entry(*self._entries[i], width=width)
+            self._lines[i] = lines
+            self._total += len(lines)
+        self._dirty.clear()
+        return self._total
+
+    def window(self, width: int, scroll: int, height: int) -> list[tuple[str, str]]:
+        # The height lines ending scroll lines above the bottom.
+        total = self.total_lines(width)
+        end = total - min(max(0, scroll), max(0, total - height))
+        start = max(0, end - height)
+
+        out: list[tuple[str, str]] = []
+        pos = total
+        for i in range(len(self._lines) - 1, -1, -1):
+            lines = self._lines[i] or []
+            top = pos - len(lines)
+            if top < end:
+                out[:0] = lines[max(0, start - top) : end - top]
+            pos = top
+            if pos <= start:
+                break
+        return out
+
+    def _forget(self, i: int) -> None:
+        lines = self._lines[i]
+        if lines is not None:
+            self._total -= len(lines)
+            self._lines[i] = None
 
 
 def _chat_loop(c: Any, stdscr: Any, cfg: AppConfig, share_roll: bool, path: Path) -> int:
     c.curs_set(1)
     stdscr.keypad(True)
 
+    try:
+        # Esc cancels in-flight requests; don't make it wait a full second.
+        c.set_escdelay(25)
+    except Exception:
+        pass
+
     try:
         c.use_default_colors()
         c.init_pair(1, c.COLOR_CYAN, -1)
@@ -193,32 +318,26 @@ def _chat_loop(c: Any, stdscr: Any, cfg: AppConfig, share_roll: bool, path: Path
     client = ChatClient(cfg)
     messages: list[ChatMessage] = _ensure_system_message([], cfg.chat.system_prompt)
 
-    transcript: list[tuple[str, str]] = []
-    transcript.append(("sys", "TRPGAI TUI chat. /help for commands."))
+    transcript = _Transcript([("sys", "TRPGAI TUI chat. /help for commands.")])
 
-    input_buf = ""
-    cursor = 0
+    editor = InputBuffer()
     scroll = 0
     status = ""
 
-    def max_scroll(wrapped: list[tuple[str, str]], h: int) -> int:
-        view_h = max(1, h - 2)
-        return max(0, len(wrapped) - view_h)
+    # Model turns run on a worker thread; it only talks to the UI through this queue.
+    events: "queue.Queue[tuple[str, Any]]" = queue.Queue()
+    turn: dict[str, Any] | None = None
+    # Slow commands (/mcp sync, /mcp tools) run on a worker too; Esc stops waiting for them.
+    job: dict[str, Any] | None = None
 
-    def draw() -> None:
-        nonlocal status
-        stdscr.erase()
-        h, w = stdscr.getmaxyx()
-
-        wrapped = _wrap_transcript(transcript, width=w)
-        ms = max_scroll(wrapped, h)
-        nonlocal_scroll = min(max(0, scroll), ms)
+    screen = Screen(c, stdscr)
+    frames = FrameScheduler(cfg.chat.tui_max_fps)
 
-        view_h = max(1, h - 2)
-        end = len(wrapped) - nonlocal_scroll
-        start = max(0, end - view_h)
+    def max_scroll(w: int) -> int:
+        return max(0, transcript.total_lines(w) - screen.transcript_rows())
 
-        for row, (who, line) in enumerate(wrapped[start:end], start=0):
+    def paint_transcript(win: Any, h: int, w: int) -> None:
+        for row, (who, line) in enumerate(transcript.window(w, scroll, h)):
             attr = 0
             try:
                 if who == "you":
@@ -232,108 +351,421 @@ def _chat_loop(c: Any, stdscr: Any, cfg: AppConfig, share_roll: bool, path: Path
             except Exception:
                 attr = 0
 
-            stdscr.addnstr(row, 0, line, max(0, w - 1), attr)
-
-        hint = "PgUp/PgDn scroll  Enter send  /roll  /config  /model  /mcp  /reset  /exit"
-        stdscr.addnstr(h - 2, 0, status or hint, max(0, w - 1))
+            win.addnstr(row, 0, line, max(0, w - 1), attr)
 
+    def paint_input(win: Any, h: int, w: int) -> None:
         prompt = "you> "
-        avail_cols = max(1, w - len(prompt) - 1)
-
-        hoff = 0
-        while hoff < cursor and _wcswidth(input_buf[hoff:cursor]) > avail_cols:
-            hoff += 1
-
-        visible, _end = _slice_to_cols(input_buf, hoff, avail_cols)
-        stdscr.addnstr(h - 1, 0, prompt + visible, max(0, w - 1))
+        rows, cur_y, cur_x = editor.view(max(1, w - len(prompt) - 1), h)
+        for y, row in enumerate(rows):
+            lead = prompt if y == 0 else " " * len(prompt)
+            win.addnstr(y, 0, lead + row, max(0, w - 1))
+        win.move(cur_y, min(len(prompt) + cur_x, max(0, w - 1)))
 
-        cur_x = len(prompt) + _wcswidth(input_buf[hoff:cursor])
-        stdscr.move(h - 1, min(int(cur_x), max(0, w - 1)))
-
-        stdscr.refresh()
+    def draw() -> bool:
+        nonlocal status
+        hint = "PgUp/PgDn scroll  Enter send  /roll  /config  /model  /mcp  /reset  /exit"
+        if turn is not None and turn["tool_status_slots"]:
+            hint = "running tool...  Esc cancel tool  Esc Esc cancel reply  PgUp/PgDn scroll"
+        elif turn is not None:
+            hint = "thinking...  Esc cancel  PgUp/PgDn scroll"
+        elif job is not None:
+            hint = f"{job['label']}...  Esc stop waiting  PgUp/PgDn scroll"
+        status_line = status or hint
+
+        screen.input_rows = min(editor.line_count(), _MAX_INPUT_ROWS)
+        drawn = screen.render(
+            {
+                "transcript": ((transcript.version, scroll), paint_transcript),
+                "status": (status_line, lambda win, _h, w: win.addnstr(0, 0, status_line, max(0, w - 1))),
+                "input": (editor.version, paint_input),
+            }
+        )
         status = ""
+        return drawn
 
     def append(who: str, text: str) -> None:
         nonlocal scroll
         transcript.append((who, text))
         scroll = 0
 
-    while True:
-        draw()
+    def on_stream(ev: dict[str, Any]) -> None:
+        if turn is None:
+            return
+        t = ev.get("type")
+
+        if t == "start":
+            # Each model call in the turn streams into its own slot.
+            slot = turn["stream_slot"]
+            if slot is not None and 0 <= slot < len(transcript) and not turn["stream_text"]:
+                transcript.pop(slot)
+            turn["stream_slot"] = len(transcript)
+            turn["stream_text"] = ""
+            transcript.append(("ai", ""))
+
+        elif t == "reset":
+            # The client discarded what was streamed so far and is starting over.
+            turn["stream_text"] = ""
+            slot = turn["stream_slot"]
+            if slot is not None and 0 <= slot < len(transcript):
+                transcript[slot] = ("ai", "")
+
+        elif t == "content_delta":
+            d = ev.get("delta")
+            if isinstance(d, str) and d:
+                turn["stream_text"] += d
+                slot = turn["stream_slot"]
+                if slot is not None and 0 <= slot < len(transcript):
+                    transcript[slot] = ("ai", turn["stream_text"])
+
+    def on_event(ev: dict[str, Any]) -> None:
+        if turn is None:
+            return
+        t = ev.get("type")
+        tool_status_slots: dict[str, tuple[int, float, dict[str, Any]]] = turn["tool_status_slots"]
+
+        if t == "assistant_tool_calls":
+            # If streaming produced deltas, the assistant text is already on screen.
+            # If streaming falls back (no deltas), we still want to show the content.
+            content = ev.get("content")
+            if isinstance(content, str) and content.strip():
+                if not (cfg.chat.stream and turn["stream_text"]):
+                    append("ai", content)
+
+            calls = ev.get("tool_calls")
+            if isinstance(calls, list):
+                for call in calls:
+                    if isinstance(call, dict):
+                        append("tool", _format_tool_call(call))
+
+        elif t == "tool_result":
+            tool_call_id = ev.get("tool_call_id")
+            content = ev.get("content")
+            tool_call_id_s = str(tool_call_id) if tool_call_id else ""
+
+            if tool_call_id_s and tool_call_id_s in tool_status_slots:
+                slot, start_t, call = tool_status_slots[tool_call_id_s]
+                elapsed = time.monotonic() - start_t
+                if 0 <= slot < len(transcript):
+                    state = _tool_result_state(content)
+                    transcript[slot] = ("tool", _format_tool_status(tool_call_id_s, call, state, elapsed))
+                tool_status_slots.pop(tool_call_id_s, None)
+
+            append("tool", _format_tool_result(tool_call_id_s or None, content))
+
+        elif t == "tool_progress":
+            tool_call_id_s = str(ev.get("tool_call_id") or "")
+            if tool_call_id_s in tool_status_slots:
+                slot, start_t, call = tool_status_slots[tool_call_id_s]
+                elapsed = time.monotonic() - start_t
+                if 0 <= slot < len(transcript):
+                    line = _format_tool_status(tool_call_id_s, call, "RUNNING", elapsed, _format_progress(ev))
+                    transcript[slot] = ("tool", line)
+
+        elif t == "tool_start":
+            tool_call_id = ev.get("tool_call_id")
+            call = ev.get("call")
+            tool_call_id_s = str(tool_call_id) if tool_call_id else ""
+            call_d = call if isinstance(call, dict) else {}
+
+            if tool_call_id_s:
+                slot = len(transcript)
+                transcript.append(("tool", _format_tool_status(tool_call_id_s, call_d, "RUNNING", None)))
+                tool_status_slots[tool_call_id_s] = (slot, time.monotonic(), call_d)
+
+        elif t == "assistant_final":
+            content = ev.get("content")
+            if isinstance(content, str):
+                if not (cfg.chat.stream and turn["stream_text"]):
+                    append("ai", content)
+
+        elif t == "mcp_error":
+            err = ev.get("error")
+            append("err", f"mcp error: {err}")
+
+        elif t == "stream_fallback":
+            action = str(ev.get("action") or "")
+            wasted = ev.get("wasted_bytes") or 0
+            append("sys", f"stream interrupted ({ev.get('reason')}): {action.replace('_', '-')}, wasted {wasted} B")
+
+    def run_turn(turn_client: ChatClient, turn_messages: list[ChatMessage], token: CancelToken) -> None:
         try:
-            ch = stdscr.get_wch()
+            _text, new_messages = turn_client.chat(
+                turn_messages,
+                on_stream=lambda ev: events.put(("stream", ev)),
+                on_event=lambda ev: events.put(("event", ev)),
+                cancel=token,
+            )
+        except ChatCancelled:
+            events.put(("cancelled", None))
+        except Exception as e:
+            events.put(("error", e))
+        else:
+            events.put(("done", new_messages))
+
+    def start_turn() -> None:
+        nonlocal turn
+        token = CancelToken()
+        worker = threading.Thread(target=run_turn, args=(client, list(messages), token), daemon=True)
+        turn = {
+            "token": token,
+            "thread": worker,
+            "stream_slot": None,
+            "stream_text": "",
+            "tool_status_slots": {},
+        }
+        worker.start()
+
+    def start_job(
+        label: str,
+        work: Callable[..., Any],
+        args: tuple[Any, ...],
+        on_done: Callable[[Any], None],
+    ) -> None:
+        nonlocal job
+        started = {"label": label, "on_done": on_done}
+
+        def run() -> None:
+            try:
+                result = work(*args)
+            except Exception as e:
+                events.put(("job", (started, False, e)))
+            else:
+                events.put(("job", (started, True, result)))
+
+        job = started
+        threading.Thread(target=run, daemon=True).start()
+
+    def finish_job(payload: tuple[dict[str, Any], bool, Any]) -> None:
+        nonlocal job
+        done, ok, value = payload
+        if done is not job:
+            # Abandoned with Esc.
+            return
+        job = None
+        if ok:
+            done["on_done"](value)
+        else:
+            append("err", f"{done['label']} failed: {value}")
+
+    prewarm_state: dict[str, Any] = {"thread": None, "last": 0.0}
+
+    def maybe_prewarm(was_empty: bool) -> None:
+        # Warm up when typing starts, and again if the draft outlives the keep-alive window.
+        if turn is not None:
+            return
+        now = time.monotonic()
+        if not was_empty and now - prewarm_state["last"] < _PREWARM_INTERVAL_S:
+            return
+        running = prewarm_state["thread"]
+        if running is not None and running.is_alive():
+            return
+        prewarm_state["last"] = now
+
+        target = client
+
+        def run() -> None:
+            try:
+                target.prewarm()
+            except Exception:
+                pass
+
+        t = threading.Thread(target=run, daemon=True)
+        prewarm_state["thread"] = t
+        t.start()
+
+    def finish_turn(kind: str, payload: Any) -> None:
+        nonlocal turn, messages
+        if turn is None:
+            return
+        # The turn just used the pooled connections.
+        prewarm_state["last"] = time.monotonic()
+        for tool_call_id_s, (tool_slot, start_t, call) in turn["tool_status_slots"].items():
+            if 0 <= tool_slot < len(transcript):
+                elapsed = time.monotonic() - start_t
+                transcript[tool_slot] = ("tool", _format_tool_status(tool_call_id_s, call, kind.upper(), elapsed))
+        slot = turn["stream_slot"]
+        if slot is not None and 0 <= slot < len(transcript) and not turn["stream_text"]:
+            transcript.pop(slot)
+        turn = None
+
+        if kind == "done":
+            messages = payload
+        elif kind == "cancelled":
+            append("sys", "(request cancelled)")
+        else:
+            append("err", f"error: {payload}")
+
+    def drain_events() -> bool:
+        changed = False
+        while True:
+            try:
+                kind, payload = events.get_nowait()
+            except queue.Empty:
+                return changed
+            changed = True
+            if kind == "stream":
+                on_stream(payload)
+            elif kind == "event":
+                on_event(payload)
+            elif kind == "job":
+                finish_job(payload)
+            else:
+                finish_turn(kind, payload)
+
+    def read_key(win: Any) -> Any:
+        try:
+            ch = win.get_wch()
+        except AttributeError:
+            ch = win.getch()
         except Exception:
-            ch = stdscr.getch()
+            # get_wch raises on timeout; that is just an idle tick.
+            return None
+        return None if ch == -1 else ch
+
+    pending: "collections.deque[Any]" = collections.deque()
+    frames.request()
+    while True:
+        if not pending:
+            if drain_events():
+                frames.request()
+            if frames.due():
+                frames.frame_done(draw())
+
+            # Wait for a key until the next frame is due; when idle, wake up to poll the worker.
+            wait = frames.wait_s()
+            win = screen.input
+            win.timeout(50 if wait is None else min(50, int(wait * 1000) + 1))
+            ch = read_key(win)
+            if ch is None:
+                continue
+            # Take every key that is already waiting (a paste arrives as one burst)
+            # and handle them all before the next redraw.
+            pending.append(ch)
+            win.nodelay(True)
+            while len(pending) < _MAX_KEY_BURST:
+                ch = read_key(win)
+                if ch is None:
+                    break
+                pending.append(ch)
+            win.nodelay(False)
+            frames.request()
+
+        ch = pending.popleft()
 
         if isinstance(ch, int) and ch == c.KEY_RESIZE:
             continue
 
         if ch in (3, "\x03"):
+            if turn is not None:
+                turn["token"].cancel()
             append("sys", "(exit)")
             break
 
         if isinstance(ch, int) and ch in (c.KEY_PPAGE,):
-            h, w = stdscr.getmaxyx()
-            wrapped = _wrap_transcript(transcript, width=w)
-            scroll = min(max_scroll(wrapped, h), scroll + max(1, (h - 2) // 2))
+            w = stdscr.getmaxyx()[1]
+            scroll = min(max_scroll(w), scroll + max(1, screen.transcript_rows() // 2))
             continue
 
         if isinstance(ch, int) and ch in (c.KEY_NPAGE,):
-            scroll = max(0, scroll - max(1, (stdscr.getmaxyx()[0] - 2) // 2))
+            scroll = max(0, scroll - max(1, screen.transcript_rows() // 2))
             continue
 
         if isinstance(ch, int) and ch in (c.KEY_LEFT,):
-            cursor = max(0, cursor - 1)
+            editor.left()
             continue
 
         if isinstance(ch, int) and ch in (c.KEY_RIGHT,):
-            cursor = min(len(input_buf), cursor + 1)
+            editor.right()
+            continue
+
+        if isinstance(ch, int) and ch in (c.KEY_UP,):
+            editor.up()
+            continue
+
+        if isinstance(ch, int) and ch in (c.KEY_DOWN,):
+            editor.down()
             continue
 
         if isinstance(ch, int) and ch in (c.KEY_HOME,):
-            cursor = 0
+            editor.home()
             continue
 
         if isinstance(ch, int) and ch in (c.KEY_END,):
-            cursor = len(input_buf)
+            editor.end()
             continue
 
         if isinstance(ch, int) and ch in (c.KEY_DC,):
-            if cursor < len(input_buf):
-                input_buf = input_buf[:cursor] + input_buf[cursor + 1 :]
+            editor.delete()
             continue
 
         if ch in (c.KEY_BACKSPACE, 127, 8, "\b", "\x7f"):
-            if cursor > 0:
-                input_buf = input_buf[: cursor - 1] + input_buf[cursor:]
-                cursor -= 1
+            editor.backspace()
             continue
 
-        if ch in (27, "\x1b"):
-            input_buf = ""
-            cursor = 0
+        if ch in (27, "\x1b") and pending and pending[0] in _ENTER_KEYS:
+            # Alt+Enter starts a new line in the draft.
+            pending.popleft()
+            editor.insert("\n")
             continue
 
-        if ch in (c.KEY_ENTER, 10, 13, "\n", "\r"):
-            line = input_buf.strip()
-            input_buf = ""
-            cursor = 0
-            if not line:
+        if ch in (27, "\x1b"):
+            if turn is not None:
+                # First Esc gives up on a running tool call; the reply goes on without it.
+                if turn["token"].cancel_tool():
+                    status = "cancelling tool call... (Esc again cancels the reply)"
+                else:
+                    turn["token"].cancel()
+                    status = "cancelling..."
+                continue
+            if job is not None:
+                append("sys", f"({job['label']} cancelled; it may still finish in the background)")
+                job = None
                 continue
+            editor.clear()
+            continue
+
+        if ch in _ENTER_KEYS and pending:
+            # More keys in the same burst: a pasted line break, not a send.
+            if ch in (13, "\r") and pending[0] in (10, "\n"):
+                pending.popleft()
+            editor.insert("\n")
+            continue
 
+        if ch in _ENTER_KEYS or ch == c.KEY_ENTER:
+            line = editor.text.strip()
             if line in {"/exit", "/quit"}:
+                if turn is not None:
+                    turn["token"].cancel()
                 append("sys", "(exit)")
                 break
 
+            if turn is not None:
+                # Keep the draft; it can be sent once the reply lands.
+                status = "busy: wait for the reply or press Esc to cancel"
+                continue
+            if job is not None:
+                status = f"busy: {job['label']} is running; press Esc to stop waiting"
+                continue
+
+            editor.clear()
+            if not line:
+                continue
+
             if line in {"/help", "help", "?"}:
                 append(
                     "sys",
-                    "commands: /roll EXPR, /config, /provider [name], /providers, /models, /model provider:model, /mcp, /reset, /exit",
+                    "commands: /roll EXPR, /config, /provider [name], /providers, /models, /model provider:model, /mcp, /stats, /reset, /exit",
                 )
                 continue
 
+            if line.startswith("/stats"):
+                append("sys", _format_net_stats(client.pool_stats(), client.rate_limit_status()))
+                append("sys", _format_render_stats(frames.stats(), screen.repaints))
+                continue
+
             if line.startswith("/reset"):
-                transcript = [("sys", "(session reset)")]
+                transcript = _Transcript([("sys", "(session reset)")])
+                screen.invalidate()
                 messages = _ensure_system_message([], cfg.chat.system_prompt)
                 continue
 
@@ -366,39 +798,75 @@ def _chat_loop(c: Any, stdscr: Any, cfg: AppConfig, share_roll: bool, path: Path
                         tool_count = rt.get("tool_count")
                         last_sync = rt.get("last_sync")
                         transport = str(scfg.transport or "auto")
+                        breaker = rt.get("breaker") or {}
 
                         if not enabled:
                             tag = "OFF"
                             off += 1
+                        elif rt.get("syncing"):
+                            tag = "SYNC"
+                        elif breaker.get("state") == "open":
+                            tag = "OPEN"
+                            err += 1
                         elif last_error:
                             tag = "ERR"
                             err += 1
                         elif initialized:
                             tag = "OK"
                             ok += 1
+                        elif rt.get("cached_at"):
+                            tag = "CACHE"
                         else:
                             tag = "NEW"
 
                         tools_str = "--"
                         if isinstance(tool_count, int):
-                            tools_str = str(tool_count)
+                            tools_str = str(tool_count) + ("+" if rt.get("truncated") else "")
                             tools_total += tool_count
 
                         sync_str = "--"
                         if isinstance(last_sync, (int, float)) and last_sync > 0:
                             age = max(0, int(now - float(last_sync)))
                             sync_str = f"{age}s"
+                        sync_ms = rt.get("sync_ms")
+                        if isinstance(sync_ms, (int, float)):
+                            sync_str += f"/{int(sync_ms)}ms"
 
                         url = scfg.url
-                        base = f"{mark} {name:<10} {tag:<3} tools={tools_str:<3} sync={sync_str:<6} transport={transport}"
+                        base = f"{mark} {name:<10} {tag:<5} tools={tools_str:<3} sync={sync_str:<12} transport={transport}"
                         if url:
                             base += f" url={url}"
+                        elif scfg.command:
+                            base += f" cmd={' '.join([scfg.command, *scfg.args])}"
                         lines.append(base)
+                        if enabled and breaker.get("state", "closed") != "closed":
+                            retry = breaker.get("retry_in_s")
+                            retry_str = f" retry_in={retry:.0f}s" if isinstance(retry, (int, float)) else ""
+                            lines.append(f"    breaker: {breaker.get('state')} failures={breaker.get('failures')}{retry_str}")
+                        process = rt.get("process") or {}
+                        if process.get("restarts") or (process and not process.get("running")):
+                            state = f"pid={process.get('pid')}" if process.get("running") else "exited"
+                            lines.append(f"    process: {state} restarts={process.get('restarts')}")
+                        stream = rt.get("stream") or {}
+                        if stream.get("reconnects") or (stream and not stream.get("connected")):
+                            state = "up" if stream.get("connected") else "down"
+                            lines.append(
+                                f"    sse: {state} reconnects={stream.get('reconnects')} downtime={stream.get('downtime_s')}s"
+                            )
                         if last_error:
                             lines.append(f"    last_error: {last_error}")
 
                     append("sys", "mcp servers:\n" + "\n".join(lines))
                     append("sys", f"mcp: ok={ok} err={err} off={off} tools_total={tools_total}")
+                    rc = client.mcp_result_cache_stats()
+                    if rc.get("hits") or rc.get("misses"):
+                        rate = rc.get("hit_rate")
+                        rate_s = "--" if rate is None else f"{rate * 100:.0f}%"
+                        append(
+                            "sys",
+                            f"mcp result cache: entries={rc.get('entries')} hits={rc.get('hits')} "
+                            f"misses={rc.get('misses')} hit_rate={rate_s}",
+                        )
 
                 if sub in {"status", "list"}:
                     render_status()
@@ -414,14 +882,7 @@ def _chat_loop(c: Any, stdscr: Any, cfg: AppConfig, share_roll: bool, path: Path
                         continue
 
                     append("sys", f"mcp: syncing{' ' + target if target else ''}...")
-                    status = "mcp syncing..."
-                    draw()
-                    try:
-                        client.mcp_sync(server_name=target)
-                    except Exception as e:
-                        append("err", f"mcp sync failed: {e}")
-                        continue
-                    render_status()
+                    start_job("mcp sync", client.mcp_sync, (target,), lambda _st: render_status())
                     continue
 
                 if sub == "tools":
@@ -430,27 +891,35 @@ def _chat_loop(c: Any, stdscr: Any, cfg: AppConfig, share_roll: bool, path: Path
                         append("err", f"unknown mcp server: {target}")
                         continue
 
-                    try:
-                        tools = client.mcp_tools(server_name=target)
-                    except Exception as e:
-                        append("err", f"mcp tools failed: {e}")
-                        continue
-
-                    if not tools:
-                        append("sys", "mcp: no tools loaded (try /mcp sync)")
-                        continue
-
-                    lines: list[str] = []
-                    for t in tools:
-                        server = str(t.get("server") or "")
-                        mcp_name = str(t.get("mcp_name") or "")
-                        public = str(t.get("public_name") or "")
-                        desc = str(t.get("description") or "")
-                        if desc:
-                            desc = desc.splitlines()[0]
-                        lines.append(f"{server}: {mcp_name} -> {public}  {desc}")
-
-                    append("sys", "mcp tools:\n" + "\n".join(lines))
+                    def show_tools(tools: list[dict[str, Any]]) -> None:
+                        if not tools:
+                            append("sys", "mcp: no tools loaded (try /mcp sync)")
+                            return
+
+                        lines: list[str] = []
+                        before = after = tok_before = tok_after = 0
+                        for t in tools:
+                            server = str(t.get("server") or "")
+                            mcp_name = str(t.get("mcp_name") or "")
+                            public = str(t.get("public_name") or "")
+                            desc = str(t.get("description") or "")
+                            if desc:
+                                desc = desc.splitlines()[0]
+                            lines.append(f"{server}: {mcp_name} -> {public}  {desc}")
+                            b0 = int(t.get("bytes_before") or 0)
+                            b1 = int(t.get("bytes_after") or 0)
+                            t0 = int(t.get("tokens_before") or 0)
+                            t1 = int(t.get("tokens_after") or 0)
+                            before += b0
+                            after += b1
+                            tok_before += t0
+                            tok_after += t1
+                            lines.append(f"    schema: {b0}B -> {b1}B  ~{t0} -> ~{t1} tok")
+
+                        lines.append(f"total: {before}B -> {after}B  ~{tok_before} -> ~{tok_after} tok")
+                        append("sys", "mcp tools:\n" + "\n".join(lines))
+
+                    start_job("mcp tools", client.mcp_tools, (target,), show_tools)
                     continue
 
                 if sub in {"on", "off", "enable", "disable"}:
@@ -465,23 +934,15 @@ def _chat_loop(c: Any, stdscr: Any, cfg: AppConfig, share_roll: bool, path: Path
                     enabled = sub in {"on", "enable"}
                     old = cfg.mcp.servers[name]
                     servers = dict(cfg.mcp.servers)
-                    servers[name] = McpServerConfig(
-                        url=old.url,
-                        transport=old.transport,
-                        protocol_version=old.protocol_version,
-                        timeout_s=old.timeout_s,
-                        verify_tls=old.verify_tls,
-                        headers=old.headers,
-                        enabled=enabled,
-                    )
+                    servers[name] = dataclasses.replace(old, enabled=enabled)
                     cfg = AppConfig(
                         active_provider=cfg.active_provider,
                         providers=cfg.providers,
                         chat=cfg.chat,
-                        mcp=McpConfig(servers=servers),
+                        mcp=dataclasses.replace(cfg.mcp, servers=servers),
                     )
                     save_config(cfg, path)
-                    client = ChatClient(cfg)
+                    client.reconfigure(cfg)
                     append("sys", f"mcp server {name}: enabled={enabled}")
                     render_status()
                     continue
@@ -524,7 +985,7 @@ def _chat_loop(c: Any, stdscr: Any, cfg: AppConfig, share_roll: bool, path: Path
                     continue
                 cfg = AppConfig(active_provider=arg, providers=cfg.providers, chat=cfg.chat, mcp=cfg.mcp)
                 save_config(cfg, path)
-                client = ChatClient(cfg)
+                client.reconfigure(cfg)
                 append("sys", f"switched provider: {arg}")
                 continue
 
@@ -571,7 +1032,7 @@ def _chat_loop(c: Any, stdscr: Any, cfg: AppConfig, share_roll: bool, path: Path
 
                 cfg = AppConfig(active_provider=prov, providers=providers, chat=cfg.chat, mcp=cfg.mcp)
                 save_config(cfg, path)
-                client = ChatClient(cfg)
+                client.reconfigure(cfg)
                 append("sys", f"switched model: {prov}:{model}")
                 continue
 
@@ -581,8 +1042,12 @@ def _chat_loop(c: Any, stdscr: Any, cfg: AppConfig, share_roll: bool, path: Path
                 updated = edit_config_tui_in_session(c, stdscr, cfg, path)
                 save_config(updated, path)
                 cfg = updated
-                client = ChatClient(cfg)
+                client.reconfigure(cfg)
                 messages = _ensure_system_message(messages, cfg.chat.system_prompt)
+                # The editor drew over the whole screen and hid the cursor.
+                c.curs_set(1)
+                screen.invalidate()
+                frames.set_max_fps(cfg.chat.tui_max_fps)
                 append("sys", f"saved: {path}")
                 continue
 
@@ -604,111 +1069,14 @@ def _chat_loop(c: Any, stdscr: Any, cfg: AppConfig, share_roll: bool, path: Path
 
             append("you", line)
             messages.append(ChatMessage(role="user", content=line))
-
-            status = "thinking..."
-            draw()
-
-            stream_slot: int | None = None
-            stream_text = ""
-            last_draw = 0.0
-            last_event_draw = 0.0
-
-            tool_status_slots: dict[str, tuple[int, float, dict[str, Any]]] = {}
-
-            def on_stream(ev: dict[str, Any]) -> None:
-                nonlocal stream_text, last_draw
-                if ev.get("type") == "content_delta":
-                    d = ev.get("delta")
-                    if isinstance(d, str) and d:
-                        stream_text += d
-                        if stream_slot is not None and 0 <= stream_slot < len(transcript):
-                            transcript[stream_slot] = ("ai", stream_text)
-
-                        now = time.monotonic()
-                        if now - last_draw >= 0.05:
-                            last_draw = now
-                            draw()
-
-            def on_event(ev: dict[str, Any]) -> None:
-                nonlocal last_event_draw
-                t = ev.get("type")
-
-                if t == "assistant_tool_calls":
-                    # If streaming produced deltas, the assistant text is already on screen.
-                    # If streaming falls back (no deltas), we still want to show the content.
-                    content = ev.get("content")
-                    if isinstance(content, str) and content.strip():
-                        if not (cfg.chat.stream and stream_text):
-                            append("ai", content)
-
-                    calls = ev.get("tool_calls")
-                    if isinstance(calls, list):
-                        for call in calls:
-                            if isinstance(call, dict):
-                                append("tool", _format_tool_call(call))
-
-                elif t == "tool_result":
-                    tool_call_id = ev.get("tool_call_id")
-                    content = ev.get("content")
-                    tool_call_id_s = str(tool_call_id) if tool_call_id else ""
-
-                    if tool_call_id_s and tool_call_id_s in tool_status_slots:
-                        slot, start_t, call = tool_status_slots[tool_call_id_s]
-                        elapsed = time.monotonic() - start_t
-                        if 0 <= slot < len(transcript):
-                            transcript[slot] = ("tool", _format_tool_status(tool_call_id_s, call, "DONE", elapsed))
-                        tool_status_slots.pop(tool_call_id_s, None)
-
-                    append("tool", _format_tool_result(tool_call_id_s or None, content))
-
-                elif t == "tool_start":
-                    tool_call_id = ev.get("tool_call_id")
-                    call = ev.get("call")
-                    tool_call_id_s = str(tool_call_id) if tool_call_id else ""
-                    call_d = call if isinstance(call, dict) else {}
-
-                    if tool_call_id_s:
-                        slot = len(transcript)
-                        transcript.append(("tool", _format_tool_status(tool_call_id_s, call_d, "RUNNING", None)))
-                        tool_status_slots[tool_call_id_s] = (slot, time.monotonic(), call_d)
-
-                elif t == "assistant_final":
-                    content = ev.get("content")
-                    if isinstance(content, str):
-                        if not (cfg.chat.stream and stream_text):
-                            append("ai", content)
-
-                elif t == "mcp_error":
-                    err = ev.get("error")
-                    append("err", f"mcp error: {err}")
-
-                now = time.monotonic()
-                if now - last_event_draw >= 0.02:
-                    last_event_draw = now
-                    draw()
-
-            if cfg.chat.stream:
-                stream_slot = len(transcript)
-                transcript.append(("ai", ""))
-
-            try:
-                _assistant_text, new_messages = client.chat(messages, on_stream=on_stream, on_event=on_event)
-            except Exception as e:
-                if stream_slot is not None and stream_slot < len(transcript):
-                    transcript.pop(stream_slot)
-                append("err", f"error: {e}")
-                continue
-
-            if stream_slot is not None and stream_slot < len(transcript):
-                transcript.pop(stream_slot)
-
-            messages = new_messages
+            start_turn()
             continue
 
         if isinstance(ch, str):
             if ch.isprintable():
-                input_buf = input_buf[:cursor] + ch + input_buf[cursor:]
-                cursor += len(ch)
+                was_empty = not editor
+                editor.insert(ch)
+                maybe_prewarm(was_empty)
             continue
 
         if isinstance(ch, int) and 0 <= ch <= 255:
@@ -717,7 +1085,8 @@ def _chat_loop(c: Any, stdscr: Any, cfg: AppConfig, share_roll: bool, path: Path
             except ValueError:
                 continue
             if s.isprintable():
-                input_buf = input_buf[:cursor] + s + input_buf[cursor:]
-                cursor += 1
+                was_empty = not editor
+                editor.insert(s)
+                maybe_prewarm(was_empty)
 
     return 0
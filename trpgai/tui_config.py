@@ -7,7 +7,7 @@ from dataclasses import asdict
 from pathlib import Path
 from typing import Any
 
-from .config import AppConfig, ProviderConfig
+from .config import AppConfig, McpConfig, ProviderConfig
 
 
 class TuiCancelled(Exception):
@@ -107,6 +107,13 @@ def _edit_config(c: Any, stdscr: Any, cfg: AppConfig, path: Path) -> AppConfig:
             {"key": f"providers.{active}.extra_headers", "kind": "json", "get": lambda: json.dumps(p.get("extra_headers", {}) or {}, ensure_ascii=True), "set": lambda v: p.__setitem__("extra_headers", v)},
 
             {"key": "mcp.servers", "kind": "json", "get": lambda: json.dumps(servers, ensure_ascii=True), "set": lambda v: mcp.__setitem__("servers", v)},
+            {"key": "mcp.sync_deadline_s", "kind": "float", "get": lambda: str(mcp.get("sync_deadline_s", McpConfig.sync_deadline_s)), "set": lambda v: mcp.__setitem__("sync_deadline_s", v)},
+            {"key": "mcp.tool_cache_ttl_s", "kind": "float", "get": lambda: str(mcp.get("tool_cache_ttl_s", McpConfig.tool_cache_ttl_s)), "set": lambda v: mcp.__setitem__("tool_cache_ttl_s", v)},
+            {"key": "mcp.result_cache_ttl_s", "kind": "float", "get": lambda: str(mcp.get("result_cache_ttl_s", McpConfig.result_cache_ttl_s)), "set": lambda v: mcp.__setitem__("result_cache_ttl_s", v)},
+            {"key": "mcp.schema_compaction", "kind": "int_or_empty", "get": lambda: str(mcp.get("schema_compaction", McpConfig.schema_compaction)), "set": lambda v: mcp.__setitem__("schema_compaction", v)},
+            {"key": "mcp.result_budget_chars", "kind": "int_or_empty", "get": lambda: str(mcp.get("result_budget_chars", McpConfig.result_budget_chars)), "set": lambda v: mcp.__setitem__("result_budget_chars", v)},
+            {"key": "mcp.turn_result_budget_chars", "kind": "int_or_empty", "get": lambda: str(mcp.get("turn_result_budget_chars", McpConfig.turn_result_budget_chars)), "set": lambda v: mcp.__setitem__("turn_result_budget_chars", v)},
+            {"key": "mcp.tool_phase_deadline_s", "kind": "float", "get": lambda: str(mcp.get("tool_phase_deadline_s", McpConfig.tool_phase_deadline_s)), "set": lambda v: mcp.__setitem__("tool_phase_deadline_s", v)},
 
             {"key": "chat.system_prompt", "kind": "text", "get": lambda: str(chat.get("system_prompt", "")), "set": lambda v: chat.__setitem__("system_prompt", v)},
             {"key": "chat.temperature", "kind": "float_or_empty", "get": lambda: "" if chat.get("temperature") is None else str(chat.get("temperature")), "set": lambda v: chat.__setitem__("temperature", v)},
@@ -114,7 +121,11 @@ def _edit_config(c: Any, stdscr: Any, cfg: AppConfig, path: Path) -> AppConfig:
             {"key": "chat.max_completion_tokens", "kind": "int_or_empty", "get": lambda: "" if chat.get("max_completion_tokens") is None else str(chat.get("max_completion_tokens")), "set": lambda v: chat.__setitem__("max_completion_tokens", v)},
             {"key": "chat.max_output_tokens", "kind": "int_or_empty", "get": lambda: "" if chat.get("max_output_tokens") is None else str(chat.get("max_output_tokens")), "set": lambda v: chat.__setitem__("max_output_tokens", v)},
             {"key": "chat.stream", "kind": "bool", "get": lambda: bool(chat.get("stream", False)), "set": lambda v: chat.__setitem__("stream", v)},
+            {"key": "chat.stream_retries", "kind": "int_or_empty", "get": lambda: "" if chat.get("stream_retries") is None else str(chat.get("stream_retries")), "set": lambda v: chat.__setitem__("stream_retries", v)},
             {"key": "chat.enable_tool_roll", "kind": "bool", "get": lambda: bool(chat.get("enable_tool_roll", True)), "set": lambda v: chat.__setitem__("enable_tool_roll", v)},
+            {"key": "chat.tool_top_k", "kind": "int_or_empty", "get": lambda: "" if chat.get("tool_top_k") is None else str(chat.get("tool_top_k")), "set": lambda v: chat.__setitem__("tool_top_k", v)},
+            {"key": "chat.tui_max_fps", "kind": "int_or_empty", "get": lambda: "" if chat.get("tui_max_fps") is None else str(chat.get("tui_max_fps")), "set": lambda v: chat.__setitem__("tui_max_fps", v)},
+            {"key": "chat.pinned_tools", "kind": "json", "get": lambda: json.dumps(chat.get("pinned_tools", []) or [], ensure_ascii=False), "set": lambda v: chat.__setitem__("pinned_tools", v)},
         ]
 
     def draw() -> None:
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+from .textwidth import char_width, slice_cols
+
+
+class InputBuffer:
+    # The chat draft as a gap buffer: characters (and their cell widths) live in
+    # lists with a hole at the cursor, so typing and pasting append into the hole
+    # and moving the cursor shifts a slice, instead of rebuilding the string on
+    # every key. The draft may hold several lines.
+    def __init__(self, text: str = ""):
+        self._chars: list[str] = []
+        self._widths: list[int] = []
+        self._gap_start = 0
+        self._gap_end = 0
+        self._text: str | None = ""
+        # Bumped on every edit or cursor move, so the screen can tell when to repaint.
+        self.version = 0
+        # Scroll state of the input region, kept between draws.
+        self._hline = 0
+        self._hoff = 0
+        self._top = 0
+        # Column that Up/Down aim for, so moving through a short line keeps it.
+        self._goal: int | None = None
+        self.insert(text)
+
+    def __len__(self) -> int:
+        return len(self._chars) - (self._gap_end - self._gap_start)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    @property
+    def cursor(self) -> int:
+        return self._gap_start
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = "".join(self._chars[: self._gap_start]) + "".join(self._chars[self._gap_end :])
+        return self._text
+
+    def clear(self) -> None:
+        self._chars = []
+        self._widths = []
+        self._gap_start = self._gap_end = 0
+        self._text = ""
+        self._hline = self._hoff = self._top = 0
+        self.version += 1
+
+    def insert(self, s: str) -> None:
+        if not s:
+            return
+        n = len(s)
+        if self._gap_end - self._gap_start < n:
+            # Grow the gap geometrically so a paste costs amortized O(1) per character.
+            grow = max(n, len(self._chars), 64)
+            self._chars[self._gap_end : self._gap_end] = [""] * grow
+            self._widths[self._gap_end : self._gap_end] = [0] * grow
+            self._gap_end += grow
+        start = self._gap_start
+        self._chars[start : start + n] = s
+        self._widths[start : start + n] = [1] * n if s.isascii() else [char_width(ch) for ch in s]
+        self._gap_start += n
+        self._edited()
+
+    def backspace(self) -> None:
+        if self._gap_start > 0:
+            self._gap_start -= 1
+            self._edited()
+
+    def delete(self) -> None:
+        if self._gap_end < len(self._chars):
+            self._gap_end += 1
+            self._edited()
+
+    def move_to(self, pos: int) -> None:
+        pos = max(0, min(len(self), pos))
+        gs, ge = self._gap_start, self._gap_end
+        if pos < gs:
+            n = gs - pos
+            self._chars[ge - n : ge] = self._chars[pos:gs]
+            self._widths[ge - n : ge] = self._widths[pos:gs]
+            self._gap_start, self._gap_end = pos, ge - n
+        elif pos > gs:
+            n = pos - gs
+            self._chars[gs:pos] = self._chars[ge : ge + n]
+            self._widths[gs:pos] = self._widths[ge : ge + n]
+            self._gap_start, self._gap_end = pos, ge + n
+        else:
+            return
+        self._goal = None
+        self.version += 1
+
+    def left(self) -> None:
+        self.move_to(self.cursor - 1)
+
+    def right(self) -> None:
+        self.move_to(self.cursor + 1)
+
+    def home(self) -> None:
+        self.move_to(self._line_start(self.cursor))
+
+    def end(self) -> None:
+        self.move_to(self._line_end(self.cursor))
+
+    def up(self) -> None:
+        start = self._line_start(self.cursor)
+        if start > 0:
+            self._move_to_line(self._line_start(start - 1))
+
+    def down(self) -> None:
+        end = self._line_end(self.cursor)
+        if end < len(self):
+            self._move_to_line(end + 1)
+
+    def line_count(self) -> int:
+        return self.text.count("\n") + 1
+
+    def cols(self, a: int, b: int) -> int:
+        # Cell width of text[a:b], from the cached per-character widths.
+        gs, gap = self._gap_start, self._gap_end - self._gap_start
+        if b <= gs:
+            return sum(self._widths[a:b])
+        if a >= gs:
+            return sum(self._widths[a + gap : b + gap])
+        return sum(self._widths[a:gs]) + sum(self._widths[self._gap_end : b + gap])
+
+    def view(self, width: int, rows: int) -> tuple[list[str], int, int]:
+        # The rows to show in a width-cell, rows-line region, and the cursor's
+        # row and column in it. The cursor line scrolls sideways to keep the
+        # cursor visible; the other lines show their start.
+        text = self.text
+        cursor = self.cursor
+        width = max(1, width)
+        rows = max(1, rows)
+        lines = text.split("\n")
+        cy = text.count("\n", 0, cursor)
+        start = text.rfind("\n", 0, cursor) + 1
+
+        if cy != self._hline:
+            self._hline = cy
+            self._hoff = 0
+        hoff = min(self._hoff, cursor - start)
+        used = self.cols(start + hoff, cursor)
+        # Cursor past the right edge: drop columns from the left, one width at a time.
+        while used > width and hoff < cursor - start:
+            used -= self._width_at(start + hoff)
+            hoff += 1
+        self._hoff = hoff
+
+        top = min(self._top, cy, max(0, len(lines) - rows))
+        top = max(top, cy - rows + 1)
+        self._top = top
+
+        out: list[str] = []
+        for i in range(top, min(len(lines), top + rows)):
+            visible, _end = slice_cols(lines[i], hoff if i == cy else 0, width)
+            out.append(visible)
+        return out, cy - top, used
+
+    def _move_to_line(self, start: int) -> None:
+        goal = self._goal
+        if goal is None:
+            goal = self.cols(self._line_start(self.cursor), self.cursor)
+        self.move_to(self._at_col(start, self._line_end(start), goal))
+        self._goal = goal
+
+    def _edited(self) -> None:
+        self._text = None
+        self._goal = None
+        self.version += 1
+
+    def _width_at(self, i: int) -> int:
+        return self._widths[i if i < self._gap_start else i + self._gap_end - self._gap_start]
+
+    def _line_start(self, pos: int) -> int:
+        return self.text.rfind("\n", 0, pos) + 1
+
+    def _line_end(self, pos: int) -> int:
+        end = self.text.find("\n", pos)
+        return len(self) if end < 0 else end
+
+    def _at_col(self, start: int, end: int, col: int) -> int:
+        # The position in text[start:end] whose column is closest to col without passing it.
+        pos = start
+        used = 0
+        while pos < end:
+            w = self._width_at(pos)
+            if used + w > col:
+                break
+            used += w
+            pos += 1
+        return pos
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Hashable
+
+REGIONS = ("transcript", "status", "input")
+
+
+class FrameScheduler:
+    # Redraw requests (keys, stream deltas, tool events) only mark the screen as
+    # wanted; at most max_fps frames a second are drawn, each covering every
+    # request since the previous one. max_fps <= 0 draws on every request.
+    def __init__(self, max_fps: int):
+        self.set_max_fps(max_fps)
+        self._pending = 0
+        self._last = float("-inf")
+        self.frames = 0
+        self.skipped = 0
+
+    def set_max_fps(self, max_fps: int) -> None:
+        self.max_fps = max(0, int(max_fps))
+        self._interval = 1.0 / self.max_fps if self.max_fps else 0.0
+
+    def request(self) -> None:
+        self._pending += 1
+
+    def wait_s(self, now: float | None = None) -> float | None:
+        # Seconds until the next frame is due, or None when nothing is pending.
+        if not self._pending:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, self._last + self._interval - now)
+
+    def due(self, now: float | None = None) -> bool:
+        return self.wait_s(now) == 0.0
+
+    def frame_done(self, drawn: bool, now: float | None = None) -> None:
+        # A request that did not get a frame of its own (coalesced, or nothing
+        # on screen changed) counts as skipped.
+        self._last = time.monotonic() if now is None else now
+        if drawn:
+            self.frames += 1
+            self.skipped += self._pending - 1
+        else:
+            self.skipped += self._pending
+        self._pending = 0
+
+    def stats(self) -> dict[str, int]:
+        return {"max_fps": self.max_fps, "frames": self.frames, "skipped": self.skipped}
+
+
+class Screen:
+    # The chat screen as three curses windows: transcript on top, then the
+    # status line and the input region (one row per draft line, up to a cap).
+    # A region is repainted only when its key changes; changed windows are
+    # staged with noutrefresh and sent in a single doupdate, so the terminal
+    # sees the cells that differ and nothing else.
+    def __init__(self, c: Any, stdscr: Any):
+        self._c = c
+        self._stdscr = stdscr
+        self._size = (0, 0, 0)
+        self.input_rows = 1
+        self._wins: dict[str, Any] = {}
+        self._keys: dict[str, Hashable] = {}
+        self.repaints = dict.fromkeys(REGIONS, 0)
+
+    def layout(self) -> tuple[int, int]:
+        h, w = self._stdscr.getmaxyx()
+        # The transcript keeps at least one row.
+        rows = max(1, min(self.input_rows, h - 2))
+        if (h, w, rows) != self._size:
+            self._size = (h, w, rows)
+            c = self._c
+            self._wins = {
+                "transcript": c.newwin(max(1, h - 1 - rows), w, 0, 0),
+                "status": c.newwin(1, w, max(0, h - 1 - rows), 0),
+                "input": c.newwin(rows, w, max(0, h - rows), 0),
+            }
+            # Keys are read from the input window: getch on stdscr would
+            # refresh stdscr and paint it over the regions.
+            self._wins["input"].keypad(True)
+            self._keys.clear()
+        return h, w
+
+    @property
+    def input(self) -> Any:
+        self.layout()
+        return self._wins["input"]
+
+    def transcript_rows(self) -> int:
+        self.layout()
+        return self._wins["transcript"].getmaxyx()[0]
+
+    def invalidate(self) -> None:
+        self._keys.clear()
+
+    def render(self, regions: dict[str, tuple[Hashable, Callable[[Any, int, int], None]]]) -> bool:
+        # regions maps a name to (key, paint); paint(win, height, width) draws
+        # into an erased window. Returns whether anything was sent.
+        self.layout()
+        changed = False
+        for name in REGIONS:
+            key, paint = regions[name]
+            if name in self._keys and self._keys[name] == key:
+                continue
+            win = self._wins[name]
+            win.erase()
+            h, w = win.getmaxyx()
+            paint(win, h, w)
+            win.noutrefresh()
+            self._keys[name] = key
+            self.repaints[name] += 1
+            changed = True
+        if not changed:
+            return False
+        # The hardware cursor follows the last window staged; keep it on the input line.
+        self._wins["input"].noutrefresh()
+        self._c.doupdate()
+        return True